@@ -0,0 +1,156 @@
+"""
+Activity Details - Laps and per-sample streams of synchronized activities
+
+For every selected activity the details stage downloads its laps
+(get_activity_splits) and time series (get_activity_details) and stores them
+as one compressed NPZ file per activity: each stream and each lap field is a
+float32 NumPy array (missing samples are NaN). The file is the index, so an
+activity is downloaded only once; activities without data get an empty file.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable, Set
+
+import numpy as np
+import pandas as pd
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Array name prefixes inside the NPZ file
+STREAM_PREFIX = 'stream_'
+LAP_PREFIX = 'lap_'
+
+
+def parse_streams(details: Dict[str, Any], keys: Iterable[str] = None) -> Dict[str, np.ndarray]:
+    """
+    Convert get_activity_details output into one array per metric
+
+    Garmin returns a list of metric descriptors (key -> index) and one
+    `metrics` list per sample; values are transposed into columns here.
+
+    Args:
+        details: get_activity_details response
+        keys: Metric keys to keep (default: config.DETAIL_STREAMS)
+
+    Returns:
+        Metric key -> float32 array (all of the same length)
+    """
+    keys = list(keys or config.DETAIL_STREAMS)
+    descriptors = {d.get('key'): d.get('metricsIndex') for d in (details or {}).get('metricDescriptors') or []}
+    samples = [sample.get('metrics') or [] for sample in (details or {}).get('activityDetailMetrics') or []]
+
+    columns = [(key, descriptors[key]) for key in keys if descriptors.get(key) is not None]
+    if not columns:
+        return {}
+    if not samples:
+        return {key: np.empty(0, np.float32) for key, _ in columns}
+
+    try:
+        # One conversion for the whole table (None -> NaN)
+        table = np.array(samples, dtype=np.float64).reshape(len(samples), -1)
+    except ValueError:
+        # Ragged samples: pad the short ones with NaN
+        width = max(len(sample) for sample in samples)
+        table = np.array([sample + [None] * (width - len(sample)) for sample in samples], dtype=np.float64)
+
+    return {
+        key: table[:, index].astype(np.float32) if index < table.shape[1] else np.full(len(samples), np.nan, np.float32)
+        for key, index in columns
+    }
+
+
+def parse_laps(splits: Dict[str, Any], fields: Iterable[str] = None) -> Dict[str, np.ndarray]:
+    """
+    Convert get_activity_splits output into one array per lap field
+
+    Args:
+        splits: get_activity_splits response ({'lapDTOs': [...]})
+        fields: Lap fields to keep (default: config.DETAIL_LAP_FIELDS)
+
+    Returns:
+        Field -> float32 array with one value per lap
+    """
+    laps = (splits or {}).get('lapDTOs') or []
+    if not laps:
+        return {}
+
+    return {
+        field: np.array([lap.get(field) if lap.get(field) is not None else np.nan for lap in laps],
+                        dtype=np.float32)
+        for field in (fields or config.DETAIL_LAP_FIELDS)
+    }
+
+
+class ActivityDetailStore:
+    """Directory of <activity_id>.npz files with laps and streams"""
+
+    def __init__(self, directory: str = None):
+        """
+        Args:
+            directory: Target directory (default: config.ACTIVITY_DETAILS_DIR)
+        """
+        self.directory = Path(directory or config.ACTIVITY_DETAILS_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, activity_id: str) -> Path:
+        return self.directory / f"{activity_id}.npz"
+
+    def has(self, activity_id: str) -> bool:
+        """Check whether details of an activity were already downloaded"""
+        return self.path(activity_id).exists()
+
+    def activity_ids(self) -> Set[str]:
+        """IDs of all activities with stored details"""
+        return {path.stem for path in self.directory.glob('*.npz')}
+
+    def missing(self, activity_ids: Iterable[str]) -> List[str]:
+        """IDs from activity_ids whose details are not stored yet (order kept)"""
+        stored = self.activity_ids()
+        return [str(activity_id) for activity_id in activity_ids if str(activity_id) not in stored]
+
+    def save(self, activity_id: str, laps: Dict[str, np.ndarray], streams: Dict[str, np.ndarray]):
+        """Write laps and streams of an activity (atomically, temp file + rename)"""
+        arrays = {f"{LAP_PREFIX}{key}": value for key, value in laps.items()}
+        arrays.update({f"{STREAM_PREFIX}{key}": value for key, value in streams.items()})
+
+        # Not *.npz, so a leftover after a crash is not taken for an activity;
+        # written through a handle because numpy appends .npz to file names
+        path = self.path(activity_id)
+        tmp_path = path.with_suffix('.npz.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def load(self, activity_id: str) -> Optional[Dict[str, Dict[str, np.ndarray]]]:
+        """
+        Read stored details
+
+        Returns:
+            {'laps': {field: array}, 'streams': {key: array}} or None if not downloaded
+        """
+        path = self.path(activity_id)
+        if not path.exists():
+            return None
+
+        details = {'laps': {}, 'streams': {}}
+        with np.load(path) as data:
+            for name in data.files:
+                if name.startswith(LAP_PREFIX):
+                    details['laps'][name[len(LAP_PREFIX):]] = data[name]
+                elif name.startswith(STREAM_PREFIX):
+                    details['streams'][name[len(STREAM_PREFIX):]] = data[name]
+        return details
+
+    def laps_frame(self, activity_id: str) -> pd.DataFrame:
+        """Laps of an activity as a DataFrame (one row per lap)"""
+        details = self.load(activity_id)
+        return pd.DataFrame(details['laps']) if details else pd.DataFrame()
+
+    def streams_frame(self, activity_id: str) -> pd.DataFrame:
+        """Streams of an activity as a DataFrame (one row per sample)"""
+        details = self.load(activity_id)
+        return pd.DataFrame(details['streams']) if details else pd.DataFrame()
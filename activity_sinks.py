@@ -0,0 +1,379 @@
+"""
+Activity Sinks - Export targets for synchronized activities
+
+GarminSync writes processed activities to one sink: Google Sheets, a local
+XLSX/CSV file, a SQLite table or a Parquet file. Every sink appends in
+batches and keeps the IDs it already holds in a set (SQLite: primary key),
+so duplicates are skipped without extra reads. Local sinks make frequent
+syncs independent of the Sheets API; the sheet can be filled later with
+`sync_garmin.py --export-only --sink sheets`.
+"""
+
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set
+
+import pandas as pd
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Columns kept as text; everything else is numeric
+TEXT_COLUMNS = ('activity_id', 'activity_type', 'date', 'title')
+
+
+def activity_to_row(activity: Dict[str, Any]) -> List[Any]:
+    """Build a row in the same order as SHEET_HEADERS (None -> '')"""
+    row = []
+    for header in config.SHEET_HEADERS:
+        value = activity.get(header)
+        row.append(value if value is not None else '')
+    return row
+
+
+def activities_to_frame(activities: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Activities as a DataFrame with SHEET_HEADERS columns and numeric metrics"""
+    df = pd.DataFrame.from_records(activities, columns=config.SHEET_HEADERS)
+    for col in config.SHEET_HEADERS:
+        if col in TEXT_COLUMNS:
+            df[col] = df[col].astype('string')
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+class ActivitySink(ABC):
+    """Base class of export targets"""
+
+    name = 'sink'
+
+    def __init__(self):
+        # IDs known to be in the target (loaded by load_ids, extended by append)
+        self.ids: Set[str] = set()
+
+    def __str__(self) -> str:
+        return self.name
+
+    def load_ids(self) -> Set[str]:
+        """Read the IDs already present in the target into self.ids"""
+        self.ids = set(self._read_ids())
+        return self.ids
+
+    def append(self, activities: List[Dict[str, Any]]) -> int:
+        """
+        Append activities that are not in the target yet
+
+        Args:
+            activities: Processed activity dictionaries (oldest first)
+
+        Returns:
+            Number of activities written
+        """
+        pending = [a for a in activities if str(a.get('activity_id')) not in self.ids]
+        if not pending:
+            return 0
+
+        self._write(pending)
+        self.ids.update(str(a.get('activity_id')) for a in pending)
+        return len(pending)
+
+    @abstractmethod
+    def latest_date(self) -> Optional[str]:
+        """Date of the newest activity in the target"""
+
+    @abstractmethod
+    def clear(self):
+        """Remove all activities from the target"""
+
+    def close(self):
+        """Release resources held by the sink"""
+
+    @abstractmethod
+    def _read_ids(self) -> List[str]:
+        """IDs of the activities in the target"""
+
+    @abstractmethod
+    def _write(self, activities: List[Dict[str, Any]]):
+        """Add activities that are not in the target yet"""
+
+
+class SheetsSink(ActivitySink):
+    """Google Sheets worksheet, newest activity on top (row 2)"""
+
+    name = 'sheets'
+
+    def __init__(self, sheet):
+        """
+        Args:
+            sheet: gspread Worksheet with SHEET_HEADERS in row 1
+        """
+        super().__init__()
+        self.sheet = sheet
+
+    def _read_ids(self) -> List[str]:
+        # First column without the header
+        return self.sheet.col_values(1)[1:]
+
+    def latest_date(self) -> Optional[str]:
+        try:
+            row = self.sheet.row_values(2)
+            date_index = config.SHEET_HEADERS.index('date')
+            return row[date_index] if len(row) > date_index and row[date_index] else None
+        except Exception as e:
+            logger.warning(f"Could not read latest activity date from sheet: {e}")
+            return None
+
+    def clear(self):
+        self.sheet.clear()
+        self.sheet.append_row(config.SHEET_HEADERS)
+        self.ids = set()
+
+    def _chunk_already_written(self, rows: List[List[Any]]) -> bool:
+        """
+        Check whether a chunk landed in the sheet despite a reported error
+
+        A timed out request may still have been applied on the Google side, so
+        before retrying we compare the IDs at the top of the sheet with the chunk.
+        """
+        try:
+            top_ids = [cell[0] if cell else '' for cell in self.sheet.get(f"A2:A{len(rows) + 1}")]
+        except Exception as e:
+            logger.warning(f"Could not verify chunk state: {e}")
+            return False
+
+        return top_ids == [str(row[0]) for row in rows]
+
+    def _write(self, activities: List[Dict[str, Any]]):
+        """Insert one chunk as a block at row 2, newest activity on top"""
+        rows = [activity_to_row(activity) for activity in reversed(activities)]
+        self.sheet.insert_rows(rows, 2, value_input_option='USER_ENTERED')
+
+    def append(self, activities: List[Dict[str, Any]]) -> int:
+        """
+        Insert activities in SHEETS_WRITE_BATCH_SIZE chunks
+
+        Each chunk is inserted as one block at row 2 with its newest activity
+        on top, so the sheet keeps the newest-on-top ordering without a
+        request per row. Writing stops at the first chunk that fails, so newer
+        chunks never end up above a missing older one.
+        """
+        pending = [a for a in activities if str(a.get('activity_id')) not in self.ids]
+        batch_size = config.SHEETS_WRITE_BATCH_SIZE
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+        written_count = 0
+
+        for chunk_number, chunk in enumerate(chunks, start=1):
+            # Newest activity of the chunk goes first
+            rows = [activity_to_row(activity) for activity in reversed(chunk)]
+
+            success = False
+            for attempt in range(config.MAX_RETRIES):
+                try:
+                    self._write(chunk)
+                    success = True
+                except Exception as e:
+                    logger.warning(
+                        f"Chunk {chunk_number}/{len(chunks)} write attempt "
+                        f"{attempt + 1}/{config.MAX_RETRIES} failed: {e}"
+                    )
+                    success = self._chunk_already_written(rows)
+                    if success:
+                        logger.info(f"Chunk {chunk_number}/{len(chunks)} was written despite the error")
+
+                if success:
+                    written_count += len(chunk)
+                    self.ids.update(str(a.get('activity_id')) for a in chunk)
+                    logger.info(
+                        f"Wrote chunk {chunk_number}/{len(chunks)}: {len(chunk)} activities "
+                        f"({chunk[0].get('date')} - {chunk[-1].get('date')})"
+                    )
+                    break
+
+                if attempt < config.MAX_RETRIES - 1:
+                    time.sleep(config.RETRY_DELAY)
+
+            if not success:
+                logger.error(
+                    f"Failed to write chunk {chunk_number}/{len(chunks)} after "
+                    f"{config.MAX_RETRIES} attempts, stopping ({len(pending) - written_count} activities not written)"
+                )
+                break
+
+        return written_count
+
+
+class FileSink(ActivitySink):
+    """Local CSV or XLSX file (.xlsx needs openpyxl), oldest activity first"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = Path(path)
+        self.excel = self.path.suffix.lower() == '.xlsx'
+        self.name = 'xlsx' if self.excel else 'csv'
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.path})"
+
+    def _read(self, columns=None) -> pd.DataFrame:
+        if not self.path.exists():
+            return pd.DataFrame(columns=columns or config.SHEET_HEADERS)
+        if self.excel:
+            return pd.read_excel(self.path, usecols=columns, dtype={'activity_id': str})
+        return pd.read_csv(self.path, usecols=columns, dtype={'activity_id': str})
+
+    def _read_ids(self) -> List[str]:
+        return self._read(['activity_id'])['activity_id'].dropna().astype(str).tolist()
+
+    def latest_date(self) -> Optional[str]:
+        dates = self._read(['date'])['date'].dropna()
+        return str(dates.max()) if len(dates) else None
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+        self.ids = set()
+
+    def _write(self, activities: List[Dict[str, Any]]):
+        df = activities_to_frame(activities)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if not self.excel:
+            # CSV is appended in place - only the new rows are written
+            df.to_csv(self.path, mode='a', header=not self.path.exists(), index=False)
+            return
+
+        # XLSX cannot be appended to; rewrite it through a temp file
+        if self.path.exists():
+            df = pd.concat([self._read(), df], ignore_index=True)
+        tmp_path = self.path.with_name(f"{self.path.stem}.tmp{self.path.suffix}")
+        df.to_excel(tmp_path, index=False)
+        tmp_path.replace(self.path)
+
+
+class ParquetSink(ActivitySink):
+    """Local Parquet file with typed columns, oldest activity first"""
+
+    name = 'parquet'
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = Path(path)
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.path})"
+
+    def _read_ids(self) -> List[str]:
+        if not self.path.exists():
+            return []
+        return pd.read_parquet(self.path, columns=['activity_id'])['activity_id'].dropna().astype(str).tolist()
+
+    def latest_date(self) -> Optional[str]:
+        if not self.path.exists():
+            return None
+        dates = pd.read_parquet(self.path, columns=['date'])['date'].dropna()
+        return str(dates.max()) if len(dates) else None
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+        self.ids = set()
+
+    def _write(self, activities: List[Dict[str, Any]]):
+        df = activities_to_frame(activities)
+        if self.path.exists():
+            # Parquet files are immutable - the new batch is written with the old rows
+            df = pd.concat([pd.read_parquet(self.path), df], ignore_index=True)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.parquet.tmp')
+        df.to_parquet(tmp_path, index=False)
+        tmp_path.replace(self.path)
+
+
+class SQLiteSink(ActivitySink):
+    """SQLite table with SHEET_HEADERS columns and activity_id as primary key"""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str, table: str = 'trainings'):
+        super().__init__()
+        self.path = path
+        self.table = table
+        self.conn = sqlite3.connect(path)
+
+        columns = ', '.join(
+            f'"{col}" TEXT PRIMARY KEY' if col == 'activity_id'
+            else f'"{col}" {"TEXT" if col in TEXT_COLUMNS else "REAL"}'
+            for col in config.SHEET_HEADERS
+        )
+        with self.conn:
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns})')
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_date" ON "{table}" (date)')
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.path}:{self.table})"
+
+    def _read_ids(self) -> List[str]:
+        return [row[0] for row in self.conn.execute(f'SELECT activity_id FROM "{self.table}"')]
+
+    def latest_date(self) -> Optional[str]:
+        return self.conn.execute(f'SELECT MAX(date) FROM "{self.table}"').fetchone()[0]
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute(f'DELETE FROM "{self.table}"')
+        self.ids = set()
+
+    def append(self, activities: List[Dict[str, Any]]) -> int:
+        """Insert all activities in one transaction; the primary key skips duplicates"""
+        before = self.conn.total_changes
+        self._write(activities)
+
+        self.ids.update(str(a.get('activity_id')) for a in activities)
+        return self.conn.total_changes - before
+
+    def _write(self, activities: List[Dict[str, Any]]):
+        columns = ', '.join(f'"{col}"' for col in config.SHEET_HEADERS)
+        placeholders = ', '.join('?' for _ in config.SHEET_HEADERS)
+        rows = [[a.get(col) for col in config.SHEET_HEADERS] for a in activities]
+
+        with self.conn:
+            self.conn.executemany(
+                f'INSERT OR IGNORE INTO "{self.table}" ({columns}) VALUES ({placeholders})', rows
+            )
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# Local sink kinds (Google Sheets needs a connected worksheet, see SheetsSink)
+LOCAL_SINKS = {
+    'xlsx': FileSink,
+    'csv': FileSink,
+    'sqlite': SQLiteSink,
+    'parquet': ParquetSink,
+}
+
+SINK_KINDS = ['sheets'] + list(LOCAL_SINKS)
+
+
+def create_local_sink(kind: str, path: str = None) -> ActivitySink:
+    """
+    Create a local sink
+
+    Args:
+        kind: 'xlsx', 'csv', 'sqlite' or 'parquet'
+        path: Target file (default: config.SYNC_SINK_PATHS[kind])
+    """
+    if kind not in LOCAL_SINKS:
+        raise ValueError(f"Unknown local sink '{kind}', expected one of: {', '.join(LOCAL_SINKS)}")
+
+    path = path or config.SYNC_SINK_PATHS[kind]
+    if kind in ('xlsx', 'csv') and Path(path).suffix.lower() != f'.{kind}':
+        raise ValueError(f"Sink '{kind}' needs a .{kind} file, got {path}")
+    return LOCAL_SINKS[kind](path)
@@ -0,0 +1,313 @@
+"""
+Activity Store - Local SQLite storage for synchronized Garmin activities
+
+The store is the source of truth for sync_garmin: it keeps every processed
+row together with the raw activity JSON returned by Garmin. Google Sheets is
+only an export target and can be rebuilt from the store at any time.
+"""
+
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Set, Tuple
+
+import pandas as pd
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    activity_id TEXT PRIMARY KEY,
+    date TEXT,
+    activity_type TEXT,
+    row_json TEXT NOT NULL,
+    raw_json TEXT,
+    exported INTEGER NOT NULL DEFAULT 0,
+    synced_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_activities_date ON activities (date);
+CREATE INDEX IF NOT EXISTS idx_activities_exported ON activities (exported);
+CREATE TABLE IF NOT EXISTS exports (
+    sink TEXT NOT NULL,
+    activity_id TEXT NOT NULL,
+    PRIMARY KEY (sink, activity_id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+# Export target tracked by the `exported` column; other sinks use the exports table
+DEFAULT_SINK = 'sheets'
+
+# IDs bound per IN (...) query, below SQLite's default limit of 999 variables
+QUERY_CHUNK_SIZE = 500
+
+
+def watermark_key(date: str, activity_id) -> Tuple[str, int]:
+    """Order of the sync watermark: date, then activity ID as a number ('9' < '10')"""
+    return date, int(activity_id)
+
+
+class ActivityStore:
+    """SQLite-backed store of processed activities and their raw Garmin JSON"""
+
+    def __init__(self, db_path: str = None):
+        """
+        Open (or create) the activity database
+
+        Args:
+            db_path: Path to the SQLite file (default: config.ACTIVITY_DB_PATH)
+        """
+        self.db_path = db_path or config.ACTIVITY_DB_PATH
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        """Close the database connection"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def count(self) -> int:
+        """Number of stored activities"""
+        return self.conn.execute("SELECT COUNT(*) FROM activities").fetchone()[0]
+
+    def has_activity(self, activity_id: str) -> bool:
+        """Check whether an activity is already stored (primary key lookup)"""
+        row = self.conn.execute(
+            "SELECT 1 FROM activities WHERE activity_id = ?", (str(activity_id),)
+        ).fetchone()
+        return row is not None
+
+    def activity_ids(self) -> Set[str]:
+        """All stored activity IDs"""
+        return {row[0] for row in self.conn.execute("SELECT activity_id FROM activities")}
+
+    def ordered_activity_ids(self, activity_types: Iterable[str] = None) -> List[str]:
+        """IDs of stored activities (optionally only of the given types), newest first"""
+        if activity_types is None:
+            cursor = self.conn.execute("SELECT activity_id FROM activities ORDER BY date DESC, activity_id DESC")
+        else:
+            activity_types = list(activity_types)
+            placeholders = ', '.join('?' for _ in activity_types)
+            cursor = self.conn.execute(
+                f"SELECT activity_id FROM activities WHERE activity_type IN ({placeholders}) "
+                f"ORDER BY date DESC, activity_id DESC",
+                activity_types
+            )
+        return [row[0] for row in cursor]
+
+    def save_activities(self, activities: Iterable[Dict[str, Any]],
+                        raw_activities: Dict[str, Dict[str, Any]] = None,
+                        exported_ids: Set[str] = None) -> int:
+        """
+        Insert or update processed activities
+
+        Args:
+            activities: Processed activity dictionaries (as from process_activity)
+            raw_activities: Raw Garmin JSON keyed by activity ID
+            exported_ids: IDs already present in the export target (e.g. the sheet)
+
+        Returns:
+            Number of activities saved
+        """
+        raw_activities = raw_activities or {}
+        exported_ids = exported_ids or set()
+        synced_at = datetime.now(config.TIMEZONE).isoformat(timespec='seconds')
+
+        records = []
+        for activity in activities:
+            activity_id = str(activity['activity_id'])
+            raw = raw_activities.get(activity_id)
+            records.append((
+                activity_id,
+                activity.get('date'),
+                activity.get('activity_type'),
+                json.dumps(activity, ensure_ascii=False),
+                json.dumps(raw, ensure_ascii=False) if raw is not None else None,
+                1 if activity_id in exported_ids else 0,
+                synced_at,
+            ))
+
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO activities
+                    (activity_id, date, activity_type, row_json, raw_json, exported, synced_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (activity_id) DO UPDATE SET
+                    date = excluded.date,
+                    activity_type = excluded.activity_type,
+                    row_json = excluded.row_json,
+                    raw_json = COALESCE(excluded.raw_json, activities.raw_json),
+                    exported = MAX(activities.exported, excluded.exported),
+                    synced_at = excluded.synced_at
+                """,
+                records
+            )
+
+        logger.info(f"Saved {len(records)} activities to local store")
+        return len(records)
+
+    def mark_exported(self, activity_ids: Iterable[str], exported: bool = True, sink: str = DEFAULT_SINK):
+        """Set the export flag of the given activities for a sink"""
+        ids = [str(activity_id) for activity_id in activity_ids]
+        with self.conn:
+            if sink == DEFAULT_SINK:
+                self.conn.executemany(
+                    "UPDATE activities SET exported = ? WHERE activity_id = ?",
+                    [(1 if exported else 0, activity_id) for activity_id in ids]
+                )
+            elif exported:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO exports (sink, activity_id) VALUES (?, ?)",
+                    [(sink, activity_id) for activity_id in ids]
+                )
+            else:
+                self.conn.executemany(
+                    "DELETE FROM exports WHERE sink = ? AND activity_id = ?",
+                    [(sink, activity_id) for activity_id in ids]
+                )
+
+    def reset_exported(self, sink: str = DEFAULT_SINK):
+        """Mark every activity as not exported to a sink (used when rebuilding it)"""
+        with self.conn:
+            if sink == DEFAULT_SINK:
+                self.conn.execute("UPDATE activities SET exported = 0")
+            else:
+                self.conn.execute("DELETE FROM exports WHERE sink = ?", (sink,))
+
+    def get_unexported(self, sink: str = DEFAULT_SINK) -> List[Dict[str, Any]]:
+        """Processed activities not yet written to a sink, oldest first"""
+        if sink == DEFAULT_SINK:
+            cursor = self.conn.execute(
+                "SELECT row_json FROM activities WHERE exported = 0 ORDER BY date ASC, activity_id ASC"
+            )
+        else:
+            cursor = self.conn.execute(
+                """
+                SELECT row_json FROM activities
+                WHERE activity_id NOT IN (SELECT activity_id FROM exports WHERE sink = ?)
+                ORDER BY date ASC, activity_id ASC
+                """,
+                (sink,)
+            )
+        return [json.loads(row[0]) for row in cursor]
+
+    def iter_activities(self, newest_first: bool = False) -> Iterator[Dict[str, Any]]:
+        """Iterate processed activities ordered by date"""
+        order = 'DESC' if newest_first else 'ASC'
+        cursor = self.conn.execute(
+            f"SELECT row_json FROM activities ORDER BY date {order}, activity_id {order}"
+        )
+        for row in cursor:
+            yield json.loads(row[0])
+
+    def latest_activity_date(self) -> Optional[str]:
+        """Date of the newest stored activity ('YYYY-MM-DD HH:MM:SS')"""
+        return self.conn.execute("SELECT MAX(date) FROM activities").fetchone()[0]
+
+    def get_state(self, key: str) -> Optional[str]:
+        """Read a persisted sync state value"""
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str):
+        """Persist a sync state value"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def get_watermark(self) -> Optional[Dict[str, str]]:
+        """
+        High-water mark of the sync: newest activity seen so far
+
+        Returns:
+            {'date': 'YYYY-MM-DD HH:MM:SS', 'activity_id': '...'} or None before the first sync
+        """
+        value = self.get_state('watermark')
+        return json.loads(value) if value else None
+
+    def update_watermark(self, date: str, activity_id: str) -> bool:
+        """
+        Move the high-water mark forward (never backwards)
+
+        Returns:
+            True if the watermark changed
+        """
+        current = self.get_watermark()
+        if current and watermark_key(current['date'], current['activity_id']) >= watermark_key(date, activity_id):
+            return False
+
+        self.set_state('watermark', json.dumps({'date': date, 'activity_id': str(activity_id)}))
+        return True
+
+    def get_rows(self, activity_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Stored processed rows of the given activities (missing ones are left out)"""
+        ids = sorted({str(activity_id) for activity_id in activity_ids})
+        rows = []
+        for start in range(0, len(ids), QUERY_CHUNK_SIZE):
+            chunk = ids[start:start + QUERY_CHUNK_SIZE]
+            placeholders = ', '.join('?' for _ in chunk)
+            cursor = self.conn.execute(
+                f"SELECT row_json FROM activities WHERE activity_id IN ({placeholders})", chunk
+            )
+            rows.extend(json.loads(row[0]) for row in cursor)
+        return rows
+
+    def revision(self) -> Dict[str, Any]:
+        """
+        Marker of the stored content: activity count and newest synced_at
+
+        Derived data (activity_summary) records it to detect that the store
+        changed without it.
+        """
+        count, synced_at = self.conn.execute("SELECT COUNT(*), MAX(synced_at) FROM activities").fetchone()
+        return {'activities': count, 'synced_at': synced_at}
+
+    def get_raw_activity(self, activity_id: str) -> Optional[Dict[str, Any]]:
+        """Raw Garmin JSON for an activity, if stored"""
+        row = self.conn.execute(
+            "SELECT raw_json FROM activities WHERE activity_id = ?", (str(activity_id),)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Load all processed activities as a DataFrame (newest first, like the sheet)
+
+        Returns:
+            DataFrame with SHEET_HEADERS columns, numeric metrics and parsed dates
+        """
+        rows = list(self.iter_activities(newest_first=True))
+        if not rows:
+            return pd.DataFrame()
+
+        df = pd.DataFrame.from_records(rows, columns=config.SHEET_HEADERS)
+
+        for col in config.SHEET_HEADERS:
+            if col not in ('activity_id', 'activity_type', 'date', 'title'):
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        return df
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Activity Summary - Persisted running aggregates of all synchronized activities
+
+The training summary (totals, activity types, running statistics, last
+activities) plus weekly volume is kept as aggregate state in
+activity_summary.json: counts, sums and value counts per activity type, sums
+per week and the newest activities. print_summary is the one formatter of the
+summary, used here and by fetch_training_data. GarminSync folds every batch saved to the
+local activity store into it, so refreshing the summary costs O(new rows)
+instead of rescanning the whole history.
+
+The per-activity contributions are the store rows themselves (keyed by
+activity ID): before a row is overwritten its previous version is subtracted,
+so an edited activity is not counted twice. The file only holds the aggregates
+and a watermark of the store they match (ActivityStore.revision); a summary
+whose watermark differs from the store is rebuilt.
+
+Usage:
+    python activity_summary.py              # print the persisted summary
+    python activity_summary.py --rebuild    # rebuild it from the local activity store
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+from typing import List, Dict, Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+import config
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_VERSION = 2
+
+# Metrics summed per activity type; means are sum / number of non-empty values
+SUMMARY_METRICS = ['distance_km', 'duration_min', 'avg_pace', 'avg_hr', 'calories']
+
+# Metrics summed per week
+WEEKLY_METRICS = ['distance_km', 'duration_min']
+
+RECENT_COLUMNS = ['activity_id', 'date', 'activity_type', 'title', 'distance_km', 'duration_min']
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _number(value) -> float:
+    return float(value) if value is not None and value == value else None
+
+
+class ActivitySummary:
+    """Aggregate state updated with new activities only"""
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: JSON file of the state (default: config.ACTIVITY_SUMMARY_PATH)
+        """
+        self.path = path or config.ACTIVITY_SUMMARY_PATH
+        self.count = 0
+        self.watermark = None
+        self.first_date = None
+        self.last_date = None
+        self.types: Dict[str, Dict[str, Any]] = {}
+        self.weeks: Dict[str, Dict[str, Any]] = {}
+        self.recent: List[Dict[str, Any]] = []
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, path: str = None) -> 'ActivitySummary':
+        """Aggregates of the activities in a DataFrame (not persisted)"""
+        summary = cls(path)
+        summary.update_frame(df)
+        return summary
+
+    @classmethod
+    def load(cls, path: str = None) -> 'ActivitySummary':
+        """Persisted state, empty if missing, unreadable or of another version"""
+        summary = cls(path)
+        if not os.path.exists(summary.path):
+            return summary
+
+        try:
+            with open(summary.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read activity summary {summary.path}: {e}")
+            return summary
+
+        if state.get('version') != SUMMARY_VERSION:
+            logger.info(f"Activity summary {summary.path} has an old format, starting from scratch")
+            return summary
+
+        summary.count = state['count']
+        summary.watermark = state['watermark']
+        summary.first_date = state['first_date']
+        summary.last_date = state['last_date']
+        summary.types = state['types']
+        summary.weeks = state['weeks']
+        summary.recent = state['recent']
+        return summary
+
+    def save(self):
+        """Write the state (temp file + rename)"""
+        state = {
+            'version': SUMMARY_VERSION,
+            'watermark': self.watermark,
+            'count': self.count,
+            'first_date': self.first_date,
+            'last_date': self.last_date,
+            'types': self.types,
+            'weeks': self.weeks,
+            'recent': self.recent,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Forget all aggregates"""
+        self.__init__(self.path)
+
+    def update(self, activities: Iterable[Dict[str, Any]],
+               previous: Iterable[Dict[str, Any]] = ()) -> int:
+        """
+        Fold processed activity rows (transform_activities output) into the state
+
+        Args:
+            activities: Rows to add
+            previous: Earlier versions of the same activities (as stored before
+                the update); their contribution is subtracted first
+
+        Returns:
+            Number of activities added
+        """
+        previous = list(previous)
+        if previous:
+            self._fold(self._frame(pd.DataFrame.from_records(previous)), -1)
+
+        activities = list(activities)
+        if not activities:
+            return 0
+        return self.update_frame(pd.DataFrame.from_records(activities))
+
+    def update_frame(self, df: pd.DataFrame) -> int:
+        """
+        Add every activity of a DataFrame to the state
+
+        Args:
+            df: Activities with activity_id, date, activity_type and SUMMARY_METRICS
+
+        Returns:
+            Number of activities added
+        """
+        new = self._frame(df)
+        if new.empty:
+            return 0
+        self._fold(new, 1)
+        return len(new)
+
+    @staticmethod
+    def _frame(df: pd.DataFrame) -> pd.DataFrame:
+        """Rows with an activity ID (last version of each), typed for aggregation"""
+        if df.empty or 'activity_id' not in df.columns:
+            return pd.DataFrame()
+
+        ids = df['activity_id'].fillna('').astype(str)
+        rows = df.loc[ids != ''].copy()
+        rows['activity_id'] = ids[rows.index]
+        rows = rows.drop_duplicates('activity_id', keep='last')
+        if rows.empty:
+            return rows
+
+        rows['date'] = pd.to_datetime(rows['date'], errors='coerce') if 'date' in rows.columns else pd.NaT
+        rows['activity_type'] = rows['activity_type'].fillna('').astype(str) if 'activity_type' in rows.columns else ''
+        for column in SUMMARY_METRICS:
+            rows[column] = pd.to_numeric(rows[column], errors='coerce') if column in rows.columns else np.nan
+        return rows
+
+    def _fold(self, rows: pd.DataFrame, sign: int):
+        """Add (sign=1) or subtract (sign=-1) the contribution of typed rows"""
+        self.count += sign * len(rows)
+        self._add_types(rows, sign)
+        self._add_weeks(rows, sign)
+
+        # Drop the old entries of these activities; added rows re-enter below
+        ids = set(rows['activity_id'])
+        self.recent = [row for row in self.recent if row['activity_id'] not in ids]
+        if sign > 0:
+            self._add_dates_and_recent(rows)
+
+    def _add_types(self, new: pd.DataFrame, sign: int):
+        grouped = new.groupby('activity_type')
+        sums = grouped[SUMMARY_METRICS].sum()
+        counts = grouped[SUMMARY_METRICS].count()
+        sizes = grouped.size()
+
+        for activity_type, size in sizes.items():
+            entry = self.types.setdefault(activity_type, {'count': 0, 'sums': {}, 'counts': {}})
+            entry['count'] += sign * int(size)
+            for column in SUMMARY_METRICS:
+                entry['sums'][column] = entry['sums'].get(column, 0.0) + sign * float(sums.at[activity_type, column])
+                entry['counts'][column] = entry['counts'].get(column, 0) + sign * int(counts.at[activity_type, column])
+            if entry['count'] <= 0:
+                del self.types[activity_type]
+
+    def _add_weeks(self, new: pd.DataFrame, sign: int):
+        dated = new.dropna(subset=['date'])
+        if dated.empty:
+            return
+
+        # Week = Monday of the activity's week
+        weeks = (dated['date'].dt.normalize() - pd.to_timedelta(dated['date'].dt.weekday, unit='D')).dt.strftime('%Y-%m-%d')
+        grouped = dated.groupby(weeks)
+        sums = grouped[WEEKLY_METRICS].sum()
+        sizes = grouped.size()
+
+        for week, size in sizes.items():
+            entry = self.weeks.setdefault(week, {'activities': 0, **{column: 0.0 for column in WEEKLY_METRICS}})
+            entry['activities'] += sign * int(size)
+            for column in WEEKLY_METRICS:
+                entry[column] += sign * float(sums.at[week, column])
+            if entry['activities'] <= 0:
+                del self.weeks[week]
+
+    def _add_dates_and_recent(self, new: pd.DataFrame):
+        # The date range only widens: edits on Garmin do not move an activity's start time
+        dated = new.dropna(subset=['date'])
+        if dated.empty:
+            return
+
+        first = dated['date'].min().strftime(DATE_FORMAT)
+        last = dated['date'].max().strftime(DATE_FORMAT)
+        self.first_date = min(self.first_date, first) if self.first_date else first
+        self.last_date = max(self.last_date, last) if self.last_date else last
+
+        # Only the newest rows of the batch can enter the list
+        limit = config.SUMMARY_RECENT_ACTIVITIES
+        candidates = dated.nlargest(limit, 'date')
+        rows = [{
+            'activity_id': row.activity_id,
+            'date': row.date.strftime(DATE_FORMAT),
+            'activity_type': row.activity_type,
+            'title': row.title if 'title' in dated.columns and isinstance(row.title, str) else '',
+            'distance_km': _number(row.distance_km),
+            'duration_min': _number(row.duration_min),
+        } for row in candidates.itertuples()]
+
+        self.recent = sorted(self.recent + rows, key=lambda a: a['date'], reverse=True)[:limit]
+
+    def describes(self, df: pd.DataFrame) -> bool:
+        """
+        Check whether the state covers the activities of df
+
+        Compares the count, the date range and the IDs of the newest
+        activities, so a filtered or partial frame is not mistaken for the
+        full history.
+        """
+        if not self.count or len(df) != self.count or not {'activity_id', 'date'} <= set(df.columns):
+            return False
+
+        dates = pd.to_datetime(df['date'], errors='coerce').dropna()
+        if dates.empty or (dates.min().strftime(DATE_FORMAT), dates.max().strftime(DATE_FORMAT)) != (self.first_date, self.last_date):
+            return False
+
+        recent_ids = {row['activity_id'] for row in self.recent}
+        return recent_ids <= set(df['activity_id'].astype(str))
+
+    def stats(self, type_filter: str = None) -> Dict[str, Any]:
+        """
+        Count, sums and means over the activity types containing type_filter
+
+        Args:
+            type_filter: Case-insensitive substring of the type (default: all types)
+
+        Returns:
+            {'count': n, 'total_<metric>': sum, 'avg_<metric>': mean or None}
+        """
+        selected = [entry for activity_type, entry in self.types.items()
+                    if type_filter is None or type_filter.lower() in activity_type.lower()]
+
+        result = {'count': sum(entry['count'] for entry in selected)}
+        for column in SUMMARY_METRICS:
+            total = sum(entry['sums'].get(column, 0.0) for entry in selected)
+            values = sum(entry['counts'].get(column, 0) for entry in selected)
+            result[f'total_{column}'] = total
+            result[f'avg_{column}'] = total / values if values else None
+        return result
+
+    def weekly_frame(self) -> pd.DataFrame:
+        """Weekly activity count and WEEKLY_METRICS sums, oldest week first"""
+        if not self.weeks:
+            return pd.DataFrame(columns=['activities'] + WEEKLY_METRICS)
+        df = pd.DataFrame.from_dict(self.weeks, orient='index').sort_index()
+        df.index = pd.to_datetime(df.index)
+        return df.rename_axis('week')
+
+    def print_summary(self, recent: int = 5):
+        """Print the training data summary from the aggregates"""
+        print("\n" + "=" * 70)
+        print("TRAINING DATA SUMMARY")
+        print("=" * 70)
+
+        print(f"\nTotal activities: {self.count}")
+
+        if self.first_date:
+            print(f"Date range: {self.first_date[:10]} to {self.last_date[:10]}")
+
+        if self.types:
+            print(f"\nActivity types:")
+            for activity, entry in sorted(self.types.items(), key=lambda item: -item[1]['count']):
+                print(f"   - {activity}: {entry['count']}")
+
+        running = self.stats('running')
+        if running['count']:
+            print(f"\nRUNNING STATISTICS:")
+
+            if running['avg_distance_km'] is not None:
+                print(f"   Total distance: {running['total_distance_km']:.2f} km")
+                print(f"   Average distance: {running['avg_distance_km']:.2f} km per run")
+
+            if running['avg_duration_min'] is not None:
+                total_time = running['total_duration_min']
+                print(f"   Total time: {total_time:.0f} minutes ({total_time/60:.1f} hours)")
+                print(f"   Average time: {running['avg_duration_min']:.1f} minutes per run")
+
+            if running['avg_avg_pace'] is not None:
+                print(f"   Average pace: {running['avg_avg_pace']:.2f} min/km")
+
+            if running['avg_avg_hr'] is not None:
+                print(f"   Average heart rate: {running['avg_avg_hr']:.0f} bpm")
+
+            if running['avg_calories'] is not None:
+                print(f"   Total calories burned: {running['total_calories']:.0f} kcal")
+
+        if self.recent:
+            print(f"\nLast {min(recent, len(self.recent))} activities:")
+            for row in self.recent[:recent]:
+                distance_str = f"{row['distance_km']:.2f} km" if row['distance_km'] is not None else 'N/A'
+                duration_str = f"{row['duration_min']:.0f} min" if row['duration_min'] is not None else 'N/A'
+                print(f"   {row['date'][:10]} | {row['activity_type']} | {row['title']} | {distance_str} | {duration_str}")
+
+        print("\n" + "=" * 70)
+
+
+def rebuild_from_store(path: str = None, db_path: str = None) -> ActivitySummary:
+    """Recompute the summary from all activities in the local store and save it"""
+    from activity_store import ActivityStore
+
+    summary = ActivitySummary(path)
+    with ActivityStore(db_path) as store:
+        summary.update_frame(store.to_dataframe())
+        summary.watermark = store.revision()
+    summary.save()
+    return summary
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Print the incrementally maintained training summary')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Recompute the summary from the local activity store')
+    parser.add_argument('--weeks', type=int, default=0,
+                        help='Also print volume of the last N weeks')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=config.LOG_FORMAT, datefmt=config.LOG_DATE_FORMAT)
+
+    if args.rebuild:
+        if not os.path.exists(config.ACTIVITY_DB_PATH):
+            logger.error(f"Local activity store not found: {config.ACTIVITY_DB_PATH}")
+            sys.exit(1)
+        summary = rebuild_from_store()
+    else:
+        summary = ActivitySummary.load()
+
+    if not summary.count:
+        logger.warning(f"No activities in {summary.path} (run sync_garmin.py or --rebuild)")
+        sys.exit(0)
+
+    summary.print_summary()
+
+    if args.weeks:
+        print(f"\nLast {args.weeks} weeks:")
+        for week, row in summary.weekly_frame().tail(args.weeks).iterrows():
+            print(f"   {week.strftime('%Y-%m-%d')} | {row['distance_km']:.1f} km | "
+                  f"{row['duration_min'] / 60:.1f} h | {int(row['activities'])} activities")
+
+
+if __name__ == '__main__':
+    main()
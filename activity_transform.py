@@ -0,0 +1,135 @@
+"""
+Activity Transform - Table-driven conversion of raw Garmin activities to sheet rows
+
+The mapping lives in config.ACTIVITY_TRANSFORMS as (source key, column,
+converter) entries. All activities of a batch are converted at once: each
+source key becomes one NumPy column and every converter is a vectorized
+operation on that column.
+"""
+
+import logging
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def _is_missing(values: np.ndarray) -> np.ndarray:
+    return pd.isna(values)
+
+
+def _positive_or_nan(values: np.ndarray) -> np.ndarray:
+    """Numeric values, with missing/zero/negative values as NaN (Garmin uses 0 for 'no data')"""
+    numbers = pd.to_numeric(values, errors='coerce').astype(float)
+    return np.where(numbers > 0, numbers, np.nan)
+
+
+def convert_id(values: np.ndarray) -> np.ndarray:
+    """Activity ID as string ('' when missing)"""
+    return np.array(['' if v is None or v != v else str(v) for v in values], dtype=object)
+
+
+def convert_type_key(values: np.ndarray) -> np.ndarray:
+    """activityType dict -> its typeKey"""
+    return np.array([v.get('typeKey', '') if isinstance(v, dict) else '' for v in values], dtype=object)
+
+
+def convert_datetime(values: np.ndarray) -> np.ndarray:
+    """ISO timestamp -> 'YYYY-MM-DD HH:MM:SS' (unparseable values are kept as they are)"""
+    text = np.where(_is_missing(values), '', values).astype(str)
+    parsed = pd.to_datetime(np.char.replace(text, 'Z', '+00:00'), errors='coerce', format='ISO8601')
+    formatted = np.asarray(parsed.strftime('%Y-%m-%d %H:%M:%S'), dtype=object)
+    return np.where(parsed.notna(), formatted, text.astype(object))
+
+
+def convert_text(values: np.ndarray) -> np.ndarray:
+    """Plain text ('' when missing)"""
+    return np.where(_is_missing(values), '', values)
+
+
+def convert_raw(values: np.ndarray) -> np.ndarray:
+    """Value passed through unchanged"""
+    return values
+
+
+def convert_m_to_km(values: np.ndarray) -> np.ndarray:
+    """Meters -> kilometers"""
+    return np.round(_positive_or_nan(values) / 1000, 2)
+
+
+def convert_s_to_min(values: np.ndarray) -> np.ndarray:
+    """Seconds -> minutes"""
+    return np.round(_positive_or_nan(values) / 60, 2)
+
+
+def convert_mps_to_min_per_km(values: np.ndarray) -> np.ndarray:
+    """Speed in m/s -> pace in min/km: (1000 / speed) / 60"""
+    return np.round(1000 / _positive_or_nan(values) / 60, 2)
+
+
+CONVERTERS = {
+    'id': convert_id,
+    'type_key': convert_type_key,
+    'datetime': convert_datetime,
+    'text': convert_text,
+    'raw': convert_raw,
+    'm_to_km': convert_m_to_km,
+    's_to_min': convert_s_to_min,
+    'mps_to_min_per_km': convert_mps_to_min_per_km,
+}
+
+
+def transform_columns(activities: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Convert raw Garmin activities to one NumPy array per SHEET_HEADERS column
+
+    Activities without an ID are dropped. Missing values are None.
+
+    Args:
+        activities: Raw activity dictionaries from Garmin
+
+    Returns:
+        Dictionary of column name -> object array
+    """
+    if not activities:
+        return {column: np.empty(0, dtype=object) for column in config.SHEET_HEADERS}
+
+    columns = {}
+    for source, column, converter in config.ACTIVITY_TRANSFORMS:
+        raw = np.empty(len(activities), dtype=object)
+        raw[:] = [activity.get(source) for activity in activities]
+
+        converted = np.asarray(CONVERTERS[converter](raw), dtype=object)
+        converted[_is_missing(converted)] = None
+        columns[column] = converted
+
+    has_id = columns['activity_id'] != ''
+    if not has_id.all():
+        logger.warning(f"Skipping {int((~has_id).sum())} activities without ID")
+        columns = {column: values[has_id] for column, values in columns.items()}
+
+    return columns
+
+
+def transform_frame(activities: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Convert raw Garmin activities to a DataFrame with SHEET_HEADERS columns"""
+    return pd.DataFrame(transform_columns(activities), columns=config.SHEET_HEADERS)
+
+
+def transform_activities(activities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Convert raw Garmin activities to processed row dictionaries
+
+    Args:
+        activities: Raw activity dictionaries from Garmin
+
+    Returns:
+        List of processed activity dictionaries keyed by SHEET_HEADERS
+    """
+    columns = transform_columns(activities)
+    headers = list(columns)
+    return [dict(zip(headers, row)) for row in zip(*columns.values())]
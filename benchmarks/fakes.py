@@ -0,0 +1,378 @@
+"""
+In-process stand-ins for the Garmin Connect client and a gspread worksheet
+
+Both fakes count API calls and accumulate simulated latency instead of
+sleeping, so benchmarks run offline and fast while still showing how many
+round-trips a code path would make against the real services.
+"""
+
+import io
+import bisect
+import random
+import re
+import struct
+import threading
+import zipfile
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+
+import numpy as np
+
+import requests
+
+ACTIVITY_TYPES = ['running', 'running', 'running', 'cycling', 'strength_training', 'yoga']
+
+
+class ApiStats:
+    """API call counter with simulated latency"""
+
+    def __init__(self, latency: float = 0.0, per_row_latency: float = 0.0):
+        """
+        Args:
+            latency: Simulated seconds per request
+            per_row_latency: Simulated seconds per returned/written row
+        """
+        self.latency = latency
+        self.per_row_latency = per_row_latency
+        self.calls = Counter()
+        self.simulated_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, name: str, rows: int = 0):
+        with self._lock:
+            self.calls[name] += 1
+            self.simulated_seconds += self.latency + rows * self.per_row_latency
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset(self):
+        self.calls.clear()
+        self.simulated_seconds = 0.0
+
+
+def generate_activities(count: int, end_date: datetime = None, per_day: float = 1.5,
+                        seed: int = 42, first_id: int = 10_000_000_000) -> List[Dict[str, Any]]:
+    """
+    Generate a synthetic activity history shaped like get_activities_by_date results
+
+    Args:
+        count: Number of activities
+        end_date: Date of the newest activity (default: today)
+        per_day: Average activities per day (controls how many years are covered)
+        seed: Random seed (histories are reproducible)
+        first_id: activityId of the oldest activity
+
+    Returns:
+        Activities ordered oldest first
+    """
+    rng = random.Random(seed)
+    end_date = (end_date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    days = max(1, int(count / per_day))
+    start_date = end_date - timedelta(days=days)
+
+    offsets = sorted(rng.uniform(0, days * 86400) for _ in range(count))
+    activities = []
+
+    for index, offset in enumerate(offsets):
+        start = start_date + timedelta(seconds=offset)
+        activity_type = rng.choice(ACTIVITY_TYPES)
+        duration = rng.uniform(1200, 7200)
+        speed = rng.uniform(2.4, 4.6) if activity_type == 'running' else rng.uniform(5.0, 9.0)
+        distance = speed * duration if activity_type in ('running', 'cycling') else None
+
+        activities.append({
+            'activityId': first_id + index,
+            'activityName': f"{activity_type.replace('_', ' ').title()} #{index}",
+            'activityType': {'typeKey': activity_type},
+            'startTimeLocal': start.strftime('%Y-%m-%d %H:%M:%S'),
+            'distance': distance,
+            'duration': duration,
+            'movingDuration': duration * 0.97,
+            'elapsedDuration': duration * 1.02,
+            'calories': int(duration / 60 * rng.uniform(8, 14)),
+            'averageHR': rng.randint(120, 165),
+            'maxHR': rng.randint(165, 195),
+            'averageSpeed': speed,
+            'maxSpeed': speed * rng.uniform(1.1, 1.5),
+            'averageRunningCadenceInStepsPerMinute': rng.uniform(160, 185) if activity_type == 'running' else None,
+            'maxRunningCadenceInStepsPerMinute': rng.uniform(185, 210) if activity_type == 'running' else None,
+            'avgGroundContactTime': rng.uniform(220, 280),
+            'avgStrideLength': rng.uniform(90, 140),
+            'avgVerticalOscillation': rng.uniform(7, 10),
+            'avgVerticalRatio': rng.uniform(6, 9),
+            'avgGradeAdjustedSpeed': speed * rng.uniform(0.98, 1.05),
+            'elevationGain': rng.uniform(0, 400),
+            'elevationLoss': rng.uniform(0, 400),
+            'aerobicTrainingEffect': rng.uniform(1.5, 4.5),
+            'trainingStressScore': rng.uniform(20, 180),
+            'steps': int(duration * 2.8),
+            'avgRespiration': rng.uniform(25, 40),
+            'avgPower': rng.uniform(200, 320),
+        })
+
+    return activities
+
+
+FIT_EPOCH_OFFSET = 631065600
+
+
+def encode_fit(activity: Dict[str, Any], samples: int) -> bytes:
+    """
+    Minimal FIT file: a file_id message and one record per second
+
+    The first record has a full timestamp, the following ones use compressed
+    timestamp headers, so both header forms are exercised. The CRC fields
+    are left zero.
+    """
+    start = int(datetime.strptime(activity['startTimeLocal'], '%Y-%m-%d %H:%M:%S').timestamp()) - FIT_EPOCH_OFFSET
+    rng = np.random.default_rng(activity['activityId'])
+    speed = activity['averageSpeed'] * rng.uniform(0.9, 1.1, samples)
+
+    body = bytearray()
+    # file_id (global 0) on local type 1: type (enum), manufacturer (uint16)
+    body += struct.pack('<BBBHB', 0x41, 0, 0, 0, 2) + bytes([0, 1, 0x00, 1, 2, 0x84])
+    body += struct.pack('<BBH', 0x01, 4, 1)
+    # record (global 20): local type 0 with a timestamp, local type 2 without (compressed header)
+    record_fields = [(253, 4, 0x86), (5, 4, 0x86), (3, 1, 0x02), (4, 1, 0x02), (73, 4, 0x86)]
+    body += struct.pack('<BBBHB', 0x40, 0, 0, 20, len(record_fields))
+    body += bytes(value for field in record_fields for value in field)
+    body += struct.pack('<BBBHB', 0x42, 0, 0, 20, len(record_fields) - 1)
+    body += bytes(value for field in record_fields[1:] for value in field)
+
+    records = np.zeros(samples, dtype=[('header', 'u1'), ('distance', '<u4'), ('heart_rate', 'u1'),
+                                       ('cadence', 'u1'), ('speed', '<u4')])
+    records['header'] = 0x80 | (2 << 5) | ((start + np.arange(samples)) & 0x1F)
+    records['distance'] = np.cumsum(speed) * 100
+    records['heart_rate'] = activity['averageHR'] + rng.integers(-8, 9, samples)
+    records['cadence'] = rng.integers(80, 93, samples)
+    records['speed'] = speed * 1000
+
+    first = records[0]
+    body += struct.pack('<BIIBBI', 0x00, start, int(first['distance']), int(first['heart_rate']),
+                        int(first['cadence']), int(first['speed']))
+    body += records[1:].tobytes()
+
+    header = struct.pack('<BBHI4sH', 14, 0x20, 2132, len(body), b'.FIT', 0)
+    return header + bytes(body) + b'\x00\x00'
+
+
+class FakeResponse:
+    """Minimal requests.Response stand-in"""
+
+    def __init__(self, status_code: int = 200, payload: Any = None):
+        self.status_code = status_code
+        self._payload = payload or {}
+        self.text = str(self._payload)
+
+    def json(self):
+        return self._payload
+
+
+class FakeGarth:
+    """Stand-in for client.garth (raw connectapi calls)"""
+
+    def __init__(self, garmin: 'FakeGarmin'):
+        self.garmin = garmin
+        self._next_schedule_id = 500_000_000
+
+    @staticmethod
+    def _path_id(path: str) -> int:
+        return int(path.rstrip('/').rsplit('/', 1)[-1])
+
+    @staticmethod
+    def _not_found(path: str):
+        raise requests.HTTPError(f"404 Client Error: Not Found for url: {path}", response=FakeResponse(404))
+
+    def post(self, subdomain: str, path: str, **kwargs) -> FakeResponse:
+        self.garmin.stats.record('garth.post')
+        with self.garmin._lock:
+            schedule_id = self._next_schedule_id
+            self._next_schedule_id += 1
+        return FakeResponse(200, {'workoutScheduleId': schedule_id})
+
+    def put(self, subdomain: str, path: str, **kwargs) -> FakeResponse:
+        self.garmin.stats.record('garth.put')
+        workout_id = self._path_id(path)
+        if workout_id not in self.garmin.workouts:
+            self._not_found(path)
+        payload = kwargs.get('json', {})
+        self.garmin.workouts[workout_id].update(workoutName=payload.get('workoutName'),
+                                                description=payload.get('description'))
+        return FakeResponse(204)
+
+    def delete(self, subdomain: str, path: str, **kwargs) -> FakeResponse:
+        self.garmin.stats.record('garth.delete')
+        if '/workout-service/workout/' in path:
+            if self.garmin.workouts.pop(self._path_id(path), None) is None:
+                self._not_found(path)
+        return FakeResponse(204)
+
+
+class FakeGarmin:
+    """Stand-in for garminconnect.Garmin backed by a synthetic history"""
+
+    class ActivityDownloadFormat:
+        ORIGINAL = 'original'
+
+    def __init__(self, activities: List[Dict[str, Any]] = None, stats: ApiStats = None):
+        self.stats = stats or ApiStats()
+        self.garth = FakeGarth(self)
+        self.workouts = {}
+        self._next_workout_id = 900_000_000
+        self._lock = threading.Lock()
+        self._activities = []
+        self._by_id = {}
+        self._dates = []
+        self.add_activities(activities or [])
+
+    def add_activities(self, activities: List[Dict[str, Any]]):
+        """Add activities (e.g. to simulate new ones between two syncs)"""
+        self._activities.extend(activities)
+        self._by_id.update((str(a['activityId']), a) for a in activities)
+        self._activities.sort(key=lambda a: a['startTimeLocal'])
+        self._dates = [a['startTimeLocal'][:10] for a in self._activities]
+
+    def get_activities_by_date(self, startdate: str, enddate: str) -> List[Dict[str, Any]]:
+        lo = bisect.bisect_left(self._dates, startdate)
+        hi = bisect.bisect_right(self._dates, enddate)
+        result = self._activities[lo:hi][::-1]  # newest first, like Garmin
+        self.stats.record('get_activities_by_date', len(result))
+        return [dict(activity) for activity in result]
+
+    def _activity(self, activity_id) -> Dict[str, Any]:
+        activity = self._by_id.get(str(activity_id))
+        if activity is not None:
+            return activity
+        raise requests.HTTPError(f"404 Client Error: Not Found for activity {activity_id}", response=FakeResponse(404))
+
+    def get_activity_splits(self, activity_id) -> Dict[str, Any]:
+        """Laps of 1 km (the last one shorter)"""
+        activity = self._activity(activity_id)
+        distance, speed = activity.get('distance') or 0.0, activity['averageSpeed']
+        laps = []
+        while distance > 0:
+            lap_distance = min(1000.0, distance)
+            laps.append({'distance': lap_distance, 'duration': lap_distance / speed,
+                         'averageHR': activity['averageHR'], 'averageSpeed': speed})
+            distance -= lap_distance
+        self.stats.record('get_activity_splits', len(laps))
+        return {'activityId': activity['activityId'], 'lapDTOs': laps}
+
+    def get_activity_details(self, activity_id, maxchart: int = 2000, maxpoly: int = 4000) -> Dict[str, Any]:
+        """One sample per second (at most maxchart) with HR, speed and cadence"""
+        activity = self._activity(activity_id)
+        rng = np.random.default_rng(activity['activityId'])
+        samples = min(int(activity['duration']), maxchart)
+        keys = ['sumDuration', 'directHeartRate', 'directSpeed', 'directRunCadence']
+        metrics = np.column_stack([
+            np.linspace(0, activity['duration'], samples),
+            activity['averageHR'] + rng.uniform(-8, 8, samples),
+            activity['averageSpeed'] * rng.uniform(0.9, 1.1, samples),
+            rng.uniform(165, 185, samples),
+        ]).tolist()
+        self.stats.record('get_activity_details', samples)
+        return {
+            'activityId': activity['activityId'],
+            'metricDescriptors': [{'metricsIndex': index, 'key': key} for index, key in enumerate(keys)],
+            'activityDetailMetrics': [{'metrics': values} for values in metrics],
+        }
+
+    def download_activity(self, activity_id, dl_fmt=None) -> bytes:
+        """Original file as Garmin returns it: a ZIP with one .fit member"""
+        activity = self._activity(activity_id)
+        fit = encode_fit(activity, int(activity['duration']))
+        self.stats.record('download_activity')
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr(f"{activity['activityId']}_ACTIVITY.fit", fit)
+        return buffer.getvalue()
+
+    def upload_workout(self, workout_json: Dict[str, Any]) -> Dict[str, Any]:
+        self.stats.record('upload_workout')
+        with self._lock:
+            workout_id = self._next_workout_id
+            self._next_workout_id += 1
+        self.workouts[workout_id] = {
+            'workoutId': workout_id,
+            'workoutName': workout_json.get('workoutName'),
+            'description': workout_json.get('description'),
+            'createdDate': datetime.now().strftime('%Y-%m-%dT%H:%M:%S.0'),
+        }
+        return {'workoutId': workout_id}
+
+    def get_workouts(self, start: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        workouts = list(self.workouts.values())[start:start + limit]
+        self.stats.record('get_workouts', len(workouts))
+        return workouts
+
+
+class FakeWorksheet:
+    """Stand-in for gspread.Worksheet holding rows in memory"""
+
+    def __init__(self, stats: ApiStats = None):
+        self.stats = stats or ApiStats()
+        self.rows: List[List[Any]] = []
+
+    @staticmethod
+    def _as_cells(row: List[Any]) -> List[str]:
+        """Values as the Sheets API returns them (formatted strings, trailing blanks dropped)"""
+        cells = ['' if value is None else str(value) for value in row]
+        while cells and cells[-1] == '':
+            cells.pop()
+        return cells
+
+    def row_values(self, row: int) -> List[str]:
+        self.stats.record('row_values', 1)
+        return self._as_cells(self.rows[row - 1]) if len(self.rows) >= row else []
+
+    def col_values(self, col: int) -> List[str]:
+        self.stats.record('col_values', len(self.rows))
+        return [str(row[col - 1]) if len(row) >= col else '' for row in self.rows]
+
+    def append_row(self, values: List[Any], **kwargs):
+        self.stats.record('append_row', 1)
+        self.rows.append(list(values))
+
+    def insert_row(self, values: List[Any], index: int = 1, **kwargs):
+        self.stats.record('insert_row', 1)
+        self.rows.insert(index - 1, list(values))
+
+    def insert_rows(self, values: List[List[Any]], row: int = 1, **kwargs):
+        self.stats.record('insert_rows', len(values))
+        self.rows[row - 1:row - 1] = [list(v) for v in values]
+
+    def get_all_values(self) -> List[List[str]]:
+        self.stats.record('get_all_values', len(self.rows))
+        width = max((len(row) for row in self.rows), default=0)
+        return [[str(v) if v is not None else '' for v in row] + [''] * (width - len(row)) for row in self.rows]
+
+    def get(self, range_name: str) -> List[List[str]]:
+        """Read an A1 range such as 'A2:A201' or 'A2:AH11'"""
+        match = re.fullmatch(r'([A-Z]+)(\d+):([A-Z]+)(\d+)', range_name)
+        if not match:
+            raise ValueError(f"Unsupported range: {range_name}")
+
+        first_col, first_row = self._column_index(match.group(1)), int(match.group(2))
+        last_col, last_row = self._column_index(match.group(3)), int(match.group(4))
+
+        values = [self._as_cells(row[first_col - 1:last_col]) for row in self.rows[first_row - 1:last_row]]
+        while values and not values[-1]:
+            values.pop()
+
+        self.stats.record('get', len(values))
+        return values
+
+    def clear(self):
+        self.stats.record('clear')
+        self.rows = []
+
+    @staticmethod
+    def _column_index(letters: str) -> int:
+        index = 0
+        for letter in letters:
+            index = index * 26 + ord(letter) - ord('A') + 1
+        return index
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for sync, backfill, activity details, FIT files, fetch and plan upload
+
+Runs the real code paths against the fakes in benchmarks/fakes.py and reports
+wall time, API call count, simulated API latency and peak Python memory.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --activities 1000 10000 100000 --latency 0.3
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+from datetime import datetime, timedelta
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import config
+from fakes import ApiStats, FakeGarmin, FakeWorksheet, generate_activities
+
+PLAN_FILE = REPO_ROOT / 'plan' / 'plan_treningowy_10km_38min.md'
+
+
+def measure(name, func, stats):
+    """Run func once and collect wall time, API calls and peak memory"""
+    stats.reset()
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        detail = func()
+    finally:
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'benchmark': name,
+        'wall_s': elapsed,
+        'api_calls': stats.total_calls,
+        'api_s': stats.simulated_seconds,
+        'peak_mb': peak / 1024 / 1024,
+        'detail': detail,
+    }
+
+
+def bench_sync(count, stats, workdir):
+    """Backfill a full history, then an incremental sync with a few new activities"""
+    import sync_garmin
+
+    config.ACTIVITY_DB_PATH = os.path.join(workdir, f'sync_{count}.db')
+    config.ACTIVITY_SUMMARY_PATH = os.path.join(workdir, f'summary_{count}.json')
+    end_date = datetime.now() - timedelta(days=1)
+    history = generate_activities(count, end_date=end_date)
+    history_days = (end_date - datetime.strptime(history[0]['startTimeLocal'][:10], '%Y-%m-%d')).days + 2
+
+    garmin = FakeGarmin(history, stats)
+    sheet = FakeWorksheet(stats)
+    sheet.rows.append(list(config.SHEET_HEADERS))
+
+    def backfill():
+        syncer = sync_garmin.GarminSync()
+        syncer.garmin_client, syncer.sheet = garmin, sheet
+        written = syncer.sync(days=history_days)
+        syncer.store.close()
+        return f"{written} written"
+
+    def incremental():
+        garmin.add_activities(generate_activities(3, end_date=datetime.now(), per_day=3,
+                                                  seed=7, first_id=20_000_000_000))
+        syncer = sync_garmin.GarminSync()
+        syncer.garmin_client, syncer.sheet = garmin, sheet
+        written = syncer.sync()
+        syncer.store.close()
+        return f"{written} written"
+
+    results = [measure(f'backfill ({count})', backfill, stats),
+               measure(f'sync ({count})', incremental, stats)]
+    return results, sheet
+
+
+def bench_details(count, stats, workdir):
+    """Download laps/streams and FIT files of a history, then again with nothing missing"""
+    import sync_garmin
+    import fit_archive
+
+    config.ACTIVITY_DB_PATH = os.path.join(workdir, f'details_{count}.db')
+    config.ACTIVITY_SUMMARY_PATH = os.path.join(workdir, f'details_summary_{count}.json')
+    config.ACTIVITY_DETAILS_DIR = os.path.join(workdir, f'details_{count}')
+    config.FIT_ARCHIVE_DIR = os.path.join(workdir, f'fit_{count}')
+    end_date = datetime.now() - timedelta(days=1)
+    history = generate_activities(count, end_date=end_date)
+    history_days = (end_date - datetime.strptime(history[0]['startTimeLocal'][:10], '%Y-%m-%d')).days + 2
+
+    garmin = FakeGarmin(history, stats)
+    sheet = FakeWorksheet(stats)
+    sheet.rows.append(list(config.SHEET_HEADERS))
+
+    syncer = sync_garmin.GarminSync()
+    syncer.garmin_client, syncer.sheet = garmin, sheet
+    syncer.sync(days=history_days, details=False)
+
+    def details():
+        downloaded = syncer.sync_details()
+        return f"{downloaded} downloaded"
+
+    def fit_files():
+        downloaded = syncer.sync_fit_files()
+        return f"{downloaded} downloaded"
+
+    def fit_decode():
+        df = fit_archive.map_archive(archive=syncer.fit_archive)
+        return f"{int(df['samples'].sum())} records"
+
+    try:
+        return [measure(f'details ({count})', details, stats),
+                measure(f'details again ({count})', details, stats),
+                measure(f'fit download ({count})', fit_files, stats),
+                measure(f'fit download again ({count})', fit_files, stats),
+                measure(f'fit decode ({count})', fit_decode, stats)]
+    finally:
+        syncer.store.close()
+
+
+def bench_fetch(count, sheet, stats, workdir):
+    """Full and incremental TrainingDataFetcher reads of the synced sheet"""
+    import fetch_training_data
+
+    config.TRAINING_DATA_CACHE = os.path.join(workdir, f'training_{count}.parquet')
+    config.TRAINING_DATA_CACHE_META = os.path.join(workdir, f'training_{count}.meta.json')
+
+    fetcher = fetch_training_data.TrainingDataFetcher()
+    fetcher.sheet = sheet
+
+    def full():
+        df = fetcher.fetch_all_data()
+        fetcher.save_snapshot(df)
+        return f"{len(df)} rows"
+
+    def incremental():
+        df = fetcher.fetch_incremental()
+        return f"{len(df)} rows"
+
+    return [measure(f'fetch full ({count})', full, stats),
+            measure(f'fetch incremental ({count})', incremental, stats)]
+
+
+def bench_plan_upload(repeats, stats, workdir):
+    """Parse, generate and upload a plan made of `repeats` copies of the sample plan"""
+    import upload_workouts_to_garmin
+    import workout_manifest
+
+    content = PLAN_FILE.read_text(encoding='utf-8')
+    weeks = 16
+    copies = [shift_weeks(content, copy * weeks) for copy in range(repeats)]
+
+    plan_path = Path(workdir) / f'plan_x{repeats}.md'
+    plan_path.write_text('\n'.join(copies), encoding='utf-8')
+
+    workout_manifest.MANIFEST_DIR = Path(workdir) / 'manifests'
+    garmin = FakeGarmin(stats=stats)
+    start_date = datetime.now()
+
+    def upload():
+        uploader = upload_workouts_to_garmin.GarminWorkoutUploader(None, None)
+        uploader.client = garmin
+        workouts = uploader.parse_training_plan(plan_path)
+        results = uploader.sync_plan(workouts, plan_path, start_date=start_date)
+        changed = sum(1 for r in results if r['action'] != 'unchanged')
+        return f"{changed}/{len(workouts)} created/updated"
+
+    return [measure(f'plan upload ({weeks * repeats} weeks)', upload, stats),
+            measure(f'plan re-upload ({weeks * repeats} weeks)', upload, stats)]
+
+
+def shift_weeks(content, offset):
+    """Renumber '### Tydzień N' headings by offset"""
+    return re.sub(r'### Tydzień (\d+)', lambda m: f"### Tydzień {int(m.group(1)) + offset}", content)
+
+
+def print_results(results, latency):
+    print()
+    print(f"{'benchmark':<32} {'wall [s]':>9} {'API calls':>10} {'API time [s]':>13} {'peak [MB]':>10}  detail")
+    print('-' * 95)
+    for r in results:
+        print(f"{r['benchmark']:<32} {r['wall_s']:>9.3f} {r['api_calls']:>10} "
+              f"{r['api_s']:>13.1f} {r['peak_mb']:>10.1f}  {r['detail']}")
+    print(f"\nAPI time = calls x {latency}s simulated latency (not slept)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline performance benchmarks')
+    parser.add_argument('--activities', type=int, nargs='+', default=[1000, 10000],
+                        help='History sizes to benchmark (default: 1000 10000)')
+    parser.add_argument('--latency', type=float, default=0.3,
+                        help='Simulated seconds per API request (default: 0.3)')
+    parser.add_argument('--detail-activities', type=int, default=200,
+                        help='History size for the activity details benchmark (default: 200)')
+    parser.add_argument('--plan-repeats', type=int, default=4,
+                        help='Number of sample plan copies for the upload benchmark (default: 4)')
+    args = parser.parse_args()
+
+    # Benchmarks measure the code, not the logging or retry pauses
+    config.RETRY_DELAY = 0
+    config.GARMIN_REQUESTS_PER_SECOND = 0
+    config.LOG_FILE = os.devnull
+    logging.disable(logging.WARNING)
+
+    stats = ApiStats(latency=args.latency)
+    results = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in args.activities:
+            sync_results, sheet = bench_sync(count, stats, workdir)
+            results.extend(sync_results)
+            results.extend(bench_fetch(count, sheet, stats, workdir))
+
+        results.extend(bench_details(args.detail_activities, stats, workdir))
+
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            results.extend(bench_plan_upload(args.plan_repeats, stats, workdir))
+        finally:
+            sys.stdout.close()
+            sys.stdout = sys.__stdout__
+
+    print_results(results, args.latency)
+
+
+if __name__ == '__main__':
+    main()
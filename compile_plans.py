@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Compile Training Plans - Batch parse plans and generate workout JSON
+Kompiluje wszystkie plany z katalogu plan/ równolegle (bez połączenia z Garmin)
+
+Plany mogą leżeć bezpośrednio w plan/ albo w podkatalogach zawodników:
+
+    plan/plan_treningowy_10km_38min.md  -> plan/workouts_json/plan_treningowy_10km_38min/
+    plan/anna/maraton_330.md            -> plan/workouts_json/anna/maraton_330/
+
+Usage:
+    python compile_plans.py
+    python compile_plans.py --workers 8 --no-cache
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import plan_cache
+from upload_workouts_to_garmin import GarminWorkoutUploader, GENERATOR_VERSION, workout_filename
+from workout_manifest import plan_id, PLAN_DIR
+
+OUTPUT_DIR = PLAN_DIR / 'workouts_json'
+
+# Katalogi w plan/, które nie zawierają planów
+SKIP_DIRS = {'workouts_json', 'manifests'}
+
+
+def discover_plans(plan_dir):
+    """
+    Znajduje pliki planów (*.md) w plan_dir i podkatalogach zawodników
+
+    Returns:
+        Lista (athlete, plan_file); athlete = None dla planów bezpośrednio w plan_dir
+    """
+    plan_dir = Path(plan_dir)
+    plans = []
+
+    for plan_file in sorted(plan_dir.rglob('*.md')):
+        relative = plan_file.relative_to(plan_dir)
+        if any(part in SKIP_DIRS or part.startswith('.') for part in relative.parts[:-1]):
+            continue
+        athlete = '/'.join(relative.parts[:-1]) or None
+        plans.append((athlete, plan_file))
+
+    return plans
+
+
+def compile_plan(athlete, plan_file, output_dir, plan_dir=None, use_cache=True):
+    """
+    Parsuje jeden plan i zapisuje JSON jego treningów (uruchamiane w procesie roboczym)
+
+    ID planu (a więc workoutId/stepId) i wpis cache są liczone względem
+    plan_dir (domyślnie PLAN_DIR), tak samo jak robi to uploader.
+
+    Returns:
+        Słownik z wynikiem: plan, athlete, workouts, cached, written/unchanged/removed,
+        warnings, seconds, error
+    """
+    started = time.perf_counter()
+    result = {'plan': Path(plan_file).name, 'athlete': athlete, 'workouts': 0, 'cached': False,
+              'written': 0, 'unchanged': 0, 'removed': 0, 'warnings': [], 'error': None}
+
+    plan_dir = Path(plan_dir or PLAN_DIR)
+    cache_dir = plan_dir / '.cache'
+
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            uploader = GarminWorkoutUploader(None, None)
+            cached = plan_cache.load_cached_plan(plan_file, GENERATOR_VERSION, cache_dir) if use_cache else None
+            if cached:
+                workouts, payloads = cached
+                result['cached'] = True
+            else:
+                workouts = uploader.parse_training_plan(plan_file)
+                payloads = [uploader.generate_garmin_workout_json(workout, plan_id(plan_file, plan_dir))
+                            for workout in workouts]
+                plan_cache.save_cached_plan(plan_file, GENERATOR_VERSION, workouts, payloads, cache_dir)
+
+        if not workouts:
+            raise ValueError("nie znaleziono treningów w planie")
+
+        target = Path(output_dir) / (athlete or '') / Path(plan_file).stem
+        files = {workout_filename(workout): payload for workout, payload in zip(workouts, payloads)}
+        result.update(plan_cache.write_workout_files(target, files))
+        result['workouts'] = len(workouts)
+
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+
+    result['warnings'] = [line for line in output.getvalue().splitlines() if line.startswith('[WARN]')]
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def print_report(results, elapsed):
+    print("\n" + "=" * 90)
+    print(f"{'zawodnik':<12} {'plan':<36} {'treningi':>8} {'zapisano':>9} {'bez zmian':>10} {'czas [ms]':>10}")
+    print("-" * 90)
+    for r in results:
+        athlete = r['athlete'] or '-'
+        if r['error']:
+            print(f"{athlete:<12} {r['plan']:<36} [ERROR] {r['error']}")
+            continue
+        source = ' (cache)' if r['cached'] else ''
+        print(f"{athlete:<12} {r['plan']:<36} {r['workouts']:>8} {r['written']:>9} {r['unchanged']:>10} "
+              f"{r['seconds'] * 1000:>10.1f}{source}")
+
+    failed = [r for r in results if r['error']]
+    warnings = sum(len(r['warnings']) for r in results)
+    print("-" * 90)
+    print(f"Plany: {len(results)}, błędy: {len(failed)}, ostrzeżenia parsera: {warnings}")
+    print(f"Czas: {elapsed:.2f}s (suma czasów planów: {sum(r['seconds'] for r in results):.2f}s)")
+    print("=" * 90)
+
+    for r in results:
+        for warning in r['warnings']:
+            print(f"{r['athlete'] or '-'}/{r['plan']}: {warning}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch compile training plans to Garmin workout JSON')
+    parser.add_argument('--plan-dir', type=Path, default=PLAN_DIR,
+                        help='Katalog z planami (domyślnie plan/ albo GARMIN_PLAN_DIR)')
+    parser.add_argument('--output', type=Path, default=OUTPUT_DIR,
+                        help='Katalog wynikowy (domyślnie plan/workouts_json/)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Liczba procesów (domyślnie liczba rdzeni)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Parsuj wszystkie plany od nowa (ignoruj <plan-dir>/.cache/)')
+    args = parser.parse_args()
+
+    plans = discover_plans(args.plan_dir)
+    if not plans:
+        print(f"[ERROR] Nie znaleziono planów w: {args.plan_dir}")
+        return 1
+
+    print(f"Kompilacja {len(plans)} planów ({args.workers} procesów)...")
+    started = time.perf_counter()
+    results = []
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(compile_plan, athlete, plan_file, args.output,
+                                   args.plan_dir, not args.no_cache)
+                   for athlete, plan_file in plans]
+        for future in as_completed(futures):
+            results.append(future.result())
+
+    results.sort(key=lambda r: (r['athlete'] or '', r['plan']))
+    print_report(results, time.perf_counter() - started)
+    return 1 if any(r['error'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
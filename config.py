@@ -17,13 +17,104 @@ GOOGLE_SHEET_PATH = r'G:\Mój dysk\Bieganie\garmin_trainings.xlsx'
 GARMIN_EMAIL = os.getenv('GARMIN_EMAIL')
 GARMIN_PASSWORD = os.getenv('GARMIN_PASSWORD')
 
+# Cached Garmin OAuth tokens (skip the full SSO login while they are valid)
+GARMIN_TOKEN_STORE = os.getenv('GARMIN_TOKEN_STORE', '~/.garminconnect')
+
+# Local activity store (source of truth, the sheet is an export target)
+ACTIVITY_DB_PATH = os.getenv('GARMIN_ACTIVITY_DB', 'garmin_activities.db')
+
+# Export target of sync_garmin (activity_sinks): sheets, xlsx, csv, sqlite or parquet
+SYNC_SINK = os.getenv('GARMIN_SYNC_SINK', 'sheets')
+SYNC_SINK_PATH = os.getenv('GARMIN_SYNC_SINK_PATH')  # default: SYNC_SINK_PATHS[SYNC_SINK]
+SYNC_SINK_PATHS = {
+    'xlsx': 'garmin_trainings.xlsx',
+    'csv': 'garmin_trainings.csv',
+    'sqlite': 'garmin_trainings.db',
+    'parquet': 'garmin_trainings.parquet',
+}
+
+# Optional details stage: laps and per-sample streams of new activities (activity_details)
+SYNC_ACTIVITY_DETAILS = os.getenv('GARMIN_SYNC_DETAILS', '0') == '1'
+ACTIVITY_DETAILS_DIR = os.getenv('GARMIN_ACTIVITY_DETAILS_DIR', 'activity_details')
+DETAIL_ACTIVITY_TYPES = ['running', 'trail_running', 'treadmill_running', 'track_running']
+DETAIL_BACKFILL_BATCH = 50  # older activities per run with --backfill
+DETAIL_MAX_SAMPLES = 10000  # maxChartSize of get_activity_details (~per second for runs under 2.5 h)
+DETAIL_STREAMS = [
+    'sumDuration',
+    'sumDistance',
+    'directHeartRate',
+    'directSpeed',
+    'directRunCadence',
+    'directPower',
+    'directElevation',
+    'directLatitude',
+    'directLongitude',
+]
+DETAIL_LAP_FIELDS = [
+    'distance',
+    'duration',
+    'movingDuration',
+    'averageHR',
+    'maxHR',
+    'averageSpeed',
+    'averageRunCadence',
+    'averagePower',
+    'elevationGain',
+    'elevationLoss',
+]
+
+# Optional FIT stage: original files of new activities in a content-addressed archive (fit_archive)
+SYNC_FIT_FILES = os.getenv('GARMIN_SYNC_FIT', '0') == '1'
+FIT_ARCHIVE_DIR = os.getenv('GARMIN_FIT_ARCHIVE_DIR', 'fit_archive')
+FIT_BACKFILL_BATCH = 50  # older activities per run with --backfill
+
+# Parquet cache written by fetch_training_data (fast local analysis)
+TRAINING_DATA_CACHE = 'training_data.parquet'
+TRAINING_DATA_CACHE_META = 'training_data.meta.json'
+SHEET_DELTA_PAGE_SIZE = 200  # activity IDs read per request when looking for new rows
+
+# Persisted summary aggregates (activity_summary.py), updated with every batch saved to the store
+ACTIVITY_SUMMARY_PATH = 'activity_summary.json'
+SUMMARY_RECENT_ACTIVITIES = 10  # newest activities kept in the summary
+
+# Training load (training_load.py): cache, load estimate without TSS, averaging windows
+TRAINING_LOAD_CACHE = 'training_load.parquet'
+LOAD_THRESHOLD_HR = 170  # lactate threshold HR for the hrTSS estimate
+LOAD_DEFAULT_TSS_PER_HOUR = 50  # activities without TSS and HR
+CTL_DAYS = 42  # fitness
+ATL_DAYS = 7  # fatigue
+ACWR_ACUTE_DAYS = 7
+ACWR_CHRONIC_DAYS = 28
+
+# Plan vs. actual (plan_compliance.py)
+COMPLIANCE_MATCH_DAYS = 1  # a session may be done this many days before/after its planned day
+COMPLIANCE_MIN_RATIO = 0.9  # actual / planned distance needed for 'completed'
+
 # Initial sync period (days)
 INITIAL_SYNC_DAYS = 365  # Pobierz ostatni rok
 
+# Incremental sync: days re-fetched before the watermark (newest activity seen)
+SYNC_OVERLAP_DAYS = 1
+
+# Activities are fetched in windows of this many days (bounded memory, per-window retries)
+FETCH_WINDOW_DAYS = 31
+
 # Retry configuration
 MAX_RETRIES = 3
 RETRY_DELAY = 5  # seconds
 API_TIMEOUT = 30  # seconds
+BACKOFF_MAX_DELAY = 120  # seconds, upper bound of the shared HTTP 429 backoff
+
+# Garmin fetch concurrency (1 = serial) and shared rate limit for all workers
+FETCH_CONCURRENCY = int(os.getenv('GARMIN_FETCH_CONCURRENCY', '1'))
+GARMIN_REQUESTS_PER_SECOND = 2.0
+GARMIN_RATE_BURST = 4
+
+# Workout upload/schedule workers (same shared rate limit as above)
+UPLOAD_CONCURRENCY = int(os.getenv('GARMIN_UPLOAD_CONCURRENCY', '4'))
+
+# Google Sheets write configuration
+SHEETS_WRITE_BATCH_SIZE = 500  # rows inserted per API call
 
 # Logging configuration
 LOG_FILE = 'sync_garmin.log'
@@ -78,77 +169,48 @@ ADDITIONAL_METRICS = [
 # All metrics combined
 ALL_METRICS = BASIC_METRICS + RUNNING_METRICS + ADDITIONAL_METRICS
 
+# Activity transform spec: (Garmin source key, sheet column, converter)
+# Converters (see activity_transform.CONVERTERS): id, type_key, datetime, text, raw,
+# m_to_km, s_to_min, mps_to_min_per_km. Adding a metric = adding one entry here.
+ACTIVITY_TRANSFORMS = [
+    ('activityId', 'activity_id', 'id'),
+    ('activityType', 'activity_type', 'type_key'),
+    ('startTimeLocal', 'date', 'datetime'),
+    ('activityName', 'title', 'text'),
+    ('distance', 'distance_km', 'm_to_km'),
+    ('duration', 'duration_min', 's_to_min'),
+    ('calories', 'calories', 'raw'),
+    ('averageHR', 'avg_hr', 'raw'),
+    ('maxHR', 'max_hr', 'raw'),
+    ('averageSpeed', 'avg_pace', 'mps_to_min_per_km'),
+    ('maxSpeed', 'best_pace', 'mps_to_min_per_km'),
+    ('averageRunningCadenceInStepsPerMinute', 'avg_run_cadence', 'raw'),
+    ('maxRunningCadenceInStepsPerMinute', 'max_run_cadence', 'raw'),
+    ('avgGroundContactTime', 'avg_ground_contact_time_ms', 'raw'),
+    ('avgStrideLength', 'avg_stride_length_m', 'raw'),
+    ('avgVerticalOscillation', 'avg_vertical_oscillation_cm', 'raw'),
+    ('avgVerticalRatio', 'avg_vertical_ratio', 'raw'),
+    ('avgGctBalance', 'avg_gct_balance', 'raw'),
+    ('avgGradeAdjustedSpeed', 'avg_gap', 'mps_to_min_per_km'),
+    ('elevationGain', 'total_ascent_m', 'raw'),
+    ('elevationLoss', 'total_descent_m', 'raw'),
+    ('aerobicTrainingEffect', 'aerobic_te', 'raw'),
+    ('trainingStressScore', 'training_stress_score', 'raw'),
+    ('steps', 'steps', 'raw'),
+    ('avgRespiration', 'avg_resp', 'raw'),
+    ('minRespiration', 'min_resp', 'raw'),
+    ('maxRespiration', 'max_resp', 'raw'),
+    ('avgStress', 'avg_stress', 'raw'),
+    ('maxStress', 'max_stress', 'raw'),
+    ('normalizedPower', 'normalized_power', 'raw'),
+    ('avgPower', 'avg_power', 'raw'),
+    ('maxPower', 'max_power', 'raw'),
+    ('movingDuration', 'moving_time_min', 's_to_min'),
+    ('elapsedDuration', 'elapsed_time_min', 's_to_min'),
+]
+
 # Column names for Google Sheets (friendly names)
-COLUMN_MAPPING = {
-    'activityType': 'activity_type',
-    'startTimeLocal': 'date',
-    'activityName': 'title',
-    'distance': 'distance_km',
-    'duration': 'duration_min',
-    'calories': 'calories',
-    'averageHR': 'avg_hr',
-    'maxHR': 'max_hr',
-    'averageSpeed': 'avg_pace',
-    'maxSpeed': 'best_pace',
-    'averageRunningCadenceInStepsPerMinute': 'avg_run_cadence',
-    'maxRunningCadenceInStepsPerMinute': 'max_run_cadence',
-    'avgGroundContactTime': 'avg_ground_contact_time_ms',
-    'avgStrideLength': 'avg_stride_length_m',
-    'avgVerticalOscillation': 'avg_vertical_oscillation_cm',
-    'avgVerticalRatio': 'avg_vertical_ratio',
-    'avgGctBalance': 'avg_gct_balance',
-    'avgGradeAdjustedSpeed': 'avg_gap',
-    'elevationGain': 'total_ascent_m',
-    'elevationLoss': 'total_descent_m',
-    'aerobicTrainingEffect': 'aerobic_te',
-    'trainingStressScore': 'training_stress_score',
-    'steps': 'steps',
-    'avgRespiration': 'avg_resp',
-    'minRespiration': 'min_resp',
-    'maxRespiration': 'max_resp',
-    'avgStress': 'avg_stress',
-    'maxStress': 'max_stress',
-    'normalizedPower': 'normalized_power',
-    'avgPower': 'avg_power',
-    'maxPower': 'max_power',
-    'movingDuration': 'moving_time_min',
-    'elapsedDuration': 'elapsed_time_min',
-}
+COLUMN_MAPPING = {source: column for source, column, _ in ACTIVITY_TRANSFORMS if column != 'activity_id'}
 
 # Headers for Google Sheets
-SHEET_HEADERS = [
-    'activity_id',
-    'activity_type',
-    'date',
-    'title',
-    'distance_km',
-    'duration_min',
-    'calories',
-    'avg_hr',
-    'max_hr',
-    'avg_pace',
-    'best_pace',
-    'avg_run_cadence',
-    'max_run_cadence',
-    'avg_ground_contact_time_ms',
-    'avg_stride_length_m',
-    'avg_vertical_oscillation_cm',
-    'avg_vertical_ratio',
-    'avg_gct_balance',
-    'avg_gap',
-    'total_ascent_m',
-    'total_descent_m',
-    'aerobic_te',
-    'training_stress_score',
-    'steps',
-    'avg_resp',
-    'min_resp',
-    'max_resp',
-    'avg_stress',
-    'max_stress',
-    'normalized_power',
-    'avg_power',
-    'max_power',
-    'moving_time_min',
-    'elapsed_time_min',
-]
+SHEET_HEADERS = [column for _, column, _ in ACTIVITY_TRANSFORMS]
@@ -1,22 +1,108 @@
 #!/usr/bin/env python3
 """
 Delete all training plan workouts from Garmin Connect
-Usuwa wszystkie workouty które zaczynają się od "Tydzień"
+Usuwa workouty z planu treningowego (domyślnie wszystkie zaczynające się od "Tydzień")
+
+Usage:
+    python delete_all_workouts.py                              # wszystkie "Tydzień ..."
+    python delete_all_workouts.py --plan plan/plan_treningowy_10km_38min.md
+    python delete_all_workouts.py --prefix "Tydzień 1" --since 2025-01-01 --dry-run
 """
 
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
 from dotenv import load_dotenv
-import time
 
 load_dotenv()
 
+import config
 from upload_workouts_to_garmin import GarminWorkoutUploader
 from config import GARMIN_EMAIL, GARMIN_PASSWORD
+from workout_manifest import manifest_path, load_manifest, forget_workouts, iter_workouts
+
+DEFAULT_PREFIX = 'Tydzień'
+
+
+def parse_date(value):
+    """argparse type: YYYY-MM-DD"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Nieprawidłowa data: {value} (oczekiwano YYYY-MM-DD)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Usuwanie workoutów z Garmin Connect')
+    parser.add_argument('--prefix',
+                        help=f'Usuń workouty, których nazwa zaczyna się od PREFIX '
+                             f'(domyślnie "{DEFAULT_PREFIX}", gdy nie podano innego filtra)')
+    parser.add_argument('--plan', type=Path,
+                        help='Usuń workouty wgrane z tego planu (według jego manifestu)')
+    parser.add_argument('--manifest', type=Path,
+                        help='Usuń workouty z podanego pliku manifestu')
+    parser.add_argument('--since', type=parse_date,
+                        help='Tylko workouty utworzone od tej daty (YYYY-MM-DD)')
+    parser.add_argument('--until', type=parse_date,
+                        help='Tylko workouty utworzone do tej daty włącznie (YYYY-MM-DD)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Tylko pokaż, co zostałoby usunięte')
+    parser.add_argument('--yes', action='store_true',
+                        help='Nie pytaj o potwierdzenie')
+    parser.add_argument('--workers', type=int, default=config.UPLOAD_CONCURRENCY,
+                        help=f'Liczba równoległych usunięć (domyślnie {config.UPLOAD_CONCURRENCY})')
+    return parser.parse_args()
+
+
+def select_workouts(workouts, prefix=None, workout_ids=None, since=None, until=None):
+    """
+    Filtruje listę workoutów; wszystkie podane filtry muszą być spełnione
+
+    Args:
+        workouts: Workouty z iter_workouts
+        prefix: Początek nazwy
+        workout_ids: Zbiór ID (np. z manifestu)
+        since/until: Zakres daty utworzenia (YYYY-MM-DD, włącznie)
+    """
+    selected = []
+    for workout in workouts:
+        created = (workout.get('createdDate') or '')[:10]
+
+        if prefix and not workout.get('workoutName', '').startswith(prefix):
+            continue
+        if workout_ids is not None and workout['workoutId'] not in workout_ids:
+            continue
+        if since and (not created or created < since):
+            continue
+        if until and (not created or created > until):
+            continue
+        selected.append(workout)
+
+    return selected
+
 
 def main():
+    args = parse_args()
+
     print("="*60)
-    print("Usuwanie wszystkich workoutów z planu treningowego")
+    print("Usuwanie workoutów z planu treningowego")
     print("="*60)
 
+    # ID z manifestów (--plan / --manifest)
+    workout_ids = None
+    for path in filter(None, [args.manifest, manifest_path(args.plan) if args.plan else None]):
+        if not path.exists():
+            print(f"[ERROR] Nie znaleziono manifestu: {path}")
+            return
+        ids = {entry['workout_id'] for entry in load_manifest(path).values()}
+        workout_ids = ids if workout_ids is None else workout_ids | ids
+
+    prefix = args.prefix
+    if prefix is None and workout_ids is None and not (args.since or args.until):
+        prefix = DEFAULT_PREFIX
+
     # Inicjalizacja
     uploader = GarminWorkoutUploader(GARMIN_EMAIL, GARMIN_PASSWORD)
 
@@ -28,53 +114,49 @@ def main():
     print("\nPobieranie listy workoutów...")
 
     try:
-        # Pobierz pierwsze 100 workoutów (powinno wystarczyć dla naszych 60)
-        workouts = uploader.client.get_workouts(0, 100)
-
-        # Filtruj tylko te które zaczynają się od "Tydzień"
-        plan_workouts = [w for w in workouts if w.get('workoutName', '').startswith('Tydzień')]
+        # Cała lista, strona po stronie (get_workouts zwraca max 100 na raz)
+        workouts = list(iter_workouts(uploader.client))
+        plan_workouts = select_workouts(workouts, prefix, workout_ids, args.since, args.until)
 
-        print(f"\nZnaleziono {len(plan_workouts)} workoutów do usunięcia:")
+        print(f"\nZnaleziono {len(plan_workouts)} z {len(workouts)} workoutów do usunięcia:")
         for w in plan_workouts[:10]:  # Pokaż pierwsze 10
             print(f"  - {w['workoutName']} (ID: {w['workoutId']})")
         if len(plan_workouts) > 10:
             print(f"  ... i {len(plan_workouts) - 10} więcej")
 
-        # Potwierdź
-        confirm = input(f"\nUsunąć {len(plan_workouts)} workoutów? (tak/nie): ").strip().lower()
+        if args.dry_run:
+            print("\n[DRY RUN] Nic nie zostało usunięte.")
+            return
 
-        if confirm not in ['tak', 't', 'yes', 'y']:
-            print("Anulowano.")
+        if not plan_workouts:
             return
 
-        # Usuń wszystkie
-        print("\nUsuwanie workoutów...")
-        deleted = 0
-        failed = 0
+        # Potwierdź
+        if not args.yes:
+            confirm = input(f"\nUsunąć {len(plan_workouts)} workoutów? (tak/nie): ").strip().lower()
 
-        for workout in plan_workouts:
-            workout_id = workout['workoutId']
-            workout_name = workout['workoutName']
+            if confirm not in ['tak', 't', 'yes', 'y']:
+                print("Anulowano.")
+                return
 
-            try:
-                # Użyj garth bezpośrednio - DELETE /workout-service/workout/{id}
-                delete_url = f"/workout-service/workout/{workout_id}"
-                result = uploader.client.garth.delete("connectapi", delete_url)
+        # Usuń równolegle - wspólny limit zapytań i backoff przy 429 są w uploaderze
+        print(f"\nUsuwanie workoutów ({args.workers} wątków)...")
+        with ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix='garmin-delete') as executor:
+            results = list(executor.map(
+                lambda w: uploader.delete_workout(w['workoutId'], w['workoutName']),
+                plan_workouts
+            ))
 
-                if result.status_code in [200, 201, 204]:
-                    print(f"[OK] Usunięto: {workout_name}")
-                    deleted += 1
-                else:
-                    print(f"[ERROR] Nie udało się usunąć {workout_name}: HTTP {result.status_code}")
-                    failed += 1
+        deleted_ids = {w['workoutId'] for w, ok in zip(plan_workouts, results) if ok}
+        failed = len(plan_workouts) - len(deleted_ids)
 
-                time.sleep(0.5)  # Delay żeby nie przeciążyć API
-            except Exception as e:
-                print(f"[ERROR] Nie udało się usunąć {workout_name}: {e}")
-                failed += 1
+        # Usunięte workouty znikają z manifestów - kolejny upload utworzy je od nowa
+        forgotten = forget_workouts(deleted_ids)
 
         print("\n" + "="*60)
-        print(f"Zakończono: {deleted} usunięto, {failed} błędów")
+        print(f"Zakończono: {len(deleted_ids)} usunięto, {failed} błędów, ponowienia: {uploader.retry_count}")
+        if forgotten:
+            print(f"Usunięto {forgotten} wpisów z manifestów planów")
         print("="*60)
 
     except Exception as e:
@@ -6,15 +6,20 @@ Fetch Training Data - Download all training data from Google Sheets for analysis
 import os
 import sys
 import json
+import hashlib
+import argparse
 import logging
 from datetime import datetime
 
 import gspread
+from gspread.utils import rowcol_to_a1
 from google.oauth2.service_account import Credentials
 import pandas as pd
 from dotenv import load_dotenv
 
 import config
+from activity_store import ActivityStore
+from activity_summary import ActivitySummary
 
 # Load environment variables
 load_dotenv()
@@ -28,6 +33,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Numeric metric columns (stored as float32 in the Parquet cache)
+NUMERIC_COLUMNS = [
+    'distance_km', 'duration_min', 'calories',
+    'avg_hr', 'max_hr', 'avg_pace', 'best_pace',
+    'avg_run_cadence', 'max_run_cadence',
+    'avg_ground_contact_time_ms', 'avg_stride_length_m',
+    'avg_vertical_oscillation_cm', 'avg_vertical_ratio',
+    'avg_gap', 'total_ascent_m', 'total_descent_m',
+    'aerobic_te', 'training_stress_score', 'steps',
+    'avg_resp', 'min_resp', 'max_resp',
+    'avg_stress', 'max_stress',
+    'normalized_power', 'avg_power', 'max_power',
+    'moving_time_min', 'elapsed_time_min'
+]
+
 
 class TrainingDataFetcher:
     """Fetch training data from Google Sheets"""
@@ -86,6 +106,30 @@ class TrainingDataFetcher:
             logger.error(f"Failed to connect to Google Sheets: {e}")
             return False
 
+    @staticmethod
+    def _rows_to_dataframe(headers: list, data_rows: list) -> pd.DataFrame:
+        """Build a typed DataFrame from raw sheet rows"""
+        # Range reads drop trailing empty cells, so pad every row to the header width
+        data_rows = [row + [''] * (len(headers) - len(row)) for row in data_rows]
+
+        # Create DataFrame
+        df = pd.DataFrame(data_rows, columns=headers)
+
+        # Convert empty strings to None
+        df = df.replace('', None)
+
+        # Replace commas with dots in numeric columns (Polish locale fix)
+        # Google Sheets in Polish locale uses comma as decimal separator
+        for col in NUMERIC_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col].str.replace(',', '.', regex=False), errors='coerce')
+
+        # Convert date column to datetime
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'], errors='coerce')
+
+        return df
+
     def fetch_all_data(self) -> pd.DataFrame:
         """
         Fetch all training data from Google Sheets
@@ -111,41 +155,7 @@ class TrainingDataFetcher:
                 logger.warning("No training data found (only headers)")
                 return pd.DataFrame()
 
-            # Create DataFrame
-            df = pd.DataFrame(data_rows, columns=headers)
-
-            # Convert empty strings to None
-            df = df.replace('', None)
-
-            # Convert numeric columns
-            numeric_columns = [
-                'distance_km', 'duration_min', 'calories',
-                'avg_hr', 'max_hr', 'avg_pace', 'best_pace',
-                'avg_run_cadence', 'max_run_cadence',
-                'avg_ground_contact_time_ms', 'avg_stride_length_m',
-                'avg_vertical_oscillation_cm', 'avg_vertical_ratio',
-                'avg_gap', 'total_ascent_m', 'total_descent_m',
-                'aerobic_te', 'training_stress_score', 'steps',
-                'avg_resp', 'min_resp', 'max_resp',
-                'avg_stress', 'max_stress',
-                'normalized_power', 'avg_power', 'max_power',
-                'moving_time_min', 'elapsed_time_min'
-            ]
-
-            # Replace commas with dots in numeric columns (Polish locale fix)
-            # Google Sheets in Polish locale uses comma as decimal separator
-            for col in numeric_columns:
-                if col in df.columns:
-                    # Replace comma with dot for decimal numbers
-                    df[col] = df[col].astype(str).str.replace(',', '.', regex=False)
-                    # Convert "None" string back to None
-                    df[col] = df[col].replace('None', None)
-                    # Convert to numeric
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-
-            # Convert date column to datetime
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'], errors='coerce')
+            df = self._rows_to_dataframe(headers, data_rows)
 
             logger.info(f"Fetched {len(df)} training records")
             return df
@@ -154,6 +164,240 @@ class TrainingDataFetcher:
             logger.error(f"Error fetching data: {e}")
             return pd.DataFrame()
 
+    @staticmethod
+    def _snapshot_checksum(df: pd.DataFrame) -> str:
+        """Checksum of the snapshot's activity IDs (in sheet order)"""
+        ids = '\n'.join(df['activity_id'].astype(str))
+        return hashlib.sha256(ids.encode('utf-8')).hexdigest()
+
+    def save_snapshot(self, df: pd.DataFrame):
+        """
+        Save the fetched data as the local snapshot used by fetch_incremental
+
+        The Parquet cache holds the data; a small JSON file next to it records
+        the sheet layout (headers, row count, first/last activity ID, checksum).
+        """
+        if df.empty or 'activity_id' not in df.columns:
+            return
+
+        if not self.save_to_parquet(df):
+            return
+
+        meta = {
+            'headers': list(df.columns),
+            'row_count': len(df),
+            'top_activity_id': str(df['activity_id'].iloc[0]),
+            'bottom_activity_id': str(df['activity_id'].iloc[-1]),
+            'checksum': self._snapshot_checksum(df),
+        }
+
+        try:
+            with open(config.TRAINING_DATA_CACHE_META, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+        except Exception as e:
+            logger.error(f"Error saving snapshot metadata: {e}")
+
+    def _load_snapshot(self):
+        """Load the cached snapshot and its metadata, or (None, None) if unusable"""
+        if not os.path.exists(config.TRAINING_DATA_CACHE_META):
+            logger.info("No local snapshot found")
+            return None, None
+
+        try:
+            with open(config.TRAINING_DATA_CACHE_META, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read snapshot metadata: {e}")
+            return None, None
+
+        df = self.load_from_cache()
+        if df.empty or len(df) != meta.get('row_count') or list(df.columns) != meta.get('headers'):
+            logger.warning("Local snapshot does not match its metadata")
+            return None, None
+
+        if self._snapshot_checksum(df) != meta.get('checksum'):
+            logger.warning("Local snapshot checksum mismatch")
+            return None, None
+
+        return df, meta
+
+    def _count_new_rows(self, top_activity_id: str):
+        """
+        Count rows added above the snapshot's newest activity
+
+        write_to_sheets keeps the newest activity on top, so new rows are
+        exactly those between the header and the previously newest activity.
+        Activity IDs are read page by page from column A.
+
+        Returns:
+            Number of new rows or None if the activity is no longer in the sheet
+        """
+        page_size = config.SHEET_DELTA_PAGE_SIZE
+        offset = 0
+
+        while True:
+            values = self.sheet.get(f"A{offset + 2}:A{offset + page_size + 1}")
+            ids = [cell[0] if cell else '' for cell in values]
+
+            if top_activity_id in ids:
+                return offset + ids.index(top_activity_id)
+
+            if len(ids) < page_size:
+                return None
+
+            offset += page_size
+
+    def fetch_incremental(self) -> pd.DataFrame:
+        """
+        Fetch only the rows added since the last snapshot
+
+        Reads the new rows at the top of the sheet and merges them into the
+        cached frame. Falls back to fetch_all_data when there is no snapshot or
+        when the headers, row count or checksum do not match the sheet.
+
+        Returns:
+            DataFrame with all training data
+        """
+        cached, meta = self._load_snapshot()
+        if cached is None:
+            return self.fetch_all_data()
+
+        logger.info(f"Fetching training data added since last snapshot ({meta['row_count']} rows cached)...")
+
+        try:
+            headers = self.sheet.row_values(1)
+            if headers != meta['headers']:
+                logger.warning("Sheet headers changed, doing a full read")
+                return self.fetch_all_data()
+
+            new_count = self._count_new_rows(meta['top_activity_id'])
+            if new_count is None:
+                logger.warning("Newest cached activity not found in sheet, doing a full read")
+                return self.fetch_all_data()
+
+            # The snapshot must sit right below the new rows and end the sheet
+            bottom_row = new_count + meta['row_count'] + 1
+            tail = self.sheet.get(f"A{bottom_row}:A{bottom_row + 1}")
+            if [cell[0] if cell else '' for cell in tail] != [meta['bottom_activity_id']]:
+                logger.warning("Sheet row count does not match snapshot, doing a full read")
+                return self.fetch_all_data()
+
+            if new_count == 0:
+                logger.info(f"No new rows, using {len(cached)} cached training records")
+                return cached
+
+            new_rows = self.sheet.get(f"A2:{rowcol_to_a1(new_count + 1, len(headers))}")
+            new_df = self._rows_to_dataframe(headers, new_rows)
+
+            # Categoricals would not concatenate cleanly with the new string rows
+            categorical = cached.select_dtypes('category').columns
+            df = pd.concat([new_df, cached.astype({col: 'object' for col in categorical})], ignore_index=True)
+            df = self.optimize_dtypes(df)
+
+            logger.info(f"Fetched {new_count} new rows, {len(df)} training records in total")
+            return df
+
+        except Exception as e:
+            logger.warning(f"Incremental fetch failed ({e}), doing a full read")
+            return self.fetch_all_data()
+
+    def fetch_from_store(self, db_path: str = None) -> pd.DataFrame:
+        """
+        Load training data from the local activity store written by sync_garmin
+
+        Args:
+            db_path: Path to the SQLite store (default: config.ACTIVITY_DB_PATH)
+
+        Returns:
+            DataFrame with all training data
+        """
+        db_path = db_path or config.ACTIVITY_DB_PATH
+        logger.info(f"Loading training data from local store: {db_path}")
+
+        if not os.path.exists(db_path):
+            logger.error(f"Local activity store not found: {db_path}")
+            return pd.DataFrame()
+
+        try:
+            with ActivityStore(db_path) as store:
+                df = store.to_dataframe()
+        except Exception as e:
+            logger.error(f"Error loading local store: {e}")
+            return pd.DataFrame()
+
+        logger.info(f"Loaded {len(df)} training records")
+        return df
+
+    def load_from_cache(self, path: str = None) -> pd.DataFrame:
+        """
+        Load training data from the local Parquet cache
+
+        Args:
+            path: Parquet file (default: config.TRAINING_DATA_CACHE)
+
+        Returns:
+            DataFrame with all training data
+        """
+        path = path or config.TRAINING_DATA_CACHE
+        logger.info(f"Loading training data from cache: {path}")
+
+        if not os.path.exists(path):
+            logger.error(f"Cache file not found: {path}")
+            return pd.DataFrame()
+
+        try:
+            df = pd.read_parquet(path)
+        except Exception as e:
+            logger.error(f"Error reading cache: {e}")
+            return pd.DataFrame()
+
+        logger.info(f"Loaded {len(df)} training records")
+        return df
+
+    @staticmethod
+    def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert columns to compact analysis dtypes
+
+        float32 metrics, datetime64 date, categorical activity_type and
+        string IDs/titles.
+        """
+        df = df.copy()
+
+        for col in NUMERIC_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'], errors='coerce')
+
+        if 'activity_type' in df.columns:
+            df['activity_type'] = df['activity_type'].astype('category')
+
+        for col in ('activity_id', 'title'):
+            if col in df.columns:
+                df[col] = df[col].astype('string')
+
+        return df
+
+    def save_to_parquet(self, df: pd.DataFrame, filename: str = None):
+        """
+        Save DataFrame to a Parquet file with compact dtypes
+
+        Args:
+            df: DataFrame to save
+            filename: Output filename (default: config.TRAINING_DATA_CACHE)
+        """
+        filename = filename or config.TRAINING_DATA_CACHE
+
+        try:
+            self.optimize_dtypes(df).to_parquet(filename, index=False)
+            logger.info(f"Data saved to: {filename}")
+            return filename
+        except Exception as e:
+            logger.error(f"Error saving to Parquet: {e}")
+            return None
+
     def save_to_csv(self, df: pd.DataFrame, filename: str = None):
         """
         Save DataFrame to CSV file
@@ -178,6 +422,11 @@ class TrainingDataFetcher:
         """
         Print summary statistics of training data
 
+        When df is the full synced history (same count, date range and newest
+        activities as activity_summary.json), the persisted aggregates are
+        printed without scanning df. Any other frame (a filtered or partial
+        fetch) is aggregated once with the same code.
+
         Args:
             df: DataFrame with training data
         """
@@ -185,91 +434,62 @@ class TrainingDataFetcher:
             logger.warning("No data to summarize")
             return
 
-        print("\n" + "=" * 70)
-        print("TRAINING DATA SUMMARY")
-        print("=" * 70)
-
-        # Total records
-        print(f"\nTotal activities: {len(df)}")
-
-        # Date range
-        if 'date' in df.columns and not df['date'].isna().all():
-            min_date = df['date'].min()
-            max_date = df['date'].max()
-            print(f"Date range: {min_date.strftime('%Y-%m-%d')} to {max_date.strftime('%Y-%m-%d')}")
-
-        # Activity types breakdown
-        if 'activity_type' in df.columns:
-            print(f"\nActivity types:")
-            activity_counts = df['activity_type'].value_counts()
-            for activity, count in activity_counts.items():
-                print(f"   - {activity}: {count}")
-
-        # Running statistics (if available)
-        running_df = df[df['activity_type'].str.contains('running', case=False, na=False)]
-
-        if not running_df.empty:
-            print(f"\nRUNNING STATISTICS:")
-
-            if 'distance_km' in running_df.columns:
-                total_distance = running_df['distance_km'].sum()
-                avg_distance = running_df['distance_km'].mean()
-                print(f"   Total distance: {total_distance:.2f} km")
-                print(f"   Average distance: {avg_distance:.2f} km per run")
-
-            if 'duration_min' in running_df.columns:
-                total_time = running_df['duration_min'].sum()
-                avg_time = running_df['duration_min'].mean()
-                print(f"   Total time: {total_time:.0f} minutes ({total_time/60:.1f} hours)")
-                print(f"   Average time: {avg_time:.1f} minutes per run")
-
-            if 'avg_pace' in running_df.columns:
-                avg_pace = running_df['avg_pace'].mean()
-                print(f"   Average pace: {avg_pace:.2f} min/km")
-
-            if 'avg_hr' in running_df.columns:
-                avg_hr = running_df['avg_hr'].mean()
-                print(f"   Average heart rate: {avg_hr:.0f} bpm")
-
-            if 'calories' in running_df.columns:
-                total_calories = running_df['calories'].sum()
-                print(f"   Total calories burned: {total_calories:.0f} kcal")
-
-        # Recent activities
-        if 'date' in df.columns and not df['date'].isna().all():
-            print(f"\nLast 5 activities:")
-            recent = df.nlargest(5, 'date')[['date', 'activity_type', 'title', 'distance_km', 'duration_min']]
-            for idx, row in recent.iterrows():
-                date_str = row['date'].strftime('%Y-%m-%d') if pd.notna(row['date']) else 'N/A'
-                distance_str = f"{row['distance_km']:.2f} km" if pd.notna(row['distance_km']) else 'N/A'
-                duration_str = f"{row['duration_min']:.0f} min" if pd.notna(row['duration_min']) else 'N/A'
-                print(f"   {date_str} | {row['activity_type']} | {row['title']} | {distance_str} | {duration_str}")
-
-        print("\n" + "=" * 70)
+        summary = ActivitySummary.load()
+        if not summary.describes(df):
+            logger.info("Data differs from the persisted activity summary, aggregating the fetched rows")
+            summary = ActivitySummary.from_frame(df)
+        summary.print_summary()
 
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='Download training data for analysis')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--from-store', action='store_true',
+                        help='Read from the local activity store instead of Google Sheets')
+    source.add_argument('--from-cache', action='store_true',
+                        help=f'Read from the Parquet cache ({config.TRAINING_DATA_CACHE}) instead of Google Sheets')
+    parser.add_argument('--full', action='store_true',
+                        help='Download the whole sheet instead of only rows added since the last snapshot')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help='Output file format (default: csv)')
+    args = parser.parse_args()
+
     try:
         fetcher = TrainingDataFetcher()
 
-        # Connect to Google Sheets
-        if not fetcher.connect_google_sheets():
-            logger.error("Could not connect to Google Sheets, aborting")
-            sys.exit(1)
+        if args.from_cache:
+            df = fetcher.load_from_cache()
+        elif args.from_store:
+            df = fetcher.fetch_from_store()
+        else:
+            # Connect to Google Sheets
+            if not fetcher.connect_google_sheets():
+                logger.error("Could not connect to Google Sheets, aborting")
+                sys.exit(1)
 
-        # Fetch all data
-        df = fetcher.fetch_all_data()
+            # Fetch new rows (or all data)
+            df = fetcher.fetch_all_data() if args.full else fetcher.fetch_incremental()
 
         if df.empty:
             logger.warning("No data to process")
             sys.exit(0)
 
+        # Refresh the local cache so later analyses can skip the download
+        if args.from_store:
+            fetcher.save_to_parquet(df)
+        elif not args.from_cache:
+            fetcher.save_snapshot(df)
+
         # Print summary
         fetcher.print_summary(df)
 
-        # Save to CSV
-        filename = fetcher.save_to_csv(df)
+        # Save output file
+        if args.format == 'parquet':
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = fetcher.save_to_parquet(df, f'training_data_{timestamp}.parquet')
+        else:
+            filename = fetcher.save_to_csv(df)
 
         if filename:
             print(f"\n[OK] Data saved to: {filename}")
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+FIT Archive - Content-addressed local archive of original activity files
+
+Original FIT files downloaded by `sync_garmin.py --fit` are stored under
+fit_archive/objects/<aa>/<sha256>.fit, so identical files are kept once and
+a file never changes after it was written. index.jsonl maps activity IDs to
+content hashes (one line appended per download).
+
+Metrics can be re-derived offline over the whole archive in parallel:
+
+    python fit_archive.py                      # per-activity summary -> fit_summary.parquet
+    python fit_archive.py --workers 8 --output summary.csv
+"""
+
+import io
+import os
+import sys
+import json
+import hashlib
+import zipfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, Iterator, Tuple, List
+
+import numpy as np
+import pandas as pd
+
+import config
+from fit_decoder import decode_records
+
+INDEX_FILE = 'index.jsonl'
+
+
+def extract_fit(data: bytes) -> bytes:
+    """
+    FIT content of a download
+
+    Garmin returns the original file as a ZIP archive; the (first) .fit
+    member is returned. Plain FIT content is returned unchanged.
+    """
+    if data[:4] != b'PK\x03\x04':
+        return data
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = [name for name in archive.namelist() if name.lower().endswith('.fit')]
+        if not names:
+            raise ValueError("ZIP download does not contain a .fit file")
+        return archive.read(names[0])
+
+
+class FitArchive:
+    """Content-addressed FIT files plus an activity_id -> sha256 index"""
+
+    def __init__(self, directory: str = None):
+        """
+        Args:
+            directory: Archive root (default: config.FIT_ARCHIVE_DIR)
+        """
+        self.directory = Path(directory or config.FIT_ARCHIVE_DIR)
+        self.objects = self.directory / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / INDEX_FILE
+        self.index = self._load_index()
+
+    def _load_index(self) -> Dict[str, str]:
+        index = {}
+        if self.index_path.exists():
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        entry = json.loads(line)
+                        index[entry['activity_id']] = entry['sha256']
+        return index
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / f"{digest}.fit"
+
+    def has(self, activity_id: str) -> bool:
+        """Check whether the FIT file of an activity is archived"""
+        return str(activity_id) in self.index
+
+    def missing(self, activity_ids) -> List[str]:
+        """IDs from activity_ids without an archived FIT file (order kept)"""
+        return [str(activity_id) for activity_id in activity_ids if str(activity_id) not in self.index]
+
+    def path(self, activity_id: str) -> Optional[Path]:
+        """Archived FIT file of an activity"""
+        digest = self.index.get(str(activity_id))
+        return self.object_path(digest) if digest else None
+
+    def add(self, activity_id: str, data: bytes) -> str:
+        """
+        Archive a downloaded file (ZIP or FIT)
+
+        Returns:
+            SHA-256 of the FIT content
+        """
+        fit = extract_fit(data)
+        digest = hashlib.sha256(fit).hexdigest()
+        path = self.object_path(digest)
+
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+            tmp_path.write_bytes(fit)
+            tmp_path.replace(path)
+
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'activity_id': str(activity_id), 'sha256': digest}) + '\n')
+        self.index[str(activity_id)] = digest
+        return digest
+
+    def items(self) -> Iterator[Tuple[str, Path]]:
+        """(activity_id, FIT path) of every archived activity"""
+        for activity_id, digest in self.index.items():
+            yield activity_id, self.object_path(digest)
+
+    def decode(self, activity_id: str) -> Dict[str, np.ndarray]:
+        """Record columns of an archived activity (see fit_decoder.decode_records)"""
+        path = self.path(activity_id)
+        if path is None:
+            raise KeyError(f"Activity {activity_id} is not in the FIT archive")
+        return decode_records(path.read_bytes())
+
+
+def summarize_records(records: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Example derived metrics of one activity: duration, distance, pace, HR, cadence"""
+    if not records:
+        return {'samples': 0}
+
+    def mean(column):
+        values = records[column]
+        return float(np.nanmean(values)) if not np.isnan(values).all() else None
+
+    timestamps = records['timestamp'][~np.isnan(records['timestamp'])]
+    distances = records['distance'][~np.isnan(records['distance'])]
+    duration = float(timestamps[-1] - timestamps[0]) if len(timestamps) > 1 else None
+    distance = float(distances.max()) if len(distances) else None
+
+    return {
+        'samples': len(records['timestamp']),
+        'duration_min': round(duration / 60, 2) if duration else None,
+        'distance_km': round(distance / 1000, 3) if distance else None,
+        'avg_pace_min_km': round(duration / 60 / (distance / 1000), 3) if duration and distance else None,
+        'avg_hr': mean('heart_rate'),
+        'max_hr': float(np.nanmax(records['heart_rate'])) if mean('heart_rate') is not None else None,
+        'avg_cadence': mean('cadence'),
+        'avg_power': mean('power'),
+    }
+
+
+def _process_file(task: Tuple[str, str, Callable]) -> Dict[str, Any]:
+    """Decode one file and apply the metric function (runs in a worker process)"""
+    activity_id, path, func = task
+    try:
+        result = func(decode_records(Path(path).read_bytes()))
+        return {'activity_id': activity_id, **result}
+    except Exception as e:
+        return {'activity_id': activity_id, 'error': f"{type(e).__name__}: {e}"}
+
+
+def map_archive(func: Callable[[Dict[str, np.ndarray]], Dict[str, Any]] = summarize_records,
+                archive: FitArchive = None, workers: int = None) -> pd.DataFrame:
+    """
+    Apply a metric function to every archived activity in parallel
+
+    Args:
+        func: Picklable function: record columns -> dict of metrics
+        archive: Archive to process (default: FitArchive())
+        workers: Worker processes (default: CPU count)
+
+    Returns:
+        DataFrame with activity_id, the metrics and `error` for files that failed
+    """
+    archive = archive or FitArchive()
+    tasks = [(activity_id, str(path), func) for activity_id, path in archive.items()]
+    if not tasks:
+        return pd.DataFrame()
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        rows = [_process_file(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(_process_file, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Derive per-activity metrics from the local FIT archive')
+    parser.add_argument('--archive', default=None,
+                        help=f'Archive directory (default: {config.FIT_ARCHIVE_DIR})')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: number of CPU cores)')
+    parser.add_argument('--output', default='fit_summary.parquet',
+                        help='Output file, .parquet or .csv (default: fit_summary.parquet)')
+    args = parser.parse_args()
+
+    archive = FitArchive(args.archive)
+    if not archive.index:
+        print(f"[ERROR] Archiwum {archive.directory} jest puste (uruchom sync_garmin.py --fit)")
+        sys.exit(1)
+
+    print(f"Przetwarzanie {len(archive.index)} plików FIT...")
+    df = map_archive(archive=archive, workers=args.workers)
+
+    if args.output.endswith('.csv'):
+        df.to_csv(args.output, index=False)
+    else:
+        df.to_parquet(args.output, index=False)
+
+    errors = df['error'].notna().sum() if 'error' in df.columns else 0
+    print(f"[OK] Zapisano {len(df)} aktywności do {args.output} (błędy: {errors})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""
+FIT Decoder - Streaming decoder of record messages in Garmin FIT files
+
+Only what is needed for per-sample analysis is decoded: the file is walked
+message by message, definition messages are compiled into one struct.Struct
+each, and the fields of `record` messages (global message 20) are collected
+per definition and converted to columns with NumPy. Every other message is
+skipped by its size; only its timestamp is read, since any timestamped message
+sets the reference time of later compressed timestamp headers. Compressed
+timestamp headers and chained FIT files are supported; developer fields are
+skipped.
+"""
+
+import struct
+from typing import Dict, Tuple, BinaryIO, Union, Iterator, Optional
+
+import numpy as np
+
+RECORD_MESSAGE = 20
+
+# Seconds between the Unix epoch and the FIT epoch (1989-12-31 00:00:00 UTC)
+FIT_EPOCH_OFFSET = 631065600
+
+SEMICIRCLES_TO_DEGREES = 180.0 / 2 ** 31
+
+# Base type number -> (struct format, invalid value)
+BASE_TYPES = {
+    0x00: ('B', 0xFF),                # enum
+    0x01: ('b', 0x7F),                # sint8
+    0x02: ('B', 0xFF),                # uint8
+    0x03: ('h', 0x7FFF),              # sint16
+    0x04: ('H', 0xFFFF),              # uint16
+    0x05: ('i', 0x7FFFFFFF),          # sint32
+    0x06: ('I', 0xFFFFFFFF),          # uint32
+    0x08: ('f', None),                # float32
+    0x09: ('d', None),                # float64
+    0x0A: ('B', 0x00),                # uint8z
+    0x0B: ('H', 0x0000),              # uint16z
+    0x0C: ('I', 0x00000000),          # uint32z
+    0x0E: ('q', 0x7FFFFFFFFFFFFFFF),  # sint64
+    0x0F: ('Q', 0xFFFFFFFFFFFFFFFF),  # uint64
+    0x10: ('Q', 0x0000000000000000),  # uint64z
+}
+
+# Record fields: field number -> (column, scale, offset); value = raw / scale - offset
+RECORD_FIELDS = {
+    253: ('timestamp', 1, 0),
+    0: ('position_lat', 1 / SEMICIRCLES_TO_DEGREES, 0),
+    1: ('position_long', 1 / SEMICIRCLES_TO_DEGREES, 0),
+    2: ('altitude', 5, 500),
+    3: ('heart_rate', 1, 0),
+    4: ('cadence', 1, 0),
+    5: ('distance', 100, 0),
+    6: ('speed', 1000, 0),
+    7: ('power', 1, 0),
+    13: ('temperature', 1, 0),
+    73: ('enhanced_speed', 1000, 0),
+    78: ('enhanced_altitude', 5, 500),
+}
+
+COLUMNS = [column for column, _, _ in RECORD_FIELDS.values()]
+
+
+class FitError(ValueError):
+    """The data is not a valid FIT file"""
+
+
+class _Definition:
+    """Compiled definition message: one struct for the whole data message"""
+
+    __slots__ = ('global_number', 'size', 'struct', 'fields', 'timestamp_index', 'timestamp_field')
+
+    def __init__(self, global_number: int, little_endian: bool, field_defs, developer_size: int):
+        self.global_number = global_number
+        self.size = sum(size for _, size, _ in field_defs) + developer_size
+        self.fields = []
+
+        # Byte offset and struct of the timestamp (field 253) of other messages:
+        # it sets the reference time of later compressed timestamp headers
+        self.timestamp_field = None
+
+        # Only record fields are unpacked; everything else becomes padding
+        fmt = ['<' if little_endian else '>']
+        offset = 0
+        for number, size, base_type in field_defs:
+            code, invalid = BASE_TYPES.get(base_type & 0x1F, (None, None))
+            if (global_number == RECORD_MESSAGE and number in RECORD_FIELDS and code
+                    and struct.calcsize(code) == size):
+                fmt.append(code)
+                self.fields.append((RECORD_FIELDS[number][0], invalid))
+            else:
+                fmt.append(f'{size}x')
+                if number == 253 and size == 4:
+                    self.timestamp_field = (offset, struct.Struct('<I' if little_endian else '>I'))
+            offset += size
+        if developer_size:
+            fmt.append(f'{developer_size}x')
+        self.struct = struct.Struct(''.join(fmt))
+
+        columns = [column for column, _ in self.fields]
+        self.timestamp_index = columns.index('timestamp') if 'timestamp' in columns else None
+
+
+def _read_all(source: Union[bytes, bytearray, memoryview, BinaryIO]) -> memoryview:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return memoryview(source)
+    return memoryview(source.read())
+
+
+def _iter_record_values(data: memoryview) -> Iterator[Tuple[_Definition, tuple, Optional[int]]]:
+    """Yield (definition, raw values, compressed timestamp or None) of each record message"""
+    position = 0
+
+    # A file may hold several FIT files one after another (chained FIT)
+    while position + 12 <= len(data):
+        header_size = data[position]
+        if header_size not in (12, 14) or bytes(data[position + 8:position + 12]) != b'.FIT':
+            raise FitError(f"Missing FIT header at byte {position}")
+
+        data_size = struct.unpack_from('<I', data, position + 4)[0]
+        position += header_size
+        end = position + data_size
+        if end > len(data):
+            raise FitError("Truncated FIT file")
+
+        definitions: Dict[int, _Definition] = {}
+        last_timestamp = 0
+
+        while position < end:
+            header = data[position]
+            position += 1
+
+            if header & 0x80:
+                # Compressed timestamp header: 5-bit offset from the last full timestamp
+                local_type = (header >> 5) & 0x03
+                offset = header & 0x1F
+                timestamp = (last_timestamp & ~0x1F) + offset
+                if offset < (last_timestamp & 0x1F):
+                    timestamp += 0x20
+                last_timestamp = timestamp
+            else:
+                local_type = header & 0x0F
+                timestamp = None
+
+                if header & 0x40:
+                    # Definition message
+                    little_endian = data[position + 1] == 0
+                    global_number = struct.unpack_from('<H' if little_endian else '>H', data, position + 2)[0]
+                    field_count = data[position + 4]
+                    position += 5
+                    field_defs = [tuple(data[position + 3 * i:position + 3 * i + 3]) for i in range(field_count)]
+                    position += 3 * field_count
+
+                    developer_size = 0
+                    if header & 0x20:
+                        developer_count = data[position]
+                        position += 1
+                        developer_size = sum(data[position + 3 * i + 1] for i in range(developer_count))
+                        position += 3 * developer_count
+
+                    definitions[local_type] = _Definition(global_number, little_endian, field_defs, developer_size)
+                    continue
+
+            definition = definitions.get(local_type)
+            if definition is None:
+                raise FitError(f"Data message without definition at byte {position - 1}")
+
+            if definition.global_number == RECORD_MESSAGE:
+                values = definition.struct.unpack_from(data, position)
+                if definition.timestamp_index is not None:
+                    last_timestamp = values[definition.timestamp_index]
+                yield definition, values, timestamp
+            elif definition.timestamp_field is not None:
+                offset, timestamp_struct = definition.timestamp_field
+                value = timestamp_struct.unpack_from(data, position + offset)[0]
+                if value != 0xFFFFFFFF:
+                    last_timestamp = value
+
+            position += definition.size
+
+        position = end + 2  # file CRC
+
+
+def iter_records(source: Union[bytes, bytearray, memoryview, BinaryIO]) -> Iterator[Dict[str, float]]:
+    """
+    Yield raw record messages ({column: raw value}, invalid values omitted)
+
+    Args:
+        source: FIT file content or a binary file object
+    """
+    for definition, values, timestamp in _iter_record_values(_read_all(source)):
+        record = {column: value for (column, invalid), value in zip(definition.fields, values) if value != invalid}
+        if 'timestamp' not in record and timestamp is not None:
+            record['timestamp'] = timestamp
+        yield record
+
+
+def decode_records(source: Union[bytes, bytearray, memoryview, BinaryIO]) -> Dict[str, np.ndarray]:
+    """
+    Decode record messages into columnar arrays
+
+    Values are converted to physical units: timestamp in Unix seconds,
+    position in degrees, altitude and distance in meters, speed in m/s.
+    enhanced_speed/enhanced_altitude replace speed/altitude when present.
+    Missing values are NaN.
+
+    Args:
+        source: FIT file content or a binary file object
+
+    Returns:
+        Column -> float64 array (one value per record); empty dict without records
+    """
+    # Raw rows grouped by definition (plus the compressed timestamp as the last value),
+    # converted to arrays per group and scattered back into record order
+    groups: Dict[int, Tuple[_Definition, list, list]] = {}
+    count = 0
+
+    for definition, values, timestamp in _iter_record_values(_read_all(source)):
+        group = groups.get(id(definition))
+        if group is None:
+            group = groups[id(definition)] = (definition, [], [])
+        group[1].append(values + (timestamp,))
+        group[2].append(count)
+        count += 1
+
+    if not count:
+        return {}
+
+    raw = {column: np.full(count, np.nan) for column in COLUMNS}
+    for definition, rows, positions in groups.values():
+        table = np.array(rows, dtype=np.float64)
+        for index, (column, invalid) in enumerate(definition.fields):
+            values = table[:, index]
+            if invalid is not None:
+                values[values == invalid] = np.nan
+            raw[column][positions] = values
+
+        compressed = table[:, -1]
+        if not np.isnan(compressed).all():
+            timestamps = raw['timestamp'][positions]
+            raw['timestamp'][positions] = np.where(np.isnan(timestamps), compressed, timestamps)
+
+    result = {}
+    for column, scale, offset in RECORD_FIELDS.values():
+        values = raw[column]
+        if scale != 1 or offset:
+            values = values / scale - offset
+        result[column] = values
+
+    result['timestamp'] = result['timestamp'] + FIT_EPOCH_OFFSET
+
+    for enhanced, plain in (('enhanced_speed', 'speed'), ('enhanced_altitude', 'altitude')):
+        if not np.isnan(result[enhanced]).all():
+            result[plain] = np.where(np.isnan(result[enhanced]), result[plain], result[enhanced])
+        del result[enhanced]
+
+    return result
+
+
+def record_columns() -> Tuple[str, ...]:
+    """Columns returned by decode_records"""
+    return tuple(column for column in COLUMNS if not column.startswith('enhanced_'))
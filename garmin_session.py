@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Garmin Session - Shared Garmin Connect login with cached OAuth tokens
+
+The full SSO login is the slowest and most rate-limited step of every run.
+The garth OAuth tokens are therefore saved to GARMIN_TOKEN_STORE (or passed
+in the GARMIN_TOKENS environment variable, e.g. as a CI secret) and reused
+until they stop working; only then is the email/password login used.
+"""
+
+import os
+import sys
+import logging
+
+from garminconnect import Garmin
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def _token_sources(token_store: str):
+    """Token sources to try, in order: environment variable, then the local cache"""
+    sources = []
+
+    env_tokens = os.getenv('GARMIN_TOKENS')
+    if env_tokens:
+        sources.append(('GARMIN_TOKENS', env_tokens))
+
+    if os.path.isdir(token_store) and os.listdir(token_store):
+        sources.append((token_store, token_store))
+
+    return sources
+
+
+def has_cached_session(token_store: str = None) -> bool:
+    """Check whether saved tokens are available"""
+    token_store = os.path.expanduser(token_store or config.GARMIN_TOKEN_STORE)
+    return bool(_token_sources(token_store))
+
+
+def save_tokens(client: Garmin, token_store: str = None):
+    """Save the client's OAuth tokens to the token cache directory"""
+    token_store = os.path.expanduser(token_store or config.GARMIN_TOKEN_STORE)
+    try:
+        client.garth.dump(token_store)
+        logger.debug(f"Saved Garmin tokens to {token_store}")
+    except Exception as e:
+        logger.warning(f"Could not save Garmin tokens to {token_store}: {e}")
+
+
+def login(email: str, password: str, token_store: str = None) -> Garmin:
+    """
+    Return a logged-in Garmin client
+
+    Cached tokens are tried first; the password login is used only when no
+    tokens are available or they were rejected. Fresh tokens are written back
+    to the cache so the next run can skip the SSO handshake.
+
+    Args:
+        email: Garmin account email (needed only for the password login)
+        password: Garmin account password
+        token_store: Token cache directory (default: config.GARMIN_TOKEN_STORE)
+
+    Returns:
+        Logged-in Garmin client
+
+    Raises:
+        Exception: if neither the tokens nor the credentials work
+    """
+    token_store = os.path.expanduser(token_store or config.GARMIN_TOKEN_STORE)
+
+    for name, tokens in _token_sources(token_store):
+        try:
+            client = Garmin(email, password)
+            client.login(tokens)
+            logger.info(f"Restored Garmin session from {name}")
+            # Tokens may have been refreshed during login
+            save_tokens(client, token_store)
+            return client
+        except Exception as e:
+            logger.warning(f"Could not restore Garmin session from {name}: {e}")
+
+    if not email or not password:
+        raise ValueError("No valid Garmin session tokens and no credentials to log in with")
+
+    logger.info("Logging in to Garmin Connect with email and password")
+    client = Garmin(email, password)
+    client.login()
+    save_tokens(client, token_store)
+    return client
+
+
+def main():
+    """Log in once and print the tokens for the GARMIN_TOKENS secret"""
+    logging.basicConfig(level=logging.INFO, format=config.LOG_FORMAT, datefmt=config.LOG_DATE_FORMAT)
+
+    try:
+        client = login(config.GARMIN_EMAIL, config.GARMIN_PASSWORD)
+    except Exception as e:
+        logger.error(f"Garmin login failed: {e}")
+        sys.exit(1)
+
+    print("\nGARMIN_TOKENS value (store it as a secret, it grants access to your account):\n")
+    print(client.garth.dumps())
+
+
+if __name__ == '__main__':
+    main()
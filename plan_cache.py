@@ -0,0 +1,134 @@
+"""
+Plan Cache - Parsed workouts and generated Garmin payloads per plan file
+
+The cache entry of a plan is valid as long as the markdown file content and
+the generator version are the same, so unchanged plans skip parsing and JSON
+generation. write_workout_files keeps an index of what it wrote and only
+rewrites JSON files whose content changed.
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from workout_manifest import plan_id, PLAN_DIR
+
+CACHE_DIR = PLAN_DIR / '.cache'
+
+# Written next to the generated JSON files (filename -> digest of the written JSON)
+INDEX_FILE = '.index.json'
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of the file content"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def cache_path(plan_file: Path, cache_dir: Path = None) -> Path:
+    """Cache entry of a plan; the cache directory sits inside its plan directory (<plan dir>/.cache)"""
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    return cache_dir / f"{plan_id(plan_file, cache_dir.parent)}.json"
+
+
+def load_cached_plan(plan_file: Path, version: int,
+                     cache_dir: Path = None) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """
+    Load parsed workouts and payloads of a plan if the cache entry is still valid
+
+    Args:
+        plan_file: Plan markdown file
+        version: Generator version the entry must have been built with
+        cache_dir: Cache directory (default: plan/.cache)
+
+    Returns:
+        (workouts, payloads) or None when there is no valid entry
+    """
+    path = cache_path(plan_file, cache_dir)
+    if not path.exists():
+        return None
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if data.get('version') != version or data.get('digest') != file_digest(plan_file):
+        return None
+
+    return data['workouts'], data['payloads']
+
+
+def save_cached_plan(plan_file: Path, version: int, workouts: List[Dict[str, Any]],
+                     payloads: List[Dict[str, Any]], cache_dir: Path = None):
+    """Store parsed workouts and payloads of a plan (atomic write, safe across processes)"""
+    path = cache_path(plan_file, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    data = {
+        'plan': Path(plan_file).name,
+        'digest': file_digest(plan_file),
+        'version': version,
+        'workouts': workouts,
+        'payloads': payloads,
+    }
+
+    tmp_path = path.with_suffix(f'.json.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    tmp_path.replace(path)
+
+
+def write_workout_files(output_dir: Path, files: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Write workout JSON files, skipping those whose content did not change
+
+    The whole serialized payload is compared, workout/step IDs included, so files
+    written by an older generator (e.g. with random IDs) are rewritten. Files
+    written by an earlier run that are no longer produced are removed.
+
+    Args:
+        output_dir: Target directory
+        files: Filename -> workout payload
+
+    Returns:
+        Counts: written, unchanged, removed
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    index_path = output_dir / INDEX_FILE
+
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    counts = {'written': 0, 'unchanged': 0, 'removed': 0}
+    new_index = {}
+
+    for filename, payload in files.items():
+        text = json.dumps(payload, indent=2, ensure_ascii=False)
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        new_index[filename] = digest
+
+        if index.get(filename) == digest and (output_dir / filename).exists():
+            counts['unchanged'] += 1
+            continue
+
+        with open(output_dir / filename, 'w', encoding='utf-8') as f:
+            f.write(text)
+        counts['written'] += 1
+
+    for filename in index:
+        if filename not in new_index and (output_dir / filename).exists():
+            (output_dir / filename).unlink()
+            counts['removed'] += 1
+
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(new_index, f, indent=2, ensure_ascii=False)
+
+    return counts
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Plan Compliance - Planned workouts vs. synchronized activities
+
+Planned sessions (parse_training_plan: week, day, type, total distance,
+work pace) are dated from the plan start date (or the dates scheduled in the
+plan's manifest) and matched with the running activities of the same athlete
+by date: activities are summed per day and every session takes the nearest
+running day within COMPLIANCE_MATCH_DAYS (pandas.merge_asof on sorted dates,
+grouped by athlete and sport, no nested loops). A day is used by one session
+only. The result is one row per session (completed / partial / missed /
+upcoming, distance ratio, day offset) and one row per plan week.
+
+Sessions and activities of many athletes and plans are matched in one call
+when both frames carry an `athlete` column.
+
+Usage:
+    python plan_compliance.py plan/plan_treningowy_10km_38min.md 2025-12-01
+    python plan_compliance.py plan/anna/maraton_330.md --from-cache --output compliance.csv
+"""
+
+import os
+import sys
+import argparse
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# Sport of every parsed plan session; activities whose type contains it match
+PLAN_SPORT = 'running'
+
+SESSION_STATUSES = ['completed', 'partial', 'missed', 'upcoming']
+
+
+def pace_to_minutes(pace: Optional[str]) -> float:
+    """'4:05' or '4:05-4:10' (first value) -> minutes per km; NaN if missing"""
+    if not pace:
+        return np.nan
+    minutes, _, seconds = str(pace).split('-')[0].partition(':')
+    try:
+        return int(minutes) + int(seconds or 0) / 60
+    except ValueError:
+        return np.nan
+
+
+def _work_pace(details: Dict[str, Any]) -> Optional[str]:
+    """Target pace of the main part of a session (first interval or tempo finish)"""
+    for interval in details.get('intervals') or []:
+        if interval.get('work_pace'):
+            return interval['work_pace']
+    return details.get('tempo_pace')
+
+
+def planned_sessions(workouts: List[Dict[str, Any]], start_date=None,
+                     scheduled: Dict[tuple, str] = None, athlete: str = '', plan: str = '') -> pd.DataFrame:
+    """
+    Dated planned sessions of one plan
+
+    Args:
+        workouts: parse_training_plan output
+        start_date: Monday of plan week 1
+        scheduled: (week, day) -> 'YYYY-MM-DD' from the manifest; used for
+                   sessions without start_date (or all if start_date is None)
+        athlete: Athlete key (matches the `athlete` column of the activities)
+        plan: Plan name
+
+    Returns:
+        DataFrame: athlete, plan, week, day, date, sport, workout_type,
+        planned_km (NaN when the plan gives no total), planned_pace (min/km)
+    """
+    from upload_workouts_to_garmin import workout_date
+
+    scheduled = scheduled or {}
+    rows = []
+    for workout in workouts:
+        details = workout['details']
+        if start_date is not None:
+            session_date = workout_date(workout, start_date).strftime('%Y-%m-%d')
+        else:
+            session_date = scheduled.get((workout['week'], workout['day']))
+
+        rows.append({
+            'athlete': athlete or '',
+            'plan': plan,
+            'week': workout['week'],
+            'day': workout['day'],
+            'date': session_date,
+            'sport': PLAN_SPORT,
+            'workout_type': details['type'],
+            'planned_km': details.get('total_km') or np.nan,
+            'planned_pace': pace_to_minutes(_work_pace(details)),
+        })
+
+    df = pd.DataFrame(rows, columns=['athlete', 'plan', 'week', 'day', 'date', 'sport',
+                                     'workout_type', 'planned_km', 'planned_pace'])
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    return df
+
+
+def actual_days(activities: pd.DataFrame, athlete: str = None) -> pd.DataFrame:
+    """
+    Activities summed per athlete, sport and day
+
+    Args:
+        activities: Activities with date, activity_type, distance_km,
+                    duration_min (and optionally athlete)
+        athlete: Athlete key when the frame has no athlete column
+
+    Returns:
+        DataFrame: athlete, sport, actual_date, actual_km, actual_min,
+        actual_pace (min/km), activities
+    """
+    columns = ['athlete', 'sport', 'actual_date', 'actual_km', 'actual_min', 'actual_pace', 'activities']
+    if activities.empty:
+        return pd.DataFrame(columns=columns)
+
+    types = activities['activity_type'].astype(str)
+    frame = pd.DataFrame({
+        'athlete': activities['athlete'].fillna('').astype(str) if 'athlete' in activities.columns else (athlete or ''),
+        'sport': np.where(types.str.contains(PLAN_SPORT, case=False, regex=False), PLAN_SPORT, types),
+        'actual_date': pd.to_datetime(activities['date'], errors='coerce').dt.normalize(),
+        'actual_km': pd.to_numeric(activities['distance_km'], errors='coerce').fillna(0.0),
+        'actual_min': pd.to_numeric(activities['duration_min'], errors='coerce').fillna(0.0),
+        'activities': 1,
+    }).dropna(subset=['actual_date'])
+
+    daily = frame.groupby(['athlete', 'sport', 'actual_date'], as_index=False).sum()
+    daily['actual_pace'] = daily['actual_min'] / daily['actual_km'].where(daily['actual_km'] > 0)
+    return daily[columns]
+
+
+def _nearest(sessions: pd.DataFrame, days: pd.DataFrame, tolerance: pd.Timedelta) -> pd.DataFrame:
+    """merge_asof of sessions to the nearest day; a day goes to its closest session only"""
+    if sessions.empty or days.empty:
+        unmatched = sessions.assign(**{column: np.nan for column in days.columns if column not in sessions.columns})
+        unmatched['actual_date'] = pd.NaT
+        return unmatched
+
+    matched = pd.merge_asof(
+        sessions.sort_values('date'), days.sort_values('actual_date'),
+        left_on='date', right_on='actual_date', by=['athlete', 'sport'],
+        direction='nearest', tolerance=tolerance,
+    )
+
+    # Several sessions can reach the same day: keep the closest (then the earlier) one
+    offset = (matched['actual_date'] - matched['date']).abs()
+    order = matched.assign(_offset=offset).sort_values(['_offset', 'date'])
+    taken = order['actual_date'].notna() & order.duplicated(['athlete', 'sport', 'actual_date'])
+    matched.loc[taken[taken].index, days.columns.drop(['athlete', 'sport'])] = np.nan
+    return matched
+
+
+def match_sessions(planned: pd.DataFrame, actual: pd.DataFrame, as_of=None,
+                   tolerance_days: int = None, min_ratio: float = None) -> pd.DataFrame:
+    """
+    Match planned sessions with actual training days
+
+    Sessions first take the nearest day within the tolerance; sessions that
+    lost their day to a closer session get a second pass over the days still
+    unused.
+
+    Args:
+        planned: planned_sessions output (any number of athletes/plans)
+        actual: actual_days output
+        as_of: Sessions after this date are 'upcoming' (default: today)
+        tolerance_days: Max. distance between planned and actual day (default: config.COMPLIANCE_MATCH_DAYS)
+        min_ratio: Minimum actual/planned distance for 'completed' (default: config.COMPLIANCE_MIN_RATIO);
+                   sessions without planned_km are completed by any matched day
+
+    Returns:
+        planned + actual_date, actual_km, actual_min, actual_pace, activities,
+        day_offset, distance_ratio, status
+    """
+    tolerance = pd.Timedelta(days=config.COMPLIANCE_MATCH_DAYS if tolerance_days is None else tolerance_days)
+    min_ratio = config.COMPLIANCE_MIN_RATIO if min_ratio is None else min_ratio
+    as_of = pd.Timestamp(as_of or date.today()).normalize()
+
+    planned = planned.dropna(subset=['date']).reset_index(drop=True)
+    actual = actual.reset_index(drop=True)
+
+    sessions = _nearest(planned, actual, tolerance)
+    missing = sessions['actual_date'].isna()
+    if missing.any():
+        used = sessions.loc[~missing, ['athlete', 'sport', 'actual_date']].assign(_used=True)
+        free = actual.merge(used, on=['athlete', 'sport', 'actual_date'], how='left')
+        free = free[free['_used'].isna()].drop(columns='_used')
+        second = _nearest(sessions.loc[missing, planned.columns], free, tolerance)
+        sessions = pd.concat([sessions[~missing], second], ignore_index=True)
+
+    sessions = sessions.sort_values(['athlete', 'plan', 'date']).reset_index(drop=True)
+    sessions['actual_date'] = pd.to_datetime(sessions['actual_date'])
+    sessions['day_offset'] = (sessions['actual_date'] - sessions['date']).dt.days
+    sessions['distance_ratio'] = sessions['actual_km'] / sessions['planned_km']
+
+    # Without a planned distance there is nothing to compare: a matched day
+    # completes the session, an unmatched one is missed (or upcoming)
+    done = sessions['actual_date'].notna()
+    short = sessions['planned_km'].notna() & (sessions['distance_ratio'] < min_ratio)
+    sessions['status'] = np.select(
+        [done & short, done, sessions['date'] > as_of],
+        ['partial', 'completed', 'upcoming'],
+        default='missed',
+    )
+    return sessions
+
+
+def weekly_compliance(sessions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compliance per athlete, plan and week
+
+    Returns:
+        DataFrame: athlete, plan, week, start, sessions, one count column per
+        status, planned_km and actual_km of the sessions due so far,
+        compliance (completed / due) and volume_ratio (actual / planned km)
+    """
+    counts = pd.crosstab([sessions['athlete'], sessions['plan'], sessions['week']], sessions['status'])
+    counts = counts.reindex(columns=SESSION_STATUSES, fill_value=0)
+
+    due = sessions.assign(
+        planned_km=sessions['planned_km'].where(sessions['status'] != 'upcoming'),
+    )
+    totals = due.groupby(['athlete', 'plan', 'week']).agg(
+        start=('date', 'min'),
+        sessions=('status', 'size'),
+        planned_km=('planned_km', 'sum'),
+        actual_km=('actual_km', 'sum'),
+    )
+
+    weekly = totals.join(counts).reset_index()
+    due_sessions = weekly['sessions'] - weekly['upcoming']
+    weekly['compliance'] = weekly['completed'] / due_sessions.where(due_sessions > 0)
+    weekly['volume_ratio'] = weekly['actual_km'] / weekly['planned_km'].where(weekly['planned_km'] > 0)
+    return weekly
+
+
+def scheduled_dates(plan_file) -> Dict[tuple, str]:
+    """(week, day) -> scheduled date from the plan's upload manifest"""
+    from workout_manifest import load_manifest, manifest_path
+
+    return {(entry['week'], entry['day']): entry['scheduled_date']
+            for entry in load_manifest(manifest_path(plan_file)).values()
+            if entry.get('scheduled_date') and 'week' in entry}
+
+
+def load_activities(from_cache: bool) -> pd.DataFrame:
+    """Synchronized activities from the Parquet cache or the local activity store"""
+    if from_cache:
+        if not os.path.exists(config.TRAINING_DATA_CACHE):
+            return pd.DataFrame()
+        return pd.read_parquet(config.TRAINING_DATA_CACHE)
+
+    from activity_store import ActivityStore
+    if not os.path.exists(config.ACTIVITY_DB_PATH):
+        return pd.DataFrame()
+    with ActivityStore() as store:
+        return store.to_dataframe()
+
+
+def print_report(sessions: pd.DataFrame, weekly: pd.DataFrame):
+    print("\n" + "=" * 78)
+    print(f"{'tydzień':>7} {'od':>10} {'treningi':>8} {'wykonane':>8} {'częściowo':>9} "
+          f"{'pominięte':>9} {'plan km':>8} {'km':>7} {'zgodność':>9}")
+    print("-" * 78)
+    for row in weekly.itertuples():
+        compliance = f"{row.compliance:.0%}" if pd.notna(row.compliance) else '-'
+        print(f"{row.week:>7} {row.start.strftime('%Y-%m-%d'):>10} {row.sessions:>8} {row.completed:>8} "
+              f"{row.partial:>9} {row.missed:>9} {row.planned_km:>8.1f} {row.actual_km:>7.1f} {compliance:>9}")
+    print("=" * 78)
+
+    due = sessions[sessions['status'] != 'upcoming']
+    if len(due):
+        completed = (due['status'] == 'completed').sum()
+        print(f"Wykonane treningi: {completed}/{len(due)} ({completed / len(due):.0%}), "
+              f"przesunięte o dzień: {(due['day_offset'].abs() > 0).sum()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare a training plan with synchronized activities')
+    parser.add_argument('plan', type=Path, help='Plik planu (Markdown)')
+    parser.add_argument('start_date', nargs='?', default=None,
+                        help='Poniedziałek 1. tygodnia planu (YYYY-MM-DD); domyślnie daty z manifestu uploadu')
+    parser.add_argument('--athlete', default='', help='Nazwa zawodnika w raporcie')
+    parser.add_argument('--from-cache', action='store_true',
+                        help=f'Aktywności z {config.TRAINING_DATA_CACHE} zamiast z lokalnej bazy')
+    parser.add_argument('--output', default=None,
+                        help='Zapisz treningi z dopasowaniem do pliku .csv lub .parquet')
+    args = parser.parse_args()
+
+    if not args.plan.exists():
+        print(f"[ERROR] Nie znaleziono pliku: {args.plan}")
+        return 1
+
+    start_date = None
+    if args.start_date:
+        try:
+            start_date = datetime.strptime(args.start_date, '%Y-%m-%d')
+        except ValueError:
+            print("[ERROR] Nieprawidłowy format daty (YYYY-MM-DD)")
+            return 1
+
+    from upload_workouts_to_garmin import GarminWorkoutUploader
+    from workout_manifest import plan_id
+
+    workouts, _ = GarminWorkoutUploader(None, None).load_plan(args.plan)
+    scheduled = scheduled_dates(args.plan) if start_date is None else None
+    if start_date is None and not scheduled:
+        print("[ERROR] Plan nie był schedulowany - podaj datę startu (YYYY-MM-DD)")
+        return 1
+
+    planned = planned_sessions(workouts, start_date, scheduled, args.athlete, plan_id(args.plan))
+    activities = load_activities(args.from_cache)
+    if activities.empty:
+        print("[ERROR] Brak aktywności (uruchom sync_garmin.py albo fetch_training_data.py)")
+        return 1
+
+    sessions = match_sessions(planned, actual_days(activities, args.athlete))
+    print_report(sessions, weekly_compliance(sessions))
+
+    if args.output:
+        if args.output.endswith('.csv'):
+            sessions.to_csv(args.output, index=False)
+        else:
+            sessions.to_parquet(args.output, index=False)
+        print(f"[OK] Zapisano {len(sessions)} treningów do {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Rate limiting helpers shared by all Garmin Connect API workers
+"""
+
+import threading
+import time
+
+import requests
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting the request rate across workers"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Tokens added per second (<= 0 disables limiting)
+            burst: Bucket capacity (max requests sent back to back)
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class AdaptiveBackoff:
+    """
+    Shared backoff for HTTP 429 responses
+
+    Every throttled response doubles the pause (up to max_delay) and makes all
+    workers wait until it is over; successful requests shrink it again.
+    """
+
+    def __init__(self, base_delay: float, max_delay: float, factor: float = 2.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.delay = 0.0
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Sleep while a throttling pause is active"""
+        with self._lock:
+            remaining = self._resume_at - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def on_throttle(self) -> float:
+        """Register a 429 response and return the new pause in seconds"""
+        with self._lock:
+            self.delay = min(self.max_delay, max(self.base_delay, self.delay * self.factor))
+            self._resume_at = max(self._resume_at, time.monotonic() + self.delay)
+            return self.delay
+
+    def on_success(self):
+        """Register a successful request"""
+        with self._lock:
+            self.delay = self.delay / self.factor if self.delay > self.base_delay else 0.0
+
+
+def http_status(error: Exception):
+    """HTTP status code of a failed request (None if the error has no response)"""
+    # garth wraps the requests.HTTPError in GarthHTTPError.error
+    response = getattr(error, 'response', None)
+    if response is None:
+        response = getattr(getattr(error, 'error', None), 'response', None)
+
+    return getattr(response, 'status_code', None)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """
+    Check whether an exception was caused by an HTTP 429 (Too Many Requests) response
+
+    Only the exception type and the response status are used; the message
+    text is not, since it often contains IDs or URLs with "429" in them.
+    """
+    if type(error).__name__ == 'GarminConnectTooManyRequestsError':
+        return True
+
+    return http_status(error) == 429
+
+
+def is_transient(error: Exception) -> bool:
+    """Check whether a failed request is worth retrying (429, 5xx, connection problems)"""
+    if is_rate_limited(error):
+        return True
+
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+
+    status = http_status(error)
+    return status is not None and status >= 500
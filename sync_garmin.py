@@ -5,19 +5,29 @@ Garmin Training Sync - Synchronize Garmin Connect activities to Google Sheets
 
 import os
 import sys
+import argparse
 import logging
 import time
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 
 import gspread
 from google.oauth2.service_account import Credentials
-from garminconnect import Garmin
 import pandas as pd
 from dotenv import load_dotenv
 
 import config
+import garmin_session
+from activity_store import ActivityStore, watermark_key
+from activity_sinks import SheetsSink, SINK_KINDS, create_local_sink
+from activity_summary import ActivitySummary
+from activity_details import ActivityDetailStore, parse_laps, parse_streams
+from fit_archive import FitArchive
+from activity_transform import transform_activities
+from rate_limiter import RateLimiter, AdaptiveBackoff, is_rate_limited
 
 # Load environment variables
 load_dotenv()
@@ -36,13 +46,113 @@ logger = logging.getLogger(__name__)
 
 
 class GarminSync:
-    """Main class for synchronizing Garmin activities to Google Sheets"""
+    """Main class for synchronizing Garmin activities to Google Sheets (or another sink)"""
 
-    def __init__(self):
-        """Initialize Garmin and Google Sheets clients"""
+    def __init__(self, sink_kind: str = None, sink_path: str = None):
+        """
+        Initialize Garmin and Google Sheets clients
+
+        Args:
+            sink_kind: Export target, one of activity_sinks.SINK_KINDS (default: config.SYNC_SINK)
+            sink_path: File of a local sink (default: config.SYNC_SINK_PATH or SYNC_SINK_PATHS)
+        """
         self.garmin_client = None
         self.sheet = None
-        self.existing_activity_ids = set()
+        self.sink = None
+        self.sink_kind = sink_kind or config.SYNC_SINK
+        self.sink_path = sink_path or config.SYNC_SINK_PATH
+        self.store = None
+        self.detail_store = None
+        self.fit_archive = None
+        self.summary = None
+
+        # Activity ID -> type of the activities saved to the store during this run
+        self.synced_activities = {}
+
+        # Shared by all fetch workers
+        self.rate_limiter = RateLimiter(config.GARMIN_REQUESTS_PER_SECOND, config.GARMIN_RATE_BURST)
+        self.backoff = AdaptiveBackoff(config.RETRY_DELAY, config.BACKOFF_MAX_DELAY)
+
+    def open_store(self, db_path: str = None):
+        """Open the local activity store (source of truth for duplicate checks)"""
+        if self.store is None:
+            self.store = ActivityStore(db_path)
+            logger.info(f"Opened local activity store: {self.store.db_path} ({self.store.count()} activities)")
+
+    def open_summary(self) -> ActivitySummary:
+        """
+        Load the persisted summary aggregates
+
+        A summary that is missing or does not match the local store (its
+        watermark differs from store.revision()) is rebuilt from the store;
+        after that it is only updated with the batches saved by save_batch.
+        """
+        if self.summary is None:
+            self.summary = ActivitySummary.load()
+            revision = self.store.revision()
+            if self.summary.watermark != revision:
+                self.summary.clear()
+                added = self.summary.update_frame(self.store.to_dataframe())
+                self.summary.watermark = revision
+                self.summary.save()
+                logger.info(f"Built activity summary from local store ({added} activities)")
+        return self.summary
+
+    def save_batch(self, activities: List[Dict[str, Any]], raw_activities: Dict[str, Dict[str, Any]] = None,
+                   exported_ids: set = None):
+        """
+        Save processed activities to the local store and fold them into the summary
+
+        Stored versions of the same activities are subtracted from the summary
+        first, so re-saving an edited activity replaces its contribution.
+        """
+        summary = self.open_summary()
+        previous = self.store.get_rows(a['activity_id'] for a in activities)
+
+        self.store.save_activities(activities, raw_activities, exported_ids)
+
+        summary.update(activities, previous)
+        summary.watermark = self.store.revision()
+        summary.save()
+
+        self.synced_activities.update((str(a['activity_id']), a.get('activity_type')) for a in activities)
+
+    @property
+    def existing_activity_ids(self) -> set:
+        """IDs known to be in the export target"""
+        return self.sink.ids if self.sink is not None else set()
+
+    def open_sink(self) -> bool:
+        """
+        Open the export target and load its activity IDs
+
+        Google Sheets is connected unless a worksheet was provided (e.g. by
+        the benchmarks); local sinks are created from sink_kind/sink_path.
+
+        Returns:
+            bool: True if the sink is ready
+        """
+        if self.sink is not None:
+            return True
+
+        if self.sink_kind not in SINK_KINDS:
+            logger.error(f"Unknown sink '{self.sink_kind}', expected one of: {', '.join(SINK_KINDS)}")
+            return False
+
+        if self.sink_kind == 'sheets':
+            if self.sheet is None:
+                return self.connect_google_sheets()
+            self.sink = SheetsSink(self.sheet)
+        else:
+            try:
+                self.sink = create_local_sink(self.sink_kind, self.sink_path)
+            except Exception as e:
+                logger.error(f"Failed to open {self.sink_kind} sink: {e}")
+                return False
+            logger.info(f"Writing activities to {self.sink}")
+
+        self._load_existing_activities()
+        return True
 
     def connect_garmin(self) -> bool:
         """
@@ -53,14 +163,14 @@ class GarminSync:
         """
         logger.info("Connecting to Garmin Connect...")
 
-        if not config.GARMIN_EMAIL or not config.GARMIN_PASSWORD:
+        has_credentials = config.GARMIN_EMAIL and config.GARMIN_PASSWORD
+        if not has_credentials and not garmin_session.has_cached_session():
             logger.error("Garmin credentials not found in environment variables")
             return False
 
         for attempt in range(config.MAX_RETRIES):
             try:
-                self.garmin_client = Garmin(config.GARMIN_EMAIL, config.GARMIN_PASSWORD)
-                self.garmin_client.login()
+                self.garmin_client = garmin_session.login(config.GARMIN_EMAIL, config.GARMIN_PASSWORD)
                 logger.info("Successfully connected to Garmin Connect")
                 return True
             except Exception as e:
@@ -123,6 +233,7 @@ class GarminSync:
                 logger.info("Initialized spreadsheet headers")
 
             # Load existing activity IDs to avoid duplicates
+            self.sink = SheetsSink(self.sheet)
             self._load_existing_activities()
 
             logger.info("Successfully connected to Google Sheets")
@@ -136,26 +247,156 @@ class GarminSync:
             return False
 
     def _load_existing_activities(self):
-        """Load existing activity IDs from the sheet to avoid duplicates"""
-        try:
-            # Get all values from the first column (activity_id)
-            all_values = self.sheet.col_values(1)
+        """Load existing activity IDs from the sink to avoid duplicates"""
+        if self.store is not None and self.store.count() and self.sink.name == 'sheets':
+            # The local store already knows what was synced - no need to pull the whole column
+            logger.info("Using local activity store for duplicate checks")
+            return
 
-            # Skip header and convert to set
-            if len(all_values) > 1:
-                self.existing_activity_ids = set(all_values[1:])
-                logger.info(f"Loaded {len(self.existing_activity_ids)} existing activity IDs")
+        try:
+            ids = self.sink.load_ids()
+            if ids:
+                logger.info(f"Loaded {len(ids)} existing activity IDs")
             else:
-                self.existing_activity_ids = set()
-                logger.info("No existing activities found in sheet")
+                logger.info(f"No existing activities found in {self.sink}")
 
         except Exception as e:
             logger.warning(f"Could not load existing activities: {e}")
-            self.existing_activity_ids = set()
+            self.sink.ids = set()
+
+    def _date_windows(self, start_date: datetime, end_date: datetime) -> Iterator[Tuple[datetime, datetime]]:
+        """Split a date range into consecutive FETCH_WINDOW_DAYS windows (oldest first)"""
+        window_start = start_date
+        while window_start.date() <= end_date.date():
+            window_end = min(window_start + timedelta(days=config.FETCH_WINDOW_DAYS - 1), end_date)
+            yield window_start, window_end
+            window_start = window_end + timedelta(days=1)
+
+    def _call_garmin(self, description: str, func, *args, **kwargs):
+        """
+        Call a Garmin API function with the shared rate limit, backoff and retries
+
+        Returns:
+            The result or None if every attempt failed
+        """
+        for attempt in range(config.MAX_RETRIES):
+            self.backoff.wait()
+            self.rate_limiter.acquire()
+
+            try:
+                result = func(*args, **kwargs)
+                self.backoff.on_success()
+                return result
+            except Exception as e:
+                logger.warning(f"Attempt {attempt + 1}/{config.MAX_RETRIES} to fetch {description} failed: {e}")
+                if attempt < config.MAX_RETRIES - 1:
+                    if is_rate_limited(e):
+                        # Pause shared by all workers; wait() at the top of the loop sleeps it off
+                        delay = self.backoff.on_throttle()
+                        logger.warning(f"Rate limited by Garmin, backing off for {delay:.1f}s")
+                    else:
+                        time.sleep(config.RETRY_DELAY)
+
+        logger.error(f"Failed to fetch {description} after {config.MAX_RETRIES} attempts")
+        return None
+
+    def _fetch_window(self, start_date: datetime, end_date: datetime) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch all activities of a single window with retries
+
+        Returns:
+            List of raw activities or None if every attempt failed
+        """
+        return self._call_garmin(
+            f"activities {start_date.date()} - {end_date.date()}",
+            self.garmin_client.get_activities_by_date,
+            start_date.strftime('%Y-%m-%d'),
+            end_date.strftime('%Y-%m-%d')
+        )
+
+    def _fetch_windows(self, start_date: datetime,
+                       end_date: datetime) -> Iterator[Tuple[datetime, datetime, Optional[List[Dict[str, Any]]]]]:
+        """
+        Fetch windows serially or with FETCH_CONCURRENCY workers
+
+        Results are always yielded in window order (oldest first). In concurrent
+        mode at most 2 * FETCH_CONCURRENCY windows are in flight, which keeps
+        memory bounded during long backfills.
+        """
+        windows = self._date_windows(start_date, end_date)
+        workers = config.FETCH_CONCURRENCY
+
+        if workers <= 1:
+            for window_start, window_end in windows:
+                yield window_start, window_end, self._fetch_window(window_start, window_end)
+            return
+
+        logger.info(f"Fetching with {workers} concurrent workers")
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='garmin-fetch')
+        in_flight = deque()
+
+        def submit_next() -> bool:
+            window = next(windows, None)
+            if window is None:
+                return False
+            in_flight.append((window, executor.submit(self._fetch_window, *window)))
+            return True
+
+        try:
+            while len(in_flight) < workers * 2 and submit_next():
+                pass
+
+            while in_flight:
+                (window_start, window_end), future = in_flight.popleft()
+                submit_next()
+                yield window_start, window_end, future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def iter_activities(self, start_date: datetime, end_date: datetime) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream new activities from Garmin Connect window by window
+
+        The range is split into FETCH_WINDOW_DAYS windows fetched oldest first,
+        so memory stays bounded and a transient error only retries one window.
+        Iteration stops at the first window that cannot be fetched; later
+        windows are picked up by the next run because the watermark only
+        advances over windows that were processed.
+
+        Args:
+            start_date: Start date for activity search
+            end_date: End date for activity search
+
+        Yields:
+            List of new (not yet synced) activities for each window
+        """
+        logger.info(f"Fetching activities from {start_date.date()} to {end_date.date()}")
+
+        for window_start, window_end, garmin_activities in self._fetch_windows(start_date, end_date):
+            if garmin_activities is None:
+                logger.error("Stopping fetch, remaining windows will be retried on the next run")
+                return
+
+            activities = []
+            for activity in garmin_activities:
+                activity_id = str(activity.get('activityId', ''))
+
+                # Skip if already synced
+                if self._is_known_activity(activity_id):
+                    logger.debug(f"Skipping duplicate activity: {activity_id}")
+                    continue
+
+                activities.append(activity)
+
+            logger.info(
+                f"Window {window_start.date()} - {window_end.date()}: "
+                f"found {len(garmin_activities)} activities, {len(activities)} new"
+            )
+            yield activities
 
     def get_activities(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         """
-        Get activities from Garmin Connect within date range
+        Get new activities from Garmin Connect within date range
 
         Args:
             start_date: Start date for activity search
@@ -164,42 +405,43 @@ class GarminSync:
         Returns:
             List of activity dictionaries
         """
-        logger.info(f"Fetching activities from {start_date.date()} to {end_date.date()}")
-
         activities = []
+        for window_activities in self.iter_activities(start_date, end_date):
+            activities.extend(window_activities)
 
-        for attempt in range(config.MAX_RETRIES):
-            try:
-                # Get activities from Garmin
-                garmin_activities = self.garmin_client.get_activities_by_date(
-                    start_date.strftime('%Y-%m-%d'),
-                    end_date.strftime('%Y-%m-%d')
-                )
+        logger.info(f"Filtered to {len(activities)} new activities")
+        return activities
 
-                logger.info(f"Found {len(garmin_activities)} activities")
+    def _is_known_activity(self, activity_id: str) -> bool:
+        """Check whether an activity was already synced"""
+        if self.store is not None:
+            return self.store.has_activity(activity_id)
+        return activity_id in self.existing_activity_ids
 
-                for activity in garmin_activities:
-                    activity_id = str(activity.get('activityId', ''))
-
-                    # Skip if already in sheet
-                    if activity_id in self.existing_activity_ids:
-                        logger.debug(f"Skipping duplicate activity: {activity_id}")
-                        continue
+    def process_activities(self, activities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Process a batch of activities and extract metrics
 
-                    activities.append(activity)
+        Uses the table-driven transform (config.ACTIVITY_TRANSFORMS) on the whole
+        batch at once.
 
-                logger.info(f"Filtered to {len(activities)} new activities")
-                return activities
+        Args:
+            activities: Raw activity data from Garmin
 
-            except Exception as e:
-                logger.warning(f"Attempt {attempt + 1}/{config.MAX_RETRIES} to fetch activities failed: {e}")
-                if attempt < config.MAX_RETRIES - 1:
-                    time.sleep(config.RETRY_DELAY)
-                else:
-                    logger.error(f"Failed to fetch activities after {config.MAX_RETRIES} attempts")
-                    return []
+        Returns:
+            List of processed metric dictionaries (activities without ID are dropped)
+        """
+        try:
+            return transform_activities(activities)
+        except Exception as e:
+            logger.error(f"Batch processing failed, falling back to per-activity processing: {e}")
 
-        return []
+        processed_activities = []
+        for activity in activities:
+            processed = self.process_activity(activity)
+            if processed:
+                processed_activities.append(processed)
+        return processed_activities
 
     def process_activity(self, activity: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -212,234 +454,390 @@ class GarminSync:
             Dictionary with processed metrics or None if processing failed
         """
         try:
-            activity_id = str(activity.get('activityId', ''))
+            processed = transform_activities([activity])
 
-            if not activity_id:
+            if not processed:
                 logger.warning("Activity without ID, skipping")
                 return None
 
-            # Initialize processed data with activity ID
-            processed = {'activity_id': activity_id}
-
-            # Extract basic info
-            processed['activity_type'] = activity.get('activityType', {}).get('typeKey', '')
-
-            # Parse and format date
-            start_time_str = activity.get('startTimeLocal', '')
-            if start_time_str:
-                try:
-                    # Parse ISO format: 2024-01-15 10:30:00
-                    start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-                    processed['date'] = start_time.strftime('%Y-%m-%d %H:%M:%S')
-                except Exception as e:
-                    logger.warning(f"Could not parse date {start_time_str}: {e}")
-                    processed['date'] = start_time_str
-            else:
-                processed['date'] = ''
+            return processed[0]
 
-            # Activity name
-            processed['title'] = activity.get('activityName', '')
+        except Exception as e:
+            logger.error(f"Error processing activity {activity.get('activityId', 'unknown')}: {e}")
+            return None
 
-            # Distance (convert from meters to km)
-            distance_m = activity.get('distance')
-            processed['distance_km'] = round(distance_m / 1000, 2) if distance_m else None
+    def write_to_sheets(self, activities: List[Dict[str, Any]]) -> int:
+        """
+        Write activities to the sink (Google Sheets by default) in batches
 
-            # Duration (convert from seconds to minutes)
-            duration_s = activity.get('duration')
-            processed['duration_min'] = round(duration_s / 60, 2) if duration_s else None
+        Activities already present in the sink are skipped. The sheet keeps
+        the newest activity on top; local sinks append in the given order.
 
-            # Calories
-            processed['calories'] = activity.get('calories')
+        Args:
+            activities: List of processed activity dictionaries (oldest first)
 
-            # Heart rate
-            processed['avg_hr'] = activity.get('averageHR')
-            processed['max_hr'] = activity.get('maxHR')
+        Returns:
+            Number of activities successfully written
+        """
+        if not activities:
+            logger.info("No activities to write")
+            return 0
 
-            # Pace/Speed (convert m/s to min/km for pace)
-            avg_speed_ms = activity.get('averageSpeed')
-            if avg_speed_ms and avg_speed_ms > 0:
-                # Convert m/s to min/km: (1000 / speed_m_s) / 60
-                pace_min_km = (1000 / avg_speed_ms) / 60
-                processed['avg_pace'] = round(pace_min_km, 2)
-            else:
-                processed['avg_pace'] = None
+        written_count = self.sink.append(activities)
 
-            max_speed_ms = activity.get('maxSpeed')
-            if max_speed_ms and max_speed_ms > 0:
-                best_pace_min_km = (1000 / max_speed_ms) / 60
-                processed['best_pace'] = round(best_pace_min_km, 2)
-            else:
-                processed['best_pace'] = None
-
-            # Running-specific metrics
-            processed['avg_run_cadence'] = activity.get('averageRunningCadenceInStepsPerMinute')
-            processed['max_run_cadence'] = activity.get('maxRunningCadenceInStepsPerMinute')
-            processed['avg_ground_contact_time_ms'] = activity.get('avgGroundContactTime')
-            processed['avg_stride_length_m'] = activity.get('avgStrideLength')
-            processed['avg_vertical_oscillation_cm'] = activity.get('avgVerticalOscillation')
-            processed['avg_vertical_ratio'] = activity.get('avgVerticalRatio')
-            processed['avg_gct_balance'] = activity.get('avgGctBalance')
-
-            # Grade Adjusted Pace
-            avg_gap_ms = activity.get('avgGradeAdjustedSpeed')
-            if avg_gap_ms and avg_gap_ms > 0:
-                gap_min_km = (1000 / avg_gap_ms) / 60
-                processed['avg_gap'] = round(gap_min_km, 2)
-            else:
-                processed['avg_gap'] = None
+        logger.info(f"Successfully wrote {written_count}/{len(activities)} activities to {self.sink}")
+        return written_count
+
+    def export_pending(self) -> int:
+        """
+        Write activities that are in the local store but not yet in the sink
+
+        Returns:
+            Number of activities written to the sink
+        """
+        pending = self.store.get_unexported(self.sink.name)
+        if not pending:
+            logger.info("No activities to write")
+            return 0
 
-            # Elevation
-            processed['total_ascent_m'] = activity.get('elevationGain')
-            processed['total_descent_m'] = activity.get('elevationLoss')
+        written = self.write_to_sheets(pending)
 
-            # Training metrics
-            processed['aerobic_te'] = activity.get('aerobicTrainingEffect')
-            processed['training_stress_score'] = activity.get('trainingStressScore')
+        # Everything now present in the sink counts as exported
+        self.store.mark_exported(
+            (a['activity_id'] for a in pending if str(a['activity_id']) in self.sink.ids),
+            sink=self.sink.name
+        )
+        return written
 
-            # Steps
-            processed['steps'] = activity.get('steps')
+    def rebuild_sheet(self):
+        """Recreate the Google Sheet (or another sink) from the local activity store"""
+        logger.info("=" * 60)
+        logger.info("Rebuilding export target from local activity store")
+        logger.info("=" * 60)
 
-            # Respiration
-            processed['avg_resp'] = activity.get('avgRespiration')
-            processed['min_resp'] = activity.get('minRespiration')
-            processed['max_resp'] = activity.get('maxRespiration')
+        self.open_store()
 
-            # Stress
-            processed['avg_stress'] = activity.get('avgStress')
-            processed['max_stress'] = activity.get('maxStress')
+        if not self.store.count():
+            logger.error("Local activity store is empty, nothing to rebuild from")
+            return
 
-            # Power metrics
-            processed['normalized_power'] = activity.get('normalizedPower')
-            processed['avg_power'] = activity.get('avgPower')
-            processed['max_power'] = activity.get('maxPower')
+        if not self.open_sink():
+            logger.error(f"Could not open {self.sink_kind} sink, aborting rebuild")
+            return
+
+        self.sink.clear()
+        self.store.reset_exported(self.sink.name)
+
+        written = self.export_pending()
 
-            # Time metrics (convert to minutes)
-            moving_duration_s = activity.get('movingDuration')
-            processed['moving_time_min'] = round(moving_duration_s / 60, 2) if moving_duration_s else None
+        logger.info("=" * 60)
+        logger.info(f"Rebuild completed: {written}/{self.store.count()} activities written")
+        logger.info("=" * 60)
 
-            elapsed_duration_s = activity.get('elapsedDuration')
-            processed['elapsed_time_min'] = round(elapsed_duration_s / 60, 2) if elapsed_duration_s else None
+    def export(self) -> int:
+        """
+        Write stored activities missing from the sink without contacting Garmin
 
-            return processed
+        Lets frequent syncs go to a fast local sink while Google Sheets is
+        filled on its own schedule (--export-only --sink sheets).
 
+        Returns:
+            Number of activities written
+        """
+        self.open_store()
+
+        if not self.open_sink():
+            logger.error(f"Could not open {self.sink_kind} sink, aborting export")
+            return 0
+
+        written = self.export_pending()
+        logger.info(f"Export completed: {written} activities written to {self.sink}")
+        return written
+
+    def _resume_start_date(self, end_date: datetime) -> datetime:
+        """
+        Determine where the sync should resume from
+
+        Uses the persisted high-water mark (newest activity seen) minus
+        SYNC_OVERLAP_DAYS. Falls back to the newest stored activity, then to
+        the newest activity in the sink, and finally to INITIAL_SYNC_DAYS.
+        """
+        watermark = self.store.get_watermark()
+        latest = watermark['date'] if watermark else None
+        source = 'watermark'
+
+        if not latest:
+            latest = self.store.latest_activity_date()
+            source = 'local store'
+
+        if not latest and self.existing_activity_ids:
+            latest = self.sink.latest_date()
+            source = str(self.sink)
+
+        if latest:
+            try:
+                latest_dt = config.TIMEZONE.localize(datetime.strptime(latest[:10], '%Y-%m-%d'))
+                start_date = min(latest_dt, end_date) - timedelta(days=config.SYNC_OVERLAP_DAYS)
+                logger.info(f"Resuming from {latest} ({source}) with {config.SYNC_OVERLAP_DAYS} day(s) overlap")
+                return start_date
+            except ValueError:
+                logger.warning(f"Could not parse resume date {latest}, using initial sync period")
+
+        logger.info(f"No sync history found, using initial sync period of {config.INITIAL_SYNC_DAYS} days")
+        return end_date - timedelta(days=config.INITIAL_SYNC_DAYS)
+
+    def _advance_watermark(self, activities: List[Dict[str, Any]]):
+        """Move the high-water mark to the newest processed activity"""
+        dated = [a for a in activities if a.get('date')]
+        if not dated:
+            return
+
+        newest = max(dated, key=lambda a: watermark_key(a['date'], a['activity_id']))
+        if self.store.update_watermark(newest['date'], newest['activity_id']):
+            logger.info(f"Sync watermark moved to {newest['date']} (activity {newest['activity_id']})")
+
+    def _download_details(self, activity_id: str) -> bool:
+        """
+        Fetch, convert and store laps and time series of one activity
+
+        Errors are logged and reported as False, so one bad response does not
+        abort the sync; the activity is retried by a later --backfill run.
+        """
+        try:
+            return self._fetch_and_save_details(activity_id)
         except Exception as e:
-            logger.error(f"Error processing activity {activity.get('activityId', 'unknown')}: {e}")
-            return None
+            logger.error(f"Could not store details of activity {activity_id}: {e}")
+            return False
 
-    def write_to_sheets(self, activities: List[Dict[str, Any]]) -> int:
+    def _fetch_and_save_details(self, activity_id: str) -> bool:
+        splits = self._call_garmin(f"splits of activity {activity_id}",
+                                   self.garmin_client.get_activity_splits, activity_id)
+        if splits is None:
+            return False
+
+        details = self._call_garmin(f"details of activity {activity_id}",
+                                    self.garmin_client.get_activity_details, activity_id,
+                                    maxchart=config.DETAIL_MAX_SAMPLES)
+        if details is None:
+            return False
+
+        self.detail_store.save(activity_id, parse_laps(splits), parse_streams(details))
+        return True
+
+    def _run_per_activity(self, func, activity_ids: List[str]) -> int:
+        """Run func(activity_id) serially or with FETCH_CONCURRENCY workers; number of successes"""
+        workers = config.FETCH_CONCURRENCY
+
+        if workers <= 1:
+            return sum(1 for activity_id in activity_ids if func(activity_id))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='garmin-activity') as executor:
+            return sum(1 for ok in executor.map(func, activity_ids) if ok)
+
+    def sync_details(self, backfill: bool = False) -> int:
         """
-        Write activities to Google Sheets
+        Download laps and streams of activities that do not have them yet
+
+        Only DETAIL_ACTIVITY_TYPES are considered. By default only activities
+        saved during this run are checked, so a regular sync never walks the
+        whole history. With backfill, the newest DETAIL_BACKFILL_BATCH stored
+        activities without details are downloaded as well (older history and
+        earlier failures); repeated runs work through the rest.
 
         Args:
-            activities: List of processed activity dictionaries
+            backfill: Also download details of older stored activities
 
         Returns:
-            Number of activities successfully written
+            Number of activities whose details were downloaded
         """
-        if not activities:
-            logger.info("No activities to write")
+        self.open_store()
+        if self.detail_store is None:
+            self.detail_store = ActivityDetailStore()
+
+        recent = [activity_id for activity_id, activity_type in reversed(self.synced_activities.items())
+                  if activity_type in config.DETAIL_ACTIVITY_TYPES]
+        missing = self.detail_store.missing(recent)
+
+        if backfill:
+            older = self.detail_store.missing(self.store.ordered_activity_ids(config.DETAIL_ACTIVITY_TYPES))
+            missing += [activity_id for activity_id in older if activity_id not in missing][:config.DETAIL_BACKFILL_BATCH]
+
+        if not missing:
+            logger.info("Activity details are up to date")
             return 0
 
-        written_count = 0
+        logger.info(f"Downloading details of {len(missing)} activities")
+        downloaded = self._run_per_activity(self._download_details, missing)
+        logger.info(f"Downloaded details of {downloaded}/{len(missing)} activities to {self.detail_store.directory}")
+        return downloaded
 
-        for activity in activities:
-            try:
-                # Create row in the same order as SHEET_HEADERS
-                row = []
-                for header in config.SHEET_HEADERS:
-                    value = activity.get(header)
-                    # Convert None to empty string for Google Sheets
-                    row.append(value if value is not None else '')
+    def _download_fit(self, activity_id: str) -> bool:
+        """Download the original file of one activity into the FIT archive"""
+        data = self._call_garmin(f"FIT file of activity {activity_id}", self.garmin_client.download_activity,
+                                 activity_id, dl_fmt=self.garmin_client.ActivityDownloadFormat.ORIGINAL)
+        if not data:
+            return False
 
-                # Insert row at position 2 (right after header) to keep newest at top
-                self.sheet.insert_row(row, 2, value_input_option='USER_ENTERED')
+        try:
+            self.fit_archive.add(activity_id, data)
+            return True
+        except Exception as e:
+            logger.error(f"Could not archive FIT file of activity {activity_id}: {e}")
+            return False
 
-                written_count += 1
-                logger.info(f"Wrote activity: {activity.get('activity_id')} - {activity.get('title')}")
+    def sync_fit_files(self, backfill: bool = False) -> int:
+        """
+        Download original FIT files of activities that are not archived yet
 
-                # Add to existing IDs to prevent duplicate writes in same session
-                self.existing_activity_ids.add(activity.get('activity_id'))
+        Files go to the content-addressed FitArchive; fit_archive.py derives
+        metrics from them offline. By default only activities saved during
+        this run are checked. With backfill, the newest FIT_BACKFILL_BATCH
+        stored activities without a file are downloaded as well (older
+        history and earlier failures).
 
-                # Small delay to avoid rate limiting
-                time.sleep(0.5)
+        Args:
+            backfill: Also download files of older stored activities
 
-            except Exception as e:
-                logger.error(f"Failed to write activity {activity.get('activity_id')}: {e}")
-                continue
+        Returns:
+            Number of downloaded files
+        """
+        self.open_store()
+        if self.fit_archive is None:
+            self.fit_archive = FitArchive()
 
-        logger.info(f"Successfully wrote {written_count}/{len(activities)} activities to Google Sheets")
-        return written_count
+        missing = self.fit_archive.missing(reversed(self.synced_activities))
+
+        if backfill:
+            older = self.fit_archive.missing(self.store.ordered_activity_ids())
+            missing += [activity_id for activity_id in older if activity_id not in missing][:config.FIT_BACKFILL_BATCH]
+
+        if not missing:
+            logger.info("FIT archive is up to date")
+            return 0
+
+        logger.info(f"Downloading {len(missing)} FIT files")
+        downloaded = self._run_per_activity(self._download_fit, missing)
+        logger.info(f"Archived {downloaded}/{len(missing)} FIT files in {self.fit_archive.directory}")
+        return downloaded
 
-    def sync(self, days: int = None):
+    def sync(self, days: int = None, details: bool = None, fit: bool = None, backfill: bool = False):
         """
         Main synchronization method
 
         Args:
-            days: Number of days to sync (default: INITIAL_SYNC_DAYS for first run, 2 for subsequent)
+            days: Number of days to sync (default: resume from the persisted watermark)
+            details: Also download laps and streams (default: config.SYNC_ACTIVITY_DETAILS)
+            fit: Also download original FIT files (default: config.SYNC_FIT_FILES)
+            backfill: Let the details and FIT stages also fill in a batch of older activities
+
+        Returns:
+            Number of activities written to the sink
         """
         logger.info("=" * 60)
         logger.info("Starting Garmin Training Sync")
         logger.info("=" * 60)
 
-        # Connect to Garmin
-        if not self.connect_garmin():
+        # Open local activity store
+        self.open_store()
+
+        # Connect to Garmin (unless a client was provided, e.g. by the benchmarks)
+        if self.garmin_client is None and not self.connect_garmin():
             logger.error("Could not connect to Garmin, aborting sync")
-            return
+            return 0
 
-        # Connect to Google Sheets
-        if not self.connect_google_sheets():
-            logger.error("Could not connect to Google Sheets, aborting sync")
-            return
+        # Open the export target (Google Sheets unless another sink is configured)
+        if not self.open_sink():
+            logger.error(f"Could not open {self.sink_kind} sink, aborting sync")
+            return 0
 
         # Determine date range
         end_date = datetime.now(config.TIMEZONE)
 
         if days is None:
-            # If sheet is empty (no activities), use initial sync period
-            days = config.INITIAL_SYNC_DAYS if not self.existing_activity_ids else 2
+            start_date = self._resume_start_date(end_date)
+        else:
+            start_date = end_date - timedelta(days=days)
+            logger.info(f"Syncing last {days} days of activities")
 
-        start_date = end_date - timedelta(days=days)
+        written = 0
+        new_count = 0
 
-        logger.info(f"Syncing last {days} days of activities")
+        # Stream activities window by window: process, store and export each window
+        for activities in self.iter_activities(start_date, end_date):
+            if not activities:
+                continue
 
-        # Get activities
-        activities = self.get_activities(start_date, end_date)
+            processed_activities = self.process_activities(activities)
+            logger.info(f"Successfully processed {len(processed_activities)}/{len(activities)} activities")
+            new_count += len(processed_activities)
 
-        if not activities:
-            logger.info("No new activities to sync")
-            return
+            # Save to the local store first; activities already in the sheet are marked exported
+            raw_activities = {str(a.get('activityId')): a for a in activities}
+            exported_ids = self.existing_activity_ids if self.sink.name == 'sheets' else None
+            self.save_batch(processed_activities, raw_activities, exported_ids)
+            self._advance_watermark(processed_activities)
 
-        # Process activities
-        processed_activities = []
-        for activity in activities:
-            processed = self.process_activity(activity)
-            if processed:
-                processed_activities.append(processed)
+            # Write everything not yet in the sink (oldest first so newest ends up on top of the sheet)
+            written += self.export_pending()
+
+        if not new_count:
+            logger.info("No new activities to sync")
 
-        logger.info(f"Successfully processed {len(processed_activities)}/{len(activities)} activities")
+        # Export leftovers from earlier runs whose sheet write failed
+        written += self.export_pending()
 
-        # Sort activities by date (oldest first) so newest ends up on top when inserting
-        processed_activities.sort(key=lambda x: x.get('date', ''), reverse=False)
+        if config.SYNC_ACTIVITY_DETAILS if details is None else details:
+            self.sync_details(backfill)
 
-        # Write to Google Sheets
-        written = self.write_to_sheets(processed_activities)
+        if config.SYNC_FIT_FILES if fit is None else fit:
+            self.sync_fit_files(backfill)
 
         logger.info("=" * 60)
         logger.info(f"Sync completed: {written} new activities added")
         logger.info("=" * 60)
+        return written
 
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='Synchronize Garmin Connect activities to Google Sheets')
+    parser.add_argument('--days', type=int, default=None,
+                        help='Number of days to sync (default: automatic)')
+    parser.add_argument('--rebuild-sheet', action='store_true',
+                        help='Recreate the Google Sheet (or --sink) from the local activity store')
+    parser.add_argument('--export-only', action='store_true',
+                        help='Write stored activities missing from the sink, without fetching from Garmin')
+    parser.add_argument('--details', action='store_true', default=None,
+                        help='Also download laps and per-sample streams of new runs')
+    parser.add_argument('--backfill', action='store_true',
+                        help='With --details/--fit, also fill in older activities (a bounded batch per run)')
+    parser.add_argument('--fit', action='store_true', default=None,
+                        help='Also download original FIT files of new activities into the FIT archive')
+    parser.add_argument('--sink', choices=SINK_KINDS, default=None,
+                        help=f'Export target (default: {config.SYNC_SINK})')
+    parser.add_argument('--sink-path', default=None,
+                        help='File of a local sink (default: config.SYNC_SINK_PATHS)')
+    args = parser.parse_args()
+
+    syncer = GarminSync(args.sink, args.sink_path)
     try:
-        syncer = GarminSync()
-        syncer.sync()
+        if args.rebuild_sheet:
+            syncer.rebuild_sheet()
+        elif args.export_only:
+            syncer.export()
+        else:
+            syncer.sync(days=args.days, details=args.details, fit=args.fit, backfill=args.backfill)
     except KeyboardInterrupt:
         logger.info("Sync interrupted by user")
         sys.exit(0)
     except Exception as e:
         logger.error(f"Unexpected error: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        if syncer.store is not None:
+            syncer.store.close()
+        if syncer.sink is not None:
+            syncer.sink.close()
 
 
 if __name__ == '__main__':
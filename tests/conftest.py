@@ -0,0 +1,14 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules live in the repository root; the Garmin/gspread fakes in benchmarks/
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+import config
+
+# sync_garmin opens its log file on import
+config.LOG_FILE = os.devnull
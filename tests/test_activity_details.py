@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+import activity_details
+from activity_details import ActivityDetailStore, parse_laps, parse_streams
+
+DESCRIPTORS = [
+    {'key': 'sumDuration', 'metricsIndex': 0},
+    {'key': 'directHeartRate', 'metricsIndex': 1},
+    {'key': 'directSpeed', 'metricsIndex': 2},
+]
+KEYS = ['sumDuration', 'directHeartRate', 'directSpeed']
+
+
+def test_streams_without_samples_are_empty_arrays():
+    streams = parse_streams({'metricDescriptors': DESCRIPTORS, 'activityDetailMetrics': []}, KEYS)
+
+    assert set(streams) == set(KEYS)
+    for values in streams.values():
+        assert values.dtype == np.float32
+        assert len(values) == 0
+
+
+def test_ragged_samples_are_padded_with_nan():
+    details = {
+        'metricDescriptors': DESCRIPTORS,
+        'activityDetailMetrics': [
+            {'metrics': [0.0, 120.0, 3.1]},
+            {'metrics': [1.0, 121.0]},
+            {'metrics': [2.0, None, 3.3]},
+        ],
+    }
+    streams = parse_streams(details, KEYS)
+
+    np.testing.assert_array_equal(streams['sumDuration'], [0.0, 1.0, 2.0])
+    np.testing.assert_array_equal(streams['directHeartRate'], [120.0, 121.0, np.nan])
+    np.testing.assert_allclose(streams['directSpeed'], [3.1, np.nan, 3.3], rtol=1e-6)
+
+
+def test_streams_keep_requested_keys_with_a_descriptor():
+    details = {
+        'metricDescriptors': DESCRIPTORS + [{'key': 'directPower', 'metricsIndex': 5}],
+        'activityDetailMetrics': [{'metrics': [0.0, 120.0, 3.1]}, {'metrics': None}],
+    }
+    streams = parse_streams(details, ['directHeartRate', 'directPower', 'directElevation'])
+
+    # directElevation has no descriptor; directPower points past the sample width
+    assert set(streams) == {'directHeartRate', 'directPower'}
+    np.testing.assert_array_equal(streams['directHeartRate'], [120.0, np.nan])
+    np.testing.assert_array_equal(streams['directPower'], [np.nan, np.nan])
+
+
+def test_streams_without_descriptors_or_response_are_empty():
+    assert parse_streams(None, KEYS) == {}
+    assert parse_streams({'activityDetailMetrics': [{'metrics': [1.0]}]}, KEYS) == {}
+
+
+def test_laps_fill_missing_fields_with_nan():
+    splits = {'lapDTOs': [{'distance': 1000.0, 'averageHR': 150}, {'distance': 400.5, 'averageHR': None}]}
+    laps = parse_laps(splits, ['distance', 'averageHR', 'averagePower'])
+
+    assert all(values.dtype == np.float32 for values in laps.values())
+    np.testing.assert_array_equal(laps['distance'], [1000.0, 400.5])
+    np.testing.assert_array_equal(laps['averageHR'], [150.0, np.nan])
+    np.testing.assert_array_equal(laps['averagePower'], [np.nan, np.nan])
+
+
+def test_no_laps():
+    assert parse_laps({'lapDTOs': []}) == {}
+    assert parse_laps(None) == {}
+
+
+def test_save_leaves_no_npz_temp_file(tmp_path, monkeypatch):
+    store = ActivityDetailStore(tmp_path)
+
+    def crash(src, dst):
+        raise OSError('crashed before rename')
+
+    monkeypatch.setattr(activity_details.os, 'replace', crash)
+    with pytest.raises(OSError):
+        store.save('123', {}, {'directHeartRate': np.array([120.0], np.float32)})
+
+    assert store.activity_ids() == set()
+    assert store.missing(['123']) == ['123']
+
+
+def test_saved_details_load_back(tmp_path):
+    store = ActivityDetailStore(tmp_path)
+    store.save('123', {'distance': np.array([1000.0, 500.0], np.float32)},
+               {'directHeartRate': np.array([120.0, np.nan], np.float32)})
+
+    assert store.activity_ids() == {'123'}
+    assert list(tmp_path.iterdir()) == [tmp_path / '123.npz']
+    np.testing.assert_array_equal(store.laps_frame('123')['distance'], [1000.0, 500.0])
+    np.testing.assert_array_equal(store.streams_frame('123')['directHeartRate'], [120.0, np.nan])
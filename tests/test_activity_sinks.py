@@ -0,0 +1,43 @@
+import pytest
+
+from activity_sinks import ActivitySink, SheetsSink, create_local_sink
+from activity_transform import transform_activities
+from fakes import FakeWorksheet, generate_activities
+
+
+def test_incomplete_sink_fails_when_created():
+    class NoWriteSink(ActivitySink):
+        def latest_date(self):
+            return None
+
+        def clear(self):
+            pass
+
+        def _read_ids(self):
+            return []
+
+    with pytest.raises(TypeError):
+        NoWriteSink()
+
+
+@pytest.mark.parametrize('kind', ['csv', 'sqlite', 'parquet'])
+def test_local_sinks_skip_activities_already_written(tmp_path, kind):
+    rows = transform_activities(generate_activities(5))
+    sink = create_local_sink(kind, str(tmp_path / f'trainings.{kind}'))
+    try:
+        assert sink.append(rows[:3]) == 3
+        assert sink.append(rows) == 2
+        assert sink.load_ids() == {row['activity_id'] for row in rows}
+        assert sink.latest_date() == max(row['date'] for row in rows)
+    finally:
+        sink.close()
+
+
+def test_sheets_sink_keeps_newest_on_top():
+    sheet = FakeWorksheet()
+    sink = SheetsSink(sheet)
+    sink.clear()
+    rows = transform_activities(generate_activities(5))
+
+    assert sink.append(rows) == 5
+    assert sink.latest_date() == rows[-1]['date']
@@ -0,0 +1,23 @@
+import activity_store
+from activity_store import ActivityStore
+from activity_transform import transform_activities
+from fakes import generate_activities
+
+
+def test_watermark_orders_activity_ids_numerically(tmp_path):
+    with ActivityStore(str(tmp_path / 'activities.db')) as store:
+        assert store.update_watermark('2026-03-01 07:00:00', '9999999999')
+        assert store.update_watermark('2026-03-01 07:00:00', '10000000000')
+        assert not store.update_watermark('2026-03-01 07:00:00', '9999999999')
+        assert store.get_watermark()['activity_id'] == '10000000000'
+
+
+def test_get_rows_reads_large_id_sets_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(activity_store, 'QUERY_CHUNK_SIZE', 7)
+    rows = transform_activities(generate_activities(30))
+
+    with ActivityStore(str(tmp_path / 'activities.db')) as store:
+        store.save_activities(rows[:20])
+        found = store.get_rows([row['activity_id'] for row in rows] + ['404'])
+
+    assert sorted(row['activity_id'] for row in found) == sorted(row['activity_id'] for row in rows[:20])
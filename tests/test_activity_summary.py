@@ -0,0 +1,82 @@
+import json
+
+import pandas as pd
+import pytest
+
+import config
+import sync_garmin
+from activity_store import ActivityStore
+from activity_summary import ActivitySummary
+from activity_transform import transform_activities
+from fakes import generate_activities
+from fetch_training_data import TrainingDataFetcher
+
+
+@pytest.fixture
+def syncer(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'ACTIVITY_SUMMARY_PATH', str(tmp_path / 'summary.json'))
+    syncer = sync_garmin.GarminSync()
+    syncer.store = ActivityStore(str(tmp_path / 'activities.db'))
+    yield syncer
+    syncer.store.close()
+
+
+def test_edited_activity_replaces_its_contribution(syncer):
+    rows = transform_activities(generate_activities(3))
+    syncer.save_batch(rows)
+
+    edited = dict(rows[0], distance_km=rows[0]['distance_km'] + 10)
+    syncer.save_batch([edited])
+
+    summary = ActivitySummary.load()
+    assert summary.count == 3
+    expected = sum(r['distance_km'] for r in rows) + 10
+    assert summary.stats()['total_distance_km'] == pytest.approx(expected)
+    assert sum(week['activities'] for week in summary.weeks.values()) == 3
+
+
+def test_summary_file_keeps_aggregates_and_store_watermark(syncer):
+    syncer.save_batch(transform_activities(generate_activities(5)))
+
+    with open(config.ACTIVITY_SUMMARY_PATH, encoding='utf-8') as f:
+        state = json.load(f)
+    assert 'ids' not in state
+    assert state['watermark'] == syncer.store.revision()
+
+
+def test_summary_out_of_sync_with_store_is_rebuilt(syncer):
+    rows = transform_activities(generate_activities(4))
+    syncer.store.save_activities(rows)
+
+    assert syncer.open_summary().count == 4
+
+
+def test_fetch_summary_describes_the_given_data(syncer, capsys):
+    syncer.save_batch(transform_activities(generate_activities(20)))
+
+    df = pd.DataFrame({
+        'activity_id': ['1', '2'],
+        'date': pd.to_datetime(['2026-01-01 08:00:00', '2026-01-02 08:00:00']),
+        'activity_type': ['running', 'cycling'],
+        'title': ['Bieg', 'Rower'],
+        'distance_km': [10.0, 30.0],
+        'duration_min': [50.0, 60.0],
+    })
+    TrainingDataFetcher().print_summary(df)
+
+    out = capsys.readouterr().out
+    assert 'Total activities: 2' in out
+    assert 'Total distance: 10.00 km' in out
+
+
+def test_fetch_summary_of_full_history_uses_the_aggregates(syncer, capsys, monkeypatch):
+    syncer.save_batch(transform_activities(generate_activities(20)))
+    df = syncer.store.to_dataframe()
+
+    def rescan(*args, **kwargs):
+        raise AssertionError('full history should not be rescanned')
+
+    monkeypatch.setattr(ActivitySummary, 'from_frame', rescan)
+    TrainingDataFetcher().print_summary(df)
+
+    assert 'Total activities: 20' in capsys.readouterr().out
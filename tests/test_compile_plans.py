@@ -0,0 +1,40 @@
+import json
+import shutil
+from pathlib import Path
+
+import compile_plans
+import plan_cache
+from workout_manifest import plan_id
+from workout_model import Workout
+
+PLAN_FILE = Path(__file__).resolve().parent.parent / 'plan' / 'plan_treningowy_10km_38min.md'
+
+
+def test_ids_are_relative_to_the_given_plan_dir(tmp_path):
+    plan_dir = tmp_path / 'plany'
+    for athlete in ('anna', 'jan'):
+        (plan_dir / athlete).mkdir(parents=True)
+        shutil.copy(PLAN_FILE, plan_dir / athlete / '10km.md')
+
+    output = tmp_path / 'out'
+    for athlete, plan_file in compile_plans.discover_plans(plan_dir):
+        result = compile_plans.compile_plan(athlete, plan_file, output, plan_dir)
+        assert result['error'] is None
+
+    anna = json.loads((output / 'anna' / '10km' / 'week01_WT.json').read_text(encoding='utf-8'))
+    jan = json.loads((output / 'jan' / '10km' / 'week01_WT.json').read_text(encoding='utf-8'))
+
+    assert plan_id(plan_dir / 'anna' / '10km.md', plan_dir) == 'anna__10km'
+    assert anna['workoutId'] == Workout(1, 'WT', '', ()).garmin_ids('anna__10km')[0]
+    assert anna['workoutId'] != jan['workoutId']
+
+
+def test_files_with_other_ids_are_rewritten(tmp_path):
+    payload = {'workoutId': 1, 'workoutName': 'W1D1', 'workoutSegments': [{'workoutSteps': [{'stepId': 10}]}]}
+    assert plan_cache.write_workout_files(tmp_path, {'w.json': payload})['written'] == 1
+    assert plan_cache.write_workout_files(tmp_path, {'w.json': payload})['unchanged'] == 1
+
+    # Same content, IDs from a newer generator
+    regenerated = {'workoutId': 2, 'workoutName': 'W1D1', 'workoutSegments': [{'workoutSteps': [{'stepId': 20}]}]}
+    assert plan_cache.write_workout_files(tmp_path, {'w.json': regenerated})['written'] == 1
+    assert json.loads((tmp_path / 'w.json').read_text(encoding='utf-8')) == regenerated
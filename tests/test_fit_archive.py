@@ -0,0 +1,52 @@
+import io
+import zipfile
+
+import pytest
+
+from fakes import encode_fit, generate_activities
+from fit_archive import FitArchive, extract_fit, map_archive
+
+
+def zipped(name, content):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def fit():
+    return encode_fit(generate_activities(1)[0], samples=60)
+
+
+def test_extract_fit_from_zip_or_plain_content(fit):
+    assert extract_fit(fit) == fit
+    assert extract_fit(zipped('12345_ACTIVITY.fit', fit)) == fit
+
+
+def test_zip_without_fit_member_is_rejected():
+    with pytest.raises(ValueError):
+        extract_fit(zipped('notes.txt', b'nothing here'))
+
+
+def test_identical_files_are_stored_once_and_index_survives_reopen(tmp_path, fit):
+    archive = FitArchive(tmp_path)
+    digest = archive.add('1', zipped('1.fit', fit))
+    assert archive.add('2', fit) == digest
+
+    reopened = FitArchive(tmp_path)
+    assert reopened.missing(['1', '2', '3']) == ['3']
+    assert reopened.path('1') == reopened.path('2')
+    assert len(list((tmp_path / 'objects').rglob('*.fit'))) == 1
+
+
+def test_map_archive_reports_broken_files_per_activity(tmp_path, fit):
+    archive = FitArchive(tmp_path)
+    archive.add('good', fit)
+    archive.add('broken', b'not a FIT file at all')
+
+    result = map_archive(archive=archive, workers=1).set_index('activity_id')
+
+    assert result.loc['good', 'samples'] == 60
+    assert result.loc['good', 'duration_min'] == pytest.approx(59 / 60, abs=0.01)
+    assert 'FitError' in result.loc['broken', 'error']
@@ -0,0 +1,107 @@
+import struct
+
+import numpy as np
+import pytest
+
+from fit_decoder import FIT_EPOCH_OFFSET, FitError, decode_records
+
+# record (global 20) on local type 0: timestamp, heart_rate; local type 1 without timestamp
+RECORD_FIELDS = [(253, 4, 0x86), (3, 1, 0x02)]
+# event (global 21) on local type 2: timestamp, event, event_type
+EVENT_FIELDS = [(253, 4, 0x86), (0, 1, 0x00), (1, 1, 0x00)]
+
+
+def definition(local_type, global_number, fields):
+    return (struct.pack('<BBBHB', 0x40 | local_type, 0, 0, global_number, len(fields))
+            + bytes(value for field in fields for value in field))
+
+
+def fit_file(body, header_size=14, crc=b'\x00\x00'):
+    if header_size == 14:
+        header = struct.pack('<BBHI4sH', 14, 0x20, 2132, len(body), b'.FIT', 0)
+    else:
+        header = struct.pack('<BBHI4s', 12, 0x10, 2132, len(body), b'.FIT')
+    return header + bytes(body) + crc
+
+
+def compressed(local_type, timestamp):
+    return bytes([0x80 | (local_type << 5) | (timestamp & 0x1F)])
+
+
+def test_timestamped_message_between_records_resets_compressed_time_base():
+    body = definition(0, 20, RECORD_FIELDS) + definition(1, 20, RECORD_FIELDS[1:]) + definition(2, 21, EVENT_FIELDS)
+    body += struct.pack('<BIB', 0x00, 1000, 140)
+    body += compressed(1, 1001) + bytes([141])
+    # Pause/resume event 99 s later, then compressed records relative to it
+    body += struct.pack('<BIBB', 0x02, 1100, 0, 4)
+    body += compressed(1, 1101) + bytes([150])
+    body += compressed(1, 1102) + bytes([151])
+
+    records = decode_records(fit_file(body))
+
+    np.testing.assert_array_equal(records['timestamp'] - FIT_EPOCH_OFFSET, [1000, 1001, 1101, 1102])
+    np.testing.assert_array_equal(records['heart_rate'], [140, 141, 150, 151])
+
+
+def records_body(start, heart_rates):
+    """Record definition plus one full-timestamp record per heart rate"""
+    body = definition(0, 20, RECORD_FIELDS)
+    for second, heart_rate in enumerate(heart_rates):
+        body += struct.pack('<BIB', 0x00, start + second, heart_rate)
+    return body
+
+
+def test_12_and_14_byte_headers():
+    body = records_body(500, [120, 121])
+
+    for header_size in (12, 14):
+        records = decode_records(fit_file(body, header_size))
+        np.testing.assert_array_equal(records['heart_rate'], [120, 121])
+
+
+def test_chained_files_are_decoded_and_crc_is_skipped():
+    data = fit_file(records_body(500, [120]), crc=b'\xAB\xCD') + fit_file(records_body(900, [130, 131]), 12)
+
+    records = decode_records(data)
+
+    np.testing.assert_array_equal(records['timestamp'] - FIT_EPOCH_OFFSET, [500, 900, 901])
+    np.testing.assert_array_equal(records['heart_rate'], [120, 130, 131])
+
+
+def test_big_endian_definition_and_invalid_values():
+    body = struct.pack('>BBBHB', 0x40, 0, 1, 20, 2) + bytes([253, 4, 0x86, 3, 1, 0x02])
+    body += struct.pack('>BIB', 0x00, 700, 0xFF)
+    body += struct.pack('>BIB', 0x00, 701, 99)
+
+    records = decode_records(fit_file(body))
+
+    np.testing.assert_array_equal(records['timestamp'] - FIT_EPOCH_OFFSET, [700, 701])
+    np.testing.assert_array_equal(records['heart_rate'], [np.nan, 99])
+
+
+def test_enhanced_speed_replaces_speed():
+    fields = [(253, 4, 0x86), (6, 2, 0x84), (73, 4, 0x86)]
+    body = definition(0, 20, fields)
+    body += struct.pack('<BIHI', 0x00, 10, 3000, 3500)
+    body += struct.pack('<BIHI', 0x00, 11, 3100, 0xFFFFFFFF)
+
+    records = decode_records(fit_file(body))
+
+    np.testing.assert_allclose(records['speed'], [3.5, 3.1])
+    assert 'enhanced_speed' not in records
+
+
+def test_file_without_records_decodes_to_nothing():
+    body = definition(2, 21, EVENT_FIELDS) + struct.pack('<BIBB', 0x02, 100, 0, 4)
+    assert decode_records(fit_file(body)) == {}
+
+
+def test_invalid_files_raise_fit_error():
+    data = fit_file(records_body(500, [120]))
+
+    with pytest.raises(FitError):
+        decode_records(b'not a fit file at all')
+    with pytest.raises(FitError):
+        decode_records(data[:-6])
+    with pytest.raises(FitError):
+        decode_records(fit_file(struct.pack('<BIB', 0x00, 500, 120)))
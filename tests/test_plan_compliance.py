@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import plan_compliance
+
+
+def planned(*sessions):
+    """(week, day, date, planned_km) -> planned_sessions-like frame"""
+    return pd.DataFrame([{
+        'athlete': '', 'plan': 'test', 'week': week, 'day': day, 'date': pd.Timestamp(session_date),
+        'sport': plan_compliance.PLAN_SPORT, 'workout_type': 'easy', 'planned_km': km, 'planned_pace': np.nan,
+    } for week, day, session_date, km in sessions])
+
+
+def activities(*runs):
+    """(date, distance_km) -> running activities"""
+    return pd.DataFrame([{'date': f'{run_date} 07:00:00', 'activity_type': 'running',
+                          'distance_km': km, 'duration_min': km * 5} for run_date, km in runs])
+
+
+def match(sessions, runs):
+    return plan_compliance.match_sessions(sessions, plan_compliance.actual_days(runs),
+                                          as_of='2026-03-31', tolerance_days=1, min_ratio=0.9)
+
+
+def test_session_without_planned_distance_needs_a_matched_day():
+    sessions = planned((1, 'WT', '2026-03-03', np.nan), (1, 'CZW', '2026-03-05', np.nan))
+    result = match(sessions, activities(('2026-03-03', 3.0)))
+
+    assert list(result['status']) == ['completed', 'missed']
+    assert result['distance_ratio'].isna().all()
+
+
+def test_completed_partial_missed_and_upcoming():
+    sessions = planned(
+        (1, 'WT', '2026-03-03', 10.0),   # run a day late, full distance
+        (1, 'CZW', '2026-03-05', 10.0),  # run on the day, too short
+        (1, 'SOB', '2026-03-07', 8.0),   # nothing within a day
+        (2, 'WT', '2026-04-07', 10.0),   # after as_of
+    )
+    result = match(sessions, activities(('2026-03-04', 10.2), ('2026-03-05', 6.0)))
+
+    assert list(result['status']) == ['completed', 'partial', 'missed', 'upcoming']
+    assert list(result['day_offset'].iloc[:2]) == [1, 0]
+    assert result['distance_ratio'].iloc[1] == pytest.approx(0.6)
+
+
+def test_unplanned_runs_are_not_matched():
+    sessions = planned((1, 'WT', '2026-03-03', 10.0))
+    # Two days away and a non-running activity on the planned day
+    runs = pd.concat([activities(('2026-03-05', 10.0)),
+                      pd.DataFrame([{'date': '2026-03-03 07:00:00', 'activity_type': 'cycling',
+                                     'distance_km': 30.0, 'duration_min': 60.0}])])
+
+    result = match(sessions, runs)
+
+    assert list(result['status']) == ['missed']
+    assert pd.isna(result['actual_km'].iloc[0])
+
+
+def test_a_day_goes_to_the_closest_session_the_other_takes_a_free_day():
+    sessions = planned((1, 'PON', '2026-03-02', 10.0), (1, 'WT', '2026-03-03', 10.0))
+    # 03-03 is nearest for both: WT keeps it, PON gets the free 02-28 in the second pass
+    result = plan_compliance.match_sessions(
+        sessions, plan_compliance.actual_days(activities(('2026-02-28', 10.0), ('2026-03-03', 10.0))),
+        as_of='2026-03-31', tolerance_days=2)
+    assert list(result['actual_date'].dt.strftime('%Y-%m-%d')) == ['2026-02-28', '2026-03-03']
+
+    sessions = planned((1, 'WT', '2026-03-03', 10.0), (1, 'SR', '2026-03-04', 10.0))
+    # Only 03-04 is within reach of both: SR keeps it, WT is missed
+    result = match(sessions, activities(('2026-03-04', 10.0), ('2026-03-06', 10.0)))
+    assert list(result['status']) == ['missed', 'completed']
+
+
+def test_weekly_compliance_counts_due_sessions_only():
+    sessions = planned((1, 'WT', '2026-03-03', 10.0), (1, 'CZW', '2026-03-05', 10.0),
+                       (1, 'SOB', '2026-04-04', 10.0))
+    result = match(sessions, activities(('2026-03-03', 10.0)))
+
+    week = plan_compliance.weekly_compliance(result).iloc[0]
+
+    assert (week['completed'], week['missed'], week['upcoming']) == (1, 1, 1)
+    assert week['compliance'] == pytest.approx(0.5)
+    assert week['planned_km'] == 20.0
+    assert week['volume_ratio'] == pytest.approx(0.5)
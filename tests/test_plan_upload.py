@@ -0,0 +1,87 @@
+import contextlib
+import io
+from datetime import datetime
+
+import pytest
+
+import config
+import upload_workouts_to_garmin
+import workout_manifest
+from fakes import FakeGarmin
+
+PLAN = """### Tydzień 1 (20 km)
+- **WT:** Podbiegi 8x30s (tempo 5K, 90s zejście), 2 km R + 2 km WB = **6 km**
+- **CZW:** BC2 8 km w Z2 (4:40-5:00/km) = **8 km**
+- **NIEDZ:** Długi bieg 17 km w Z2 (4:50-5:10/km) = **17 km**
+"""
+
+
+@pytest.fixture
+def manifest_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'manifests'
+    monkeypatch.setattr(workout_manifest, 'MANIFEST_DIR', directory)
+    monkeypatch.setattr(config, 'GARMIN_REQUESTS_PER_SECOND', 1000.0)
+    return directory
+
+
+def sync(garmin, plan_file):
+    uploader = upload_workouts_to_garmin.GarminWorkoutUploader(None, None)
+    uploader.client = garmin
+    with contextlib.redirect_stdout(io.StringIO()):
+        workouts = uploader.parse_training_plan(plan_file)
+        return uploader.sync_plan(workouts, plan_file, start_date=datetime(2026, 1, 5))
+
+
+def manifest_ids(plan_file):
+    entries = workout_manifest.load_manifest(workout_manifest.manifest_path(plan_file))
+    return {entry['workout_id'] for entry in entries.values()}
+
+
+def test_second_plan_does_not_take_over_workouts_of_the_first(tmp_path, manifest_dir):
+    # Same week/day names (and even the same content) in two athletes' plans
+    first = tmp_path / 'anna_10km.md'
+    second = tmp_path / 'jan_10km.md'
+    first.write_text(PLAN, encoding='utf-8')
+    second.write_text(PLAN.replace('8 km w Z2', '10 km w Z2'), encoding='utf-8')
+    garmin = FakeGarmin()
+
+    sync(garmin, first)
+    first_ids = manifest_ids(first)
+
+    results = sync(garmin, second)
+
+    assert {r['action'] for r in results} == {'create'}
+    assert manifest_ids(second).isdisjoint(first_ids)
+    assert first_ids <= set(garmin.workouts)
+    assert len(garmin.workouts) == 6
+
+    # Re-uploading the first plan finds everything unchanged
+    assert {r['action'] for r in sync(garmin, first)} == {'unchanged'}
+
+
+def test_untracked_workout_with_same_name_and_description_is_adopted(tmp_path, manifest_dir):
+    plan_file = tmp_path / 'plan.md'
+    plan_file.write_text(PLAN, encoding='utf-8')
+    garmin = FakeGarmin()
+
+    # Uploaded before manifests existed: same name and description, no manifest entry
+    sync(garmin, plan_file)
+    legacy_ids = set(garmin.workouts)
+    workout_manifest.manifest_path(plan_file).unlink()
+
+    results = sync(garmin, plan_file)
+
+    assert {r['action'] for r in results} == {'update'}
+    assert set(garmin.workouts) == legacy_ids
+
+
+def test_untracked_workout_with_other_description_is_not_adopted(tmp_path, manifest_dir):
+    plan_file = tmp_path / 'plan.md'
+    plan_file.write_text(PLAN, encoding='utf-8')
+    garmin = FakeGarmin()
+    garmin.upload_workout({'workoutName': 'Tydzień 1: WT', 'description': 'Trening innego zawodnika'})
+
+    results = sync(garmin, plan_file)
+
+    assert {r['action'] for r in results} == {'create'}
+    assert len(garmin.workouts) == 4
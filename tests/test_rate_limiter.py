@@ -0,0 +1,50 @@
+import requests
+
+from rate_limiter import is_rate_limited, is_transient
+
+
+def http_error(status_code: int, message: str) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(message, response=response)
+
+
+class GarthHTTPError(Exception):
+    """Same shape as garth.exc.GarthHTTPError: the HTTPError is in .error"""
+
+    def __init__(self, msg: str, error: requests.HTTPError):
+        super().__init__(msg)
+        self.error = error
+
+
+class GarminConnectTooManyRequestsError(Exception):
+    pass
+
+
+def test_404_mentioning_429_is_not_rate_limited():
+    error = http_error(404, "404 Client Error: Not Found for url: https://connect.garmin.com/activity/14290123")
+    assert not is_rate_limited(error)
+    assert not is_transient(error)
+
+
+def test_message_without_status_is_not_rate_limited():
+    assert not is_rate_limited(ValueError("workout 4291 not found"))
+
+
+def test_429_status_is_rate_limited():
+    assert is_rate_limited(http_error(429, "Too Many Requests"))
+
+
+def test_429_wrapped_by_garth_is_rate_limited():
+    error = GarthHTTPError("Error in request", http_error(429, "Too Many Requests"))
+    assert is_rate_limited(error)
+    assert is_transient(error)
+
+
+def test_garminconnect_too_many_requests_is_rate_limited():
+    assert is_rate_limited(GarminConnectTooManyRequestsError("Too many requests"))
+
+
+def test_server_errors_are_transient():
+    assert is_transient(http_error(503, "Service Unavailable"))
+    assert not is_transient(http_error(400, "Bad Request"))
@@ -0,0 +1,78 @@
+import pytest
+
+import config
+import sync_garmin
+from activity_store import ActivityStore
+from activity_transform import transform_activities
+from fakes import FakeGarmin, generate_activities
+
+
+@pytest.fixture
+def history():
+    return [a for a in generate_activities(40) if a['activityType']['typeKey'] in config.DETAIL_ACTIVITY_TYPES]
+
+
+@pytest.fixture
+def syncer(tmp_path, monkeypatch, history):
+    monkeypatch.setattr(config, 'ACTIVITY_SUMMARY_PATH', str(tmp_path / 'summary.json'))
+    monkeypatch.setattr(config, 'ACTIVITY_DETAILS_DIR', str(tmp_path / 'activity_details'))
+    monkeypatch.setattr(config, 'FIT_ARCHIVE_DIR', str(tmp_path / 'fit_archive'))
+    monkeypatch.setattr(config, 'GARMIN_REQUESTS_PER_SECOND', 0)
+    monkeypatch.setattr(config, 'FETCH_CONCURRENCY', 1)
+
+    syncer = sync_garmin.GarminSync()
+    syncer.garmin_client = FakeGarmin(history)
+    syncer.store = ActivityStore(str(tmp_path / 'activities.db'))
+
+    # Older history is already in the store from earlier runs
+    rows = transform_activities(history)
+    syncer.store.save_activities(rows[:-2])
+    syncer.save_batch(rows[-2:])
+    yield syncer
+    syncer.store.close()
+
+
+def test_details_only_for_activities_synced_this_run(syncer):
+    assert syncer.sync_details() == 2
+    assert syncer.sync_details() == 0
+
+
+def test_details_backfill_is_bounded(syncer, history, monkeypatch):
+    monkeypatch.setattr(config, 'DETAIL_BACKFILL_BATCH', 5)
+
+    assert syncer.sync_details(backfill=True) == 2 + 5
+    assert syncer.sync_details(backfill=True) == 5
+    assert len(syncer.detail_store.activity_ids()) == 12 < len(history)
+
+
+def test_fit_files_only_for_activities_synced_this_run(syncer):
+    assert syncer.sync_fit_files() == 2
+    assert syncer.sync_fit_files() == 0
+
+
+def test_fit_backfill_is_bounded(syncer, monkeypatch):
+    monkeypatch.setattr(config, 'FIT_BACKFILL_BATCH', 3)
+
+    assert syncer.sync_fit_files(backfill=True) == 2 + 3
+    assert len(syncer.fit_archive.index) == 5
+
+
+def test_bad_details_response_does_not_abort_the_stage(syncer, monkeypatch):
+    broken = next(reversed(syncer.synced_activities))
+
+    def empty_details(activity_id, maxchart=2000, maxpoly=4000):
+        samples = [{'metrics': ['n/a']}] if activity_id == broken else []
+        return {'metricDescriptors': [{'key': 'directHeartRate', 'metricsIndex': 0}], 'activityDetailMetrics': samples}
+
+    monkeypatch.setattr(syncer.garmin_client, 'get_activity_details', empty_details)
+
+    assert syncer.sync_details() == 1
+    assert syncer.detail_store.missing(syncer.synced_activities) == [broken]
+
+
+def test_watermark_takes_the_numerically_newest_id_of_a_day(syncer):
+    day = '2099-01-01 07:00:00'
+    syncer._advance_watermark([{'date': day, 'activity_id': '10000000000'},
+                               {'date': day, 'activity_id': '9999999999'}])
+
+    assert syncer.store.get_watermark() == {'date': day, 'activity_id': '10000000000'}
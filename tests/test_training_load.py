@@ -0,0 +1,30 @@
+import pandas as pd
+
+import training_load
+
+ACTIVITIES = pd.DataFrame({
+    'date': ['2026-03-01 07:00:00', '2026-03-02 07:00:00', '2026-03-03 07:00:00'],
+    'training_stress_score': [100.0, 100.0, 100.0],
+    'duration_min': [60.0, 60.0, 60.0],
+    'distance_km': [12.0, 12.0, 12.0],
+})
+
+
+def test_rest_days_after_last_activity_decay_atl_and_ctl():
+    table = training_load.update_load_table(ACTIVITIES, as_of=pd.Timestamp('2026-03-10'))
+
+    assert table.index[-1] == pd.Timestamp('2026-03-10')
+    rest = table.loc['2026-03-04':]
+    assert (rest['load'] == 0).all()
+    assert rest['atl'].is_monotonic_decreasing
+    assert rest['ctl'].is_monotonic_decreasing
+    assert rest['atl'].iloc[-1] < table.loc['2026-03-03', 'atl']
+    assert rest['ctl'].iloc[-1] < table.loc['2026-03-03', 'ctl']
+
+
+def test_cached_table_is_extended_with_rest_days():
+    cached = training_load.update_load_table(ACTIVITIES, as_of=pd.Timestamp('2026-03-05'))
+    table = training_load.update_load_table(ACTIVITIES, cached, as_of=pd.Timestamp('2026-03-10'))
+
+    expected = training_load.update_load_table(ACTIVITIES, as_of=pd.Timestamp('2026-03-10'))
+    pd.testing.assert_frame_equal(table, expected, check_freq=False)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Training Load - CTL/ATL/TSB, acute:chronic ratio and weekly volume
+
+Activities are turned into a daily load series (training_stress_score, or an
+estimate from duration and average HR when Garmin has no TSS) with one row
+per calendar day up to today, so rest days keep decaying the averages.
+Fitness (CTL) and fatigue (ATL) are exponentially weighted averages of that
+series, form (TSB) is yesterday's CTL - ATL, and ACWR is the 7-day / 28-day
+average load. Everything is computed with pandas/NumPy column operations.
+
+The result is cached in Parquet (config.TRAINING_LOAD_CACHE). When days are
+added or changed, only the days from the first changed one onwards are
+recomputed, seeded with the cached state of the day before.
+
+Usage:
+    python training_load.py                 # from the training_data.parquet cache
+    python training_load.py --from-store    # from the local activity store
+"""
+
+import os
+import sys
+import argparse
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Daily inputs (compared with the cache to find the first changed day)
+INPUT_COLUMNS = ['load', 'duration_min', 'distance_km', 'activities']
+METRIC_COLUMNS = ['ctl', 'atl', 'tsb', 'acute_load', 'chronic_load', 'acwr']
+
+
+def _numeric(df: pd.DataFrame, column: str) -> pd.Series:
+    """Numeric column (all NaN when missing)"""
+    if column not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_numeric(df[column], errors='coerce').astype('float64')
+
+
+def activity_load(df: pd.DataFrame) -> pd.Series:
+    """
+    Training load of each activity
+
+    training_stress_score when present; otherwise hrTSS estimated from
+    duration and average HR relative to LOAD_THRESHOLD_HR; otherwise
+    LOAD_DEFAULT_TSS_PER_HOUR x duration.
+    """
+    duration_h = _numeric(df, 'duration_min') / 60
+    tss = _numeric(df, 'training_stress_score')
+    avg_hr = _numeric(df, 'avg_hr')
+
+    hr_tss = duration_h * (avg_hr / config.LOAD_THRESHOLD_HR) ** 2 * 100
+    default_tss = duration_h * config.LOAD_DEFAULT_TSS_PER_HOUR
+
+    return tss.fillna(hr_tss).fillna(default_tss).fillna(0.0)
+
+
+def daily_inputs(df: pd.DataFrame, as_of: pd.Timestamp = None) -> pd.DataFrame:
+    """
+    Daily load, duration, distance and activity count (rest days = 0)
+
+    Args:
+        df: Activities with date, duration_min, avg_hr, training_stress_score, distance_km
+        as_of: Last day of the series (default: today); rest days after the
+               last activity are included so CTL and ATL keep decaying
+
+    Returns:
+        DataFrame indexed by day (DatetimeIndex, no gaps) with INPUT_COLUMNS
+    """
+    if df.empty or 'date' not in df.columns:
+        return pd.DataFrame(columns=INPUT_COLUMNS, index=pd.DatetimeIndex([], name='day'))
+
+    days = pd.to_datetime(df['date'], errors='coerce').dt.normalize()
+    frame = pd.DataFrame({
+        'day': days,
+        'load': activity_load(df).to_numpy(),
+        'duration_min': _numeric(df, 'duration_min').fillna(0.0).to_numpy(),
+        'distance_km': _numeric(df, 'distance_km').fillna(0.0).to_numpy(),
+        'activities': 1,
+    }).dropna(subset=['day'])
+
+    if frame.empty:
+        return pd.DataFrame(columns=INPUT_COLUMNS, index=pd.DatetimeIndex([], name='day'))
+
+    daily = frame.groupby('day').sum()
+    as_of = pd.Timestamp(as_of if as_of is not None else pd.Timestamp.today()).normalize()
+    full_range = pd.date_range(daily.index.min(), max(daily.index.max(), as_of), freq='D', name='day')
+    daily = daily.reindex(full_range, fill_value=0)
+    daily['activities'] = daily['activities'].astype('int64')
+    return daily[INPUT_COLUMNS].astype({'load': 'float64', 'duration_min': 'float64', 'distance_km': 'float64'})
+
+
+def _ewma(values: pd.Series, days: int, seed: float) -> pd.Series:
+    """y[t] = y[t-1] + (x[t] - y[t-1]) / days, starting from seed"""
+    seeded = pd.concat([pd.Series([seed]), values.reset_index(drop=True)], ignore_index=True)
+    result = seeded.ewm(alpha=1.0 / days, adjust=False).mean().iloc[1:]
+    result.index = values.index
+    return result
+
+
+def compute_metrics(daily: pd.DataFrame, history: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Add CTL, ATL, TSB, acute/chronic load and ACWR to daily inputs
+
+    Args:
+        daily: Consecutive days with INPUT_COLUMNS
+        history: Already computed days right before `daily` (inputs and
+                 metrics); its last day seeds the averages and its last
+                 ACWR_CHRONIC_DAYS - 1 loads fill the rolling windows
+
+    Returns:
+        `daily` with METRIC_COLUMNS
+    """
+    if daily.empty:
+        return daily.reindex(columns=INPUT_COLUMNS + METRIC_COLUMNS)
+
+    has_history = history is not None and not history.empty
+    ctl_seed = history['ctl'].iloc[-1] if has_history else 0.0
+    atl_seed = history['atl'].iloc[-1] if has_history else 0.0
+
+    result = daily.copy()
+    result['ctl'] = _ewma(daily['load'], config.CTL_DAYS, ctl_seed)
+    result['atl'] = _ewma(daily['load'], config.ATL_DAYS, atl_seed)
+
+    # Form on a day = fitness - fatigue at the end of the previous day
+    form = (result['ctl'] - result['atl']).shift(1)
+    form.iloc[0] = ctl_seed - atl_seed
+    result['tsb'] = form
+
+    # Rolling averages need the loads of the days before the recomputed range
+    window = config.ACWR_CHRONIC_DAYS - 1
+    previous = history['load'].iloc[-window:] if has_history else pd.Series(dtype='float64')
+    loads = pd.concat([previous, daily['load']])
+    acute = loads.rolling(config.ACWR_ACUTE_DAYS, min_periods=1).sum() / config.ACWR_ACUTE_DAYS
+    chronic = loads.rolling(config.ACWR_CHRONIC_DAYS, min_periods=1).sum() / config.ACWR_CHRONIC_DAYS
+
+    result['acute_load'] = acute.iloc[len(previous):].to_numpy()
+    result['chronic_load'] = chronic.iloc[len(previous):].to_numpy()
+    result['acwr'] = result['acute_load'] / result['chronic_load'].where(result['chronic_load'] > 0)
+    return result
+
+
+def first_changed_day(daily: pd.DataFrame, cached: pd.DataFrame) -> Optional[pd.Timestamp]:
+    """
+    First day whose inputs differ from the cache (None if nothing changed)
+
+    Days missing from the cache (new or earlier than its first day) count as changed.
+    """
+    if cached.empty or daily.empty or daily.index[0] != cached.index[0]:
+        return daily.index[0] if not daily.empty else None
+
+    common = daily.index.intersection(cached.index)
+    old = cached.loc[common, INPUT_COLUMNS].to_numpy(dtype='float64')
+    new = daily.loc[common, INPUT_COLUMNS].to_numpy(dtype='float64')
+    changed = ~np.isclose(old, new, equal_nan=True).all(axis=1)
+
+    if changed.any():
+        return common[np.argmax(changed)]
+    if len(daily) != len(common):
+        return daily.index[len(common)]
+    return None
+
+
+def update_load_table(df: pd.DataFrame, cached: pd.DataFrame = None, as_of: pd.Timestamp = None) -> pd.DataFrame:
+    """
+    Daily load table for the activities, reusing the cached days that did not change
+
+    Args:
+        df: All activities
+        cached: Previously computed table (default: none, compute everything)
+        as_of: Last day of the table (default: today)
+
+    Returns:
+        DataFrame indexed by day with INPUT_COLUMNS + METRIC_COLUMNS
+    """
+    daily = daily_inputs(df, as_of)
+    cached = cached if cached is not None else pd.DataFrame()
+
+    start = first_changed_day(daily, cached)
+    if start is None:
+        return cached.loc[daily.index]
+
+    history = cached.loc[cached.index < start] if not cached.empty and start != daily.index[0] else None
+    tail = compute_metrics(daily.loc[daily.index >= start], history)
+
+    if history is None:
+        return tail
+
+    logger.info(f"Recomputed training load from {start.date()} ({len(tail)} of {len(daily)} days)")
+    return pd.concat([history, tail])
+
+
+def weekly_volume(table: pd.DataFrame) -> pd.DataFrame:
+    """Weekly (Monday-Sunday) load, duration, distance and activity count"""
+    if table.empty:
+        return pd.DataFrame(columns=INPUT_COLUMNS)
+    return table[INPUT_COLUMNS].resample('W-MON', label='left', closed='left').sum().rename_axis('week')
+
+
+def load_cache(path: str = None) -> pd.DataFrame:
+    """Cached load table, empty if missing or unreadable"""
+    path = path or config.TRAINING_LOAD_CACHE
+    if not os.path.exists(path):
+        return pd.DataFrame()
+
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        logger.warning(f"Could not read training load cache {path}: {e}")
+        return pd.DataFrame()
+
+
+def save_cache(table: pd.DataFrame, path: str = None):
+    """Write the load table (temp file + rename)"""
+    path = path or config.TRAINING_LOAD_CACHE
+    tmp_path = f"{path}.tmp"
+    table.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def training_load(df: pd.DataFrame, cache_path: str = None, as_of: pd.Timestamp = None) -> pd.DataFrame:
+    """Load table for the activities up to as_of (default: today), read from and written back to the Parquet cache"""
+    table = update_load_table(df, load_cache(cache_path), as_of)
+    save_cache(table, cache_path)
+    return table
+
+
+def print_load_summary(table: pd.DataFrame, weeks: int = 6):
+    """Print the latest CTL/ATL/TSB/ACWR and the last weeks of volume"""
+    if table.empty:
+        print("No training load data")
+        return
+
+    last = table.iloc[-1]
+    print("\n" + "=" * 70)
+    print("TRAINING LOAD")
+    print("=" * 70)
+    print(f"\n{table.index[-1].strftime('%Y-%m-%d')}:")
+    print(f"   Fitness (CTL):  {last['ctl']:.1f}")
+    print(f"   Fatigue (ATL):  {last['atl']:.1f}")
+    print(f"   Form (TSB):     {last['tsb']:.1f}")
+    acwr = f"{last['acwr']:.2f}" if pd.notna(last['acwr']) else 'N/A'
+    print(f"   ACWR ({config.ACWR_ACUTE_DAYS}/{config.ACWR_CHRONIC_DAYS} days): {acwr}")
+
+    print(f"\nLast {weeks} weeks:")
+    for week, row in weekly_volume(table).tail(weeks).iterrows():
+        print(f"   {week.strftime('%Y-%m-%d')} | {row['distance_km']:.1f} km | "
+              f"{row['duration_min'] / 60:.1f} h | load {row['load']:.0f} | {int(row['activities'])} activities")
+
+    print("\n" + "=" * 70)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Training load (CTL/ATL/TSB, ACWR) from local training data')
+    parser.add_argument('--from-store', action='store_true',
+                        help='Read activities from the local activity store instead of the Parquet cache')
+    parser.add_argument('--weeks', type=int, default=6,
+                        help='Weeks of volume to print (default: 6)')
+    parser.add_argument('--as-of', default=None,
+                        help='Last day of the table, YYYY-MM-DD (default: today)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=config.LOG_FORMAT, datefmt=config.LOG_DATE_FORMAT)
+
+    if args.from_store:
+        from activity_store import ActivityStore
+        if not os.path.exists(config.ACTIVITY_DB_PATH):
+            logger.error(f"Local activity store not found: {config.ACTIVITY_DB_PATH}")
+            sys.exit(1)
+        with ActivityStore() as store:
+            df = store.to_dataframe()
+    elif os.path.exists(config.TRAINING_DATA_CACHE):
+        df = pd.read_parquet(config.TRAINING_DATA_CACHE)
+    else:
+        logger.error(f"Cache file not found: {config.TRAINING_DATA_CACHE} (run fetch_training_data.py first)")
+        sys.exit(1)
+
+    print_load_summary(training_load(df, as_of=args.as_of), args.weeks)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,12 +5,14 @@ Parsuje plik markdown z planem treningowym i tworzy workouts na zegarku Garmin
 """
 
 import os
-import re
-import json
-import random
+import sys
+import time
+import contextlib
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
-from garminconnect import Garmin
 from garth.exc import GarthHTTPError
 import requests
 from dotenv import load_dotenv
@@ -19,7 +21,33 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import config
+import config
 from config import GARMIN_EMAIL, GARMIN_PASSWORD, TIMEZONE
+import garmin_session
+import workout_grammar
+import plan_cache
+from workout_model import Workout
+from rate_limiter import RateLimiter, AdaptiveBackoff, is_rate_limited, is_transient, http_status
+from workout_manifest import (content_hash, plan_id, manifest_path, load_manifest, save_manifest, iter_workouts,
+                              tracked_workout_ids)
+
+_print_lock = threading.Lock()
+
+
+def _print(message):
+    """print() bezpieczny dla wątków uploadu (linie się nie przeplatają)"""
+    with _print_lock:
+        print(message)
+
+
+# Wersja parsera i generatora JSON - zmień przy każdej zmianie, która wpływa
+# na sparsowane treningi lub wygenerowany JSON (unieważnia plan/.cache/)
+GENERATOR_VERSION = 2
+
+# Mapowanie dni na offset od poniedziałku
+DAY_OFFSET = {
+    'PON': 0, 'WT': 1, 'ŚR': 2, 'CZW': 3, 'PT': 4, 'SOB': 5, 'NIEDZ': 6
+}
 
 
 class GarminWorkoutUploader:
@@ -29,12 +57,16 @@ class GarminWorkoutUploader:
         self.email = email
         self.password = password
         self.client = None
+        # Wspólne dla wszystkich wątków uploadu
+        self.rate_limiter = RateLimiter(config.GARMIN_REQUESTS_PER_SECOND, config.GARMIN_RATE_BURST)
+        self.backoff = AdaptiveBackoff(config.RETRY_DELAY, config.BACKOFF_MAX_DELAY)
+        self.retry_count = 0
+        self._retry_lock = threading.Lock()
 
     def connect(self):
         """Połączenie z Garmin Connect"""
         try:
-            self.client = Garmin(self.email, self.password)
-            self.client.login()
+            self.client = garmin_session.login(self.email, self.password)
             print("[OK] Połączono z Garmin Connect")
             return True
         except Exception as e:
@@ -46,53 +78,87 @@ class GarminWorkoutUploader:
         Parsuje plik markdown z planem treningowym
         Zwraca listę treningów w formacie:
         [{'week': 1, 'day': 'WT', 'workout_type': 'intervals', 'description': '...', 'details': {...}}, ...]
-        """
-        with open(plan_file, 'r', encoding='utf-8') as f:
-            content = f.read()
 
+        Fragmenty opisu, których gramatyka nie rozpoznała, są wypisywane jako [WARN].
+        plan_file '-' oznacza standardowe wejście.
+        """
         workouts = []
-        current_week = None
+        weeks = 0
 
-        # Regex patterns
-        week_pattern = r'### Tydzień (\d+)'
-        day_pattern = r'^-?\s*\*\*([A-ZŁŚĆĄĘŻŹŃÓ]+):\*\* (.+)'  # Obsługuje "- **PON:**" oraz "**PON:**"
+        with open_plan(plan_file) as stream:
+            for week, week_workouts in self.iter_training_plan(stream):
+                workouts.extend(week_workouts)
+                weeks = week
 
-        lines = content.split('\n')
+        print(f"[OK] Sparsowano {len(workouts)} treningów biegowych z {weeks} tygodni")
+        return workouts
 
-        for line in lines:
-            # Wykryj tydzień
-            week_match = re.match(week_pattern, line)
-            if week_match:
-                current_week = int(week_match.group(1))
+    def iter_training_plan(self, stream):
+        """
+        Parsuje plan z dowolnego strumienia tekstu linia po linii
+
+        Plik nie jest wczytywany w całości - treningi tygodnia są zwracane, gdy
+        zaczyna się następny tydzień (albo kończy strumień), więc pamięć nie
+        rośnie z długością planu. Sklejone plany (np. `cat a.md b.md`) są
+        numerowane dalej: gdy numer tygodnia nie rośnie, zaczyna się kolejny
+        plan i jego tydzień 1 staje się tygodniem po ostatnim z poprzedniego.
+
+        Args:
+            stream: Iterowalny strumień linii (plik, sys.stdin, lista linii)
+
+        Yields:
+            (week, workouts) dla każdego tygodnia z treningami biegowymi
+        """
+        week_workouts = []
+        current_week = None
+        last_number = 0
+        offset = 0
+
+        # Jedno przejście po pliku: nagłówki tygodni i linie dni (obsługuje "- **PON:**" oraz "**PON:**")
+        for item in workout_grammar.iter_plan_lines(stream):
+            if item[0] == 'week':
+                if week_workouts:
+                    yield current_week, week_workouts
+                    week_workouts = []
+                if item[1] <= last_number:
+                    offset = current_week
+                last_number = item[1]
+                current_week = offset + item[1]
                 continue
 
-            # Wykryj dzień treningu
-            day_match = re.match(day_pattern, line)
-            if day_match and current_week:
-                day = day_match.group(1)
-                description = day_match.group(2).strip()
-
-                # Pomiń dni odpoczynku i dni ze siłowym
-                if 'Odpoczynek' in description or 'ODPOCZYNEK' in description:
-                    continue
-                if 'Zwift' in description:
-                    continue  # Zwift treningi pomijamy - nie są biegowe
-                if 'Siła' in description and 'km' not in description:
-                    continue  # Tylko siłowy bez biegu
-
-                # Parsuj szczegóły treningu
-                workout_details = self.parse_workout_details(description)
-
-                if workout_details:
-                    workouts.append({
-                        'week': current_week,
-                        'day': day,
-                        'description': description,
-                        'details': workout_details
-                    })
-
-        print(f"[OK] Sparsowano {len(workouts)} treningów biegowych z {current_week} tygodni")
-        return workouts
+            _, day, description = item
+            if not current_week:
+                continue
+            description = description.strip()
+
+            # Pomiń dni odpoczynku i dni ze siłowym
+            if 'Odpoczynek' in description or 'ODPOCZYNEK' in description:
+                continue
+            if 'Zwift' in description:
+                continue  # Zwift treningi pomijamy - nie są biegowe
+            if 'Siła' in description and 'km' not in description:
+                continue  # Tylko siłowy bez biegu
+
+            # Parsuj szczegóły treningu
+            ast = workout_grammar.parse_description(description)
+            workout_details = ast.to_details()
+
+            fragments = ', '.join(f"'{fragment}'" for fragment in ast.unparsed)
+            if not workout_details:
+                print(f"[WARN] Tydzień {current_week} {day}: nie rozpoznano treningu, pomijam: {description}")
+            elif fragments:
+                print(f"[WARN] Tydzień {current_week} {day}: nierozpoznane fragmenty: {fragments}")
+
+            if workout_details:
+                week_workouts.append({
+                    'week': current_week,
+                    'day': day,
+                    'description': description,
+                    'details': workout_details
+                })
+
+        if week_workouts:
+            yield current_week, week_workouts
 
     def parse_workout_details(self, description):
         """
@@ -100,425 +166,51 @@ class GarminWorkoutUploader:
         - typ treningu (podbiegi, interwały, tempo run, długi bieg)
         - interwały (ile, jaki dystans/czas, tempo, przerwa)
         - rozgrzewka/wybieganie
-        """
-        details = {
-            'type': None,
-            'warmup_km': 2,  # default
-            'cooldown_km': 2,  # default
-            'intervals': [],
-            'total_km': 0
-        }
-
-        # Wyciągnij całkowity dystans
-        total_km_match = re.search(r'= \*\*(\d+(?:\.\d+)?)\s*km\*\*', description)
-        if total_km_match:
-            details['total_km'] = float(total_km_match.group(1))
-
-        # Rozgrzewka
-        warmup_match = re.search(r'(\d+)\s*km\s+R', description)
-        if warmup_match:
-            details['warmup_km'] = int(warmup_match.group(1))
-
-        # Wybieganie
-        cooldown_match = re.search(r'(\d+)\s*km\s+WB', description)
-        if cooldown_match:
-            details['cooldown_km'] = int(cooldown_match.group(1))
-
-        # PODBIEGI: 8x30s, 10x40s, etc.
-        if 'Podbiegi' in description or 'podbiegi' in description:
-            details['type'] = 'hill_repeats'
-            hill_match = re.search(r'(\d+)x(\d+)s', description)
-            if hill_match:
-                reps = int(hill_match.group(1))
-                duration = int(hill_match.group(2))
-
-                # Wyciągnij recovery time (np. "90s zejście")
-                recovery_match = re.search(r'(\d+)s\s+zej[sśS]cie', description)
-                recovery_duration = int(recovery_match.group(1)) if recovery_match else 90
-
-                details['intervals'] = [{
-                    'repeat': reps,
-                    'work_duration': duration,
-                    'work_pace': '3:35',  # tempo 5K
-                    'recovery_type': 'down_jog',
-                    'recovery_duration': recovery_duration
-                }]
-
-        # DŁUGIE INTERWAŁY: 4x2 km, 6x1.5 km, 8x1 km, 7x1 km @ race pace
-        # WAŻNE: Sprawdzamy NAJPIERW km, zanim sprawdzimy "tempo" w opisie
-        elif re.search(r'\d+x[\d.]+\s*km', description):
-            details['type'] = 'long_intervals'
-
-            long_int_match = re.search(r'(\d+)x([\d.]+)\s*km\s*@\s*([\d:]+(?:-[\d:]+)?)', description)
-            if long_int_match:
-                reps = int(long_int_match.group(1))
-                distance_km = float(long_int_match.group(2))
-                pace = long_int_match.group(3).split('-')[0]
-
-                recovery_match = re.search(r'(\d+)m?\s*(?:trucht|recovery)', description)
-                recovery = int(recovery_match.group(1)) if recovery_match else 400
-
-                details['intervals'] = [{
-                    'repeat': reps,
-                    'work_distance': int(distance_km * 1000),
-                    'work_pace': pace,
-                    'recovery_type': 'jog',
-                    'recovery_distance': recovery
-                }]
-
-            # LADDER: 4-3-2 km, 2-3-4 km
-            elif 'Ladder' in description or 'ladder' in description:
-                ladder_match = re.search(r'(\d+)-(\d+)-(\d+)\s*km\s*@\s*([\d:]+)', description)
-                if ladder_match:
-                    d1, d2, d3 = int(ladder_match.group(1)), int(ladder_match.group(2)), int(ladder_match.group(3))
-                    pace = ladder_match.group(4)
-
-                    details['intervals'] = [
-                        {'repeat': 1, 'work_distance': d1*1000, 'work_pace': pace, 'recovery_type': 'jog', 'recovery_distance': 400},
-                        {'repeat': 1, 'work_distance': d2*1000, 'work_pace': pace, 'recovery_type': 'jog', 'recovery_distance': 400},
-                        {'repeat': 1, 'work_distance': d3*1000, 'work_pace': pace, 'recovery_type': 'jog', 'recovery_distance': 400},
-                    ]
-
-        # INTERWAŁY: 8x400m, 6x600m, 5x800m, 4x1km, etc.
-        elif 'Interwały' in description or 'interwały' in description:
-            details['type'] = 'intervals'
-
-            # Pattern: 8x400m @ 3:35-3:40/km
-            interval_match = re.search(r'(\d+)x(\d+)m?\s*@?\s*([\d:]+(?:-[\d:]+)?)', description)
-            if interval_match:
-                reps = int(interval_match.group(1))
-                distance = int(interval_match.group(2))
-                pace = interval_match.group(3).split('-')[0]  # bierzemy szybsze tempo
-
-                # Recovery
-                recovery_match = re.search(r'(\d+)m?\s*trucht', description)
-                recovery = int(recovery_match.group(1)) if recovery_match else 400
-
-                details['intervals'] = [{
-                    'repeat': reps,
-                    'work_distance': distance,
-                    'work_pace': pace,
-                    'recovery_type': 'jog',
-                    'recovery_distance': recovery
-                }]
-
-        # TEMPO RUN: 2x10 min, 3x8 min, 4x6 min @ tempo
-        elif 'Tempo Run' in description or 'tempo' in description.lower():
-            details['type'] = 'tempo'
-
-            tempo_match = re.search(r'(\d+)x(\d+)\s*min\s*@\s*([\d:]+(?:-[\d:]+)?)', description)
-            if tempo_match:
-                reps = int(tempo_match.group(1))
-                minutes = int(tempo_match.group(2))
-                pace = tempo_match.group(3).split('-')[0]
-
-                recovery_match = re.search(r'(\d+)\s*min\s+recovery', description)
-                recovery_min = int(recovery_match.group(1)) if recovery_match else 2
-
-                details['intervals'] = [{
-                    'repeat': reps,
-                    'work_duration': minutes * 60,
-                    'work_pace': pace,
-                    'recovery_type': 'jog',
-                    'recovery_duration': recovery_min * 60
-                }]
-
-        # DŁUGI BIEG: BC2 z wariacjami
-        elif 'Długi bieg' in description or 'BC2' in description:
-            details['type'] = 'long_run'
-
-            # Progresywny
-            if 'progresywny' in description.lower():
-                details['variation'] = 'progressive'
-            # Z tempo finish
-            elif 'ostatnie' in description and 'km' in description:
-                tempo_km_match = re.search(r'ostatnie\s+(\d+)\s+km\s+@\s+([\d:]+)', description)
-                if tempo_km_match:
-                    details['variation'] = 'tempo_finish'
-                    details['tempo_km'] = int(tempo_km_match.group(1))
-                    details['tempo_pace'] = tempo_km_match.group(2)
-            # Z środkową częścią tempo
-            elif 'środkowe' in description.lower():
-                tempo_km_match = re.search(r'środkowe\s+(\d+)\s+km\s+@\s+([\d:]+)', description)
-                if tempo_km_match:
-                    details['variation'] = 'tempo_middle'
-                    details['tempo_km'] = int(tempo_km_match.group(1))
-                    details['tempo_pace'] = tempo_km_match.group(2)
-            else:
-                details['variation'] = 'easy'
 
-        return details if details['type'] else None
-
-    def pace_to_mps(self, pace_str):
-        """
-        Konwertuje tempo min/km (np. '3:48') na metry/sekundę
-        Garmin używa m/s jako internal unit
+        Gramatyka jest w workout_grammar; tu zwracany jest słownik `details`
+        (None gdy opis nie jest treningiem biegowym).
         """
-        parts = pace_str.split(':')
-        minutes = int(parts[0])
-        seconds = int(parts[1])
+        return workout_grammar.parse_description(description).to_details()
 
-        total_seconds_per_km = minutes * 60 + seconds
-        # m/s = 1000m / seconds_per_km
-        mps = 1000.0 / total_seconds_per_km
-        return round(mps, 2)
-
-    def create_distance_condition(self, distance_meters):
-        """
-        Tworzy prawidłową strukturę endCondition dla dystansu
-        zgodną z formatem Garmin Connect
+    def generate_garmin_workout_json(self, workout, plan=''):
         """
-        return {
-            "endCondition": {
-                "conditionTypeId": 3,
-                "conditionTypeKey": "distance"
-            },
-            "endConditionValue": float(distance_meters),
-            "preferredEndConditionUnit": {
-                "unitId": 2,
-                "unitKey": "kilometer",
-                "factor": 100000.0
-            }
-        }
+        Generuje workout JSON w formacie Garmin Connect (przez workout_model)
 
-    def create_time_condition(self, duration_seconds):
-        """
-        Tworzy prawidłową strukturę endCondition dla czasu
-        zgodną z formatem Garmin Connect
-        Garmin używa sekund bezpośrednio, bez preferredEndConditionUnit
+        workoutId i stepId są wyliczane z planu, tygodnia i dnia, więc ten sam
+        plan daje zawsze identyczny JSON.
         """
-        return {
-            "endCondition": {
-                "conditionTypeId": 2,
-                "conditionTypeKey": "time"
-            },
-            "endConditionValue": float(duration_seconds),
-            "preferredEndConditionUnit": None
-        }
+        return Workout.from_plan(workout).to_garmin_json(plan=plan)
 
-    def generate_garmin_workout_json(self, workout):
-        """
-        Generuje workout JSON w formacie Garmin Connect
+    def _call_api(self, func, *args, **kwargs):
         """
-        workout_id = random.randint(1000000, 9999999)
-
-        # Base template
-        workout_json = {
-            "workoutId": workout_id,
-            "ownerId": None,  # zostanie wypełnione przy upload
-            "workoutName": f"Tydzień {workout['week']}: {workout['day']}",
-            "description": workout['description'][:250],  # max 250 chars
-            "sportType": {
-                "sportTypeId": 1,
-                "sportTypeKey": "running"
-            },
-            "workoutSegments": []
-        }
+        Wywołuje API Garmin z limitem zapytań i ponowieniami
 
-        details = workout['details']
-        steps = []
-        step_id = random.randint(7000000000, 7999999999)
-
-        # WARMUP
-        if details['warmup_km'] > 0:
-            warmup_step = {
-                "type": "ExecutableStepDTO",
-                "stepId": step_id,
-                "stepOrder": len(steps) + 1,
-                "stepType": {
-                    "stepTypeId": 1,
-                    "stepTypeKey": "warmup"
-                },
-                "targetType": {
-                    "workoutTargetTypeId": 1,
-                    "workoutTargetTypeKey": "no.target"
-                },
-                "targetValueOne": None,
-                "targetValueTwo": None
-            }
-            warmup_step.update(self.create_distance_condition(details['warmup_km'] * 1000))
-            steps.append(warmup_step)
-            step_id += 1
-
-        # MAIN WORKOUT
-        if details['type'] in ['intervals', 'long_intervals', 'hill_repeats', 'tempo']:
-            for interval_set in details['intervals']:
-                repeat_steps = []
-
-                # Work interval
-                work_step = {
-                    "type": "ExecutableStepDTO",
-                    "stepId": step_id,
-                    "stepOrder": 1,
-                    "stepType": {
-                        "stepTypeId": 3,
-                        "stepTypeKey": "interval"
-                    }
-                }
-                step_id += 1
-
-                # End condition: distance or time
-                if 'work_distance' in interval_set:
-                    work_step.update(self.create_distance_condition(interval_set['work_distance']))
-                else:  # duration
-                    work_step.update(self.create_time_condition(interval_set['work_duration']))
-
-                # Target: pace
-                if 'work_pace' in interval_set:
-                    pace_mps = self.pace_to_mps(interval_set['work_pace'])
-                    work_step["targetType"] = {
-                        "workoutTargetTypeId": 6,
-                        "workoutTargetTypeKey": "pace.zone"
-                    }
-                    work_step["targetValueOne"] = pace_mps - 0.15  # -10 sec/km tolerance
-                    work_step["targetValueTwo"] = pace_mps + 0.15  # +10 sec/km tolerance
-                else:
-                    work_step["targetType"] = {
-                        "workoutTargetTypeId": 1,
-                        "workoutTargetTypeKey": "no.target"
-                    }
-                    work_step["targetValueOne"] = None
-                    work_step["targetValueTwo"] = None
-
-                repeat_steps.append(work_step)
-
-                # Recovery
-                recovery_step = {
-                    "type": "ExecutableStepDTO",
-                    "stepId": step_id,
-                    "stepOrder": 2,
-                    "stepType": {
-                        "stepTypeId": 4,
-                        "stepTypeKey": "recovery"
-                    }
-                }
-                step_id += 1
-
-                if 'recovery_distance' in interval_set:
-                    recovery_step.update(self.create_distance_condition(interval_set['recovery_distance']))
+        Błędy przejściowe (429, 5xx, zerwane połączenie) są ponawiane do
+        MAX_RETRIES razy; przy 429 wszystkie wątki czekają na wspólny backoff.
+        Pozostałe błędy są zgłaszane od razu.
+        """
+        for attempt in range(config.MAX_RETRIES):
+            self.backoff.wait()
+            self.rate_limiter.acquire()
+
+            try:
+                result = func(*args, **kwargs)
+                self.backoff.on_success()
+                return result
+            except Exception as e:
+                if attempt == config.MAX_RETRIES - 1 or not is_transient(e):
+                    raise
+
+                with self._retry_lock:
+                    self.retry_count += 1
+
+                if is_rate_limited(e):
+                    # wait() na początku pętli odczeka wspólną przerwę
+                    delay = self.backoff.on_throttle()
+                    _print(f"  [WARN] Limit zapytań Garmin (429), przerwa {delay:.0f}s")
                 else:
-                    recovery_step.update(self.create_time_condition(interval_set['recovery_duration']))
-
-                recovery_step["targetType"] = {
-                    "workoutTargetTypeId": 1,
-                    "workoutTargetTypeKey": "no.target"
-                }
-                recovery_step["targetValueOne"] = None
-                recovery_step["targetValueTwo"] = None
-
-                repeat_steps.append(recovery_step)
-
-                # Wrap in repeat step
-                repeat_step = {
-                    "type": "RepeatGroupDTO",
-                    "stepId": step_id,
-                    "stepOrder": len(steps) + 1,
-                    "numberOfIterations": interval_set['repeat'],
-                    "workoutSteps": repeat_steps
-                }
-                step_id += 1
-
-                steps.append(repeat_step)
-
-        elif details['type'] == 'long_run':
-            # Długi bieg - pojedynczy step z targetem czasu/dystansu
-            main_distance = details['total_km'] - details['warmup_km'] - details['cooldown_km']
-
-            if details.get('variation') == 'tempo_finish':
-                # Easy part
-                easy_distance = main_distance - details['tempo_km']
-                easy_step = {
-                    "type": "ExecutableStepDTO",
-                    "stepId": step_id,
-                    "stepOrder": len(steps) + 1,
-                    "stepType": {
-                        "stepTypeId": 3,
-                        "stepTypeKey": "interval"
-                    },
-                    "targetType": {
-                        "workoutTargetTypeId": 1,
-                        "workoutTargetTypeKey": "no.target"
-                    },
-                    "targetValueOne": None,
-                    "targetValueTwo": None
-                }
-                easy_step.update(self.create_distance_condition(int(easy_distance * 1000)))
-                steps.append(easy_step)
-                step_id += 1
-
-                # Tempo finish
-                pace_mps = self.pace_to_mps(details['tempo_pace'])
-                tempo_step = {
-                    "type": "ExecutableStepDTO",
-                    "stepId": step_id,
-                    "stepOrder": len(steps) + 1,
-                    "stepType": {
-                        "stepTypeId": 3,
-                        "stepTypeKey": "interval"
-                    },
-                    "targetType": {
-                        "workoutTargetTypeId": 6,
-                        "workoutTargetTypeKey": "pace.zone"
-                    },
-                    "targetValueOne": pace_mps - 0.15,
-                    "targetValueTwo": pace_mps + 0.15
-                }
-                tempo_step.update(self.create_distance_condition(details['tempo_km'] * 1000))
-                steps.append(tempo_step)
-                step_id += 1
-
-            else:
-                # Easy run - no target
-                easy_run_step = {
-                    "type": "ExecutableStepDTO",
-                    "stepId": step_id,
-                    "stepOrder": len(steps) + 1,
-                    "stepType": {
-                        "stepTypeId": 3,
-                        "stepTypeKey": "interval"
-                    },
-                    "targetType": {
-                        "workoutTargetTypeId": 1,
-                        "workoutTargetTypeKey": "no.target"
-                    },
-                    "targetValueOne": None,
-                    "targetValueTwo": None
-                }
-                easy_run_step.update(self.create_distance_condition(int(main_distance * 1000)))
-                steps.append(easy_run_step)
-                step_id += 1
-
-        # COOLDOWN
-        if details['cooldown_km'] > 0:
-            cooldown_step = {
-                "type": "ExecutableStepDTO",
-                "stepId": step_id,
-                "stepOrder": len(steps) + 1,
-                "stepType": {
-                    "stepTypeId": 2,
-                    "stepTypeKey": "cooldown"
-                },
-                "targetType": {
-                    "workoutTargetTypeId": 1,
-                    "workoutTargetTypeKey": "no.target"
-                },
-                "targetValueOne": None,
-                "targetValueTwo": None
-            }
-            cooldown_step.update(self.create_distance_condition(details['cooldown_km'] * 1000))
-            steps.append(cooldown_step)
-
-        # Add segment with all steps
-        workout_json["workoutSegments"] = [{
-            "segmentOrder": 1,
-            "sportType": {
-                "sportTypeId": 1,
-                "sportTypeKey": "running"
-            },
-            "workoutSteps": steps
-        }]
-
-        return workout_json
+                    _print(f"  [WARN] Próba {attempt + 1}/{config.MAX_RETRIES} nieudana: {e}")
+                    time.sleep(config.RETRY_DELAY)
 
     def upload_workout(self, workout_json):
         """
@@ -530,19 +222,21 @@ class GarminWorkoutUploader:
 
         try:
             # Upload using garminconnect API
-            result = self.client.upload_workout(workout_json)
+            result = self._call_api(self.client.upload_workout, workout_json)
             workout_id = result.get('workoutId')
-            print(f"[OK] Workout '{workout_json['workoutName']}' uploaded (ID: {workout_id})")
+            _print(f"[OK] Workout '{workout_json['workoutName']}' uploaded (ID: {workout_id})")
             return workout_id
 
         except Exception as e:
-            print(f"[ERROR] Błąd podczas uploadu: {e}")
+            _print(f"[ERROR] Błąd podczas uploadu '{workout_json['workoutName']}': {e}")
             return False
 
     def schedule_workout(self, workout_id, date):
         """
         Scheduleuje workout na konkretną datę w kalendarzu Garmin
         Używa /proxy/workout-service/schedule/{workout_id}
+
+        Zwraca ID wpisu w kalendarzu (True gdy API go nie zwróciło) lub False przy błędzie
         """
         try:
             # Endpoint: POST /proxy/workout-service/schedule/{workout_id}
@@ -552,20 +246,414 @@ class GarminWorkoutUploader:
             }
 
             # Użyj garth.post
-            result = self.client.garth.post("connect", schedule_url, json=schedule_payload)
+            result = self._call_api(self.client.garth.post, "connect", schedule_url, json=schedule_payload)
 
             if result.status_code in [200, 201, 204]:
-                print(f"    -> Scheduled for {date.strftime('%Y-%m-%d')}")
-                return True
+                _print(f"    -> {workout_id} scheduled for {date.strftime('%Y-%m-%d')}")
+                try:
+                    schedule_id = result.json().get('workoutScheduleId')
+                except ValueError:
+                    schedule_id = None
+                return schedule_id or True
             else:
-                print(f"  [ERROR] Nie udało się zaplanować: {result.status_code}")
-                print(f"  [ERROR] Response: {result.text}")
+                _print(f"  [ERROR] Nie udało się zaplanować {workout_id}: {result.status_code}")
+                _print(f"  [ERROR] Response: {result.text}")
                 return False
 
         except Exception as e:
-            print(f"  [ERROR] Błąd planowania: {e}")
+            _print(f"  [ERROR] Błąd planowania {workout_id}: {e}")
             return False
 
+    def unschedule_workout(self, schedule_id):
+        """Usuwa wpis z kalendarza Garmin (DELETE /workout-service/schedule/{schedule_id})"""
+        try:
+            self._call_api(self.client.garth.delete, "connectapi",
+                           f"/workout-service/schedule/{schedule_id}", api=True)
+            return True
+        except Exception as e:
+            if http_status(e) == 404:
+                return True  # już usunięty
+            _print(f"  [ERROR] Nie udało się usunąć z kalendarza {schedule_id}: {e}")
+            return False
+
+    def update_workout(self, workout_id, workout_json):
+        """
+        Nadpisuje istniejący workout (PUT /workout-service/workout/{workout_id})
+
+        Zwraca True/False, albo None gdy workout nie istnieje już w Garmin
+        (np. usunięty ręcznie) - wtedy trzeba go utworzyć od nowa.
+        """
+        payload = dict(workout_json, workoutId=workout_id)
+        try:
+            self._call_api(self.client.garth.put, "connectapi",
+                           f"/workout-service/workout/{workout_id}", json=payload, api=True)
+            _print(f"[OK] Workout '{workout_json['workoutName']}' updated (ID: {workout_id})")
+            return True
+        except Exception as e:
+            if http_status(e) == 404:
+                _print(f"  [WARN] Workout {workout_id} nie istnieje w Garmin, tworzę ponownie")
+                return None
+            _print(f"[ERROR] Błąd aktualizacji '{workout_json['workoutName']}': {e}")
+            return False
+
+    def delete_workout(self, workout_id, workout_name=None):
+        """Usuwa workout (DELETE /workout-service/workout/{workout_id}); 404 = już usunięty"""
+        try:
+            self._call_api(self.client.garth.delete, "connectapi",
+                           f"/workout-service/workout/{workout_id}", api=True)
+            _print(f"[OK] Usunięto: {workout_name or workout_id}")
+            return True
+        except Exception as e:
+            if http_status(e) == 404:
+                return True
+            _print(f"[ERROR] Nie udało się usunąć {workout_name or workout_id}: {e}")
+            return False
+
+    def _upload_and_schedule(self, workout, start_date):
+        """Upload jednego treningu i (opcjonalnie) od razu jego schedule"""
+        workout_json = self.generate_garmin_workout_json(workout)
+        result = {'name': workout_json['workoutName'], 'workout_id': None, 'scheduled': False, 'error': None}
+
+        workout_id = self.upload_workout(workout_json)
+        if not workout_id:
+            result['error'] = 'upload'
+            return result
+
+        result['workout_id'] = workout_id
+        if start_date:
+            result['scheduled'] = self.schedule_workout(workout_id, workout_date(workout, start_date))
+            if not result['scheduled']:
+                result['error'] = 'schedule'
+
+        return result
+
+    def upload_plan(self, workouts, start_date=None, concurrency=None):
+        """
+        Uploaduje (i scheduluje) wszystkie treningi planu
+
+        Każdy trening to jedno zadanie upload -> schedule, a do `concurrency`
+        zadań działa równolegle. Wszystkie wątki dzielą limit zapytań i backoff,
+        więc równoległość nie zwiększa ryzyka 429.
+
+        Args:
+            workouts: Lista treningów z parse_training_plan
+            start_date: Data startu planu (None = bez schedulowania)
+            concurrency: Liczba wątków (domyślnie config.UPLOAD_CONCURRENCY)
+
+        Returns:
+            Lista wyników (name, workout_id, scheduled, error) w kolejności planu
+        """
+        concurrency = max(1, concurrency or config.UPLOAD_CONCURRENCY)
+        results = [None] * len(workouts)
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='garmin-upload') as executor:
+            futures = {
+                executor.submit(self._upload_and_schedule, workout, start_date): index
+                for index, workout in enumerate(workouts)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+        return results
+
+    def upload_stream(self, stream, start_date=None, concurrency=None):
+        """
+        Uploaduje plan czytany ze strumienia, tydzień po tygodniu
+
+        Każdy sparsowany tydzień trafia od razu do upload_plan, więc w pamięci
+        jest najwyżej jeden tydzień planu. Bez manifestu (strumień nie ma
+        nazwy pliku), czyli jak upload_plan - każde uruchomienie tworzy workouty.
+
+        Returns:
+            Lista wyników (name, workout_id, scheduled, error)
+        """
+        results = []
+        for week, workouts in self.iter_training_plan(stream):
+            week_results = self.upload_plan(workouts, start_date, concurrency)
+            uploaded = sum(1 for r in week_results if r['workout_id'])
+            _print(f"[OK] Tydzień {week}: {uploaded}/{len(workouts)} treningów")
+            results.extend(week_results)
+
+        return results
+
+    def print_upload_report(self, results, elapsed, scheduling):
+        """Podsumowanie uploadu: liczniki, czas, ponowienia i lista błędów"""
+        planned = [r for r in results if r.get('action') != 'delete']
+        uploaded = sum(1 for r in planned if r['workout_id'] and r['error'] not in ('upload', 'update'))
+        scheduled = sum(1 for r in planned if r['scheduled'])
+        failed = [r for r in results if r['error']]
+
+        print("\n" + "=" * 60)
+        print(f"[OK] Zakończono: {uploaded}/{len(planned)} treningów w Garmin")
+        if any('action' in r for r in results):
+            actions = Counter(r['action'] for r in results if not r['error'] or r['error'] == 'schedule')
+            print(f"     utworzono: {actions['create']}, zaktualizowano: {actions['update']}, "
+                  f"bez zmian: {actions['unchanged']}, usunięto: {actions['delete']}")
+        if scheduling:
+            print(f"[OK] Zaplanowano: {scheduled}")
+        print(f"Czas: {elapsed:.1f}s, ponowienia: {self.retry_count}")
+
+        if failed:
+            print(f"\n[ERROR] Nieudane ({len(failed)}):")
+            for r in failed:
+                stage = f"schedule (ID: {r['workout_id']})" if r['error'] == 'schedule' else r['error']
+                print(f"  - {r['name']}: {stage}")
+        print("=" * 60)
+
+    def load_plan(self, plan_file):
+        """
+        Sparsowane treningi i wygenerowany JSON planu, z cache gdy plik się nie zmienił
+
+        Cache (plan/.cache/<plan>.json) jest ważny dla tej samej treści pliku
+        i tego samego GENERATOR_VERSION.
+
+        Returns:
+            (workouts, payloads) - payloads[i] to JSON dla workouts[i]
+        """
+        cached = plan_cache.load_cached_plan(plan_file, GENERATOR_VERSION)
+        if cached:
+            workouts, payloads = cached
+            print(f"[OK] Wczytano {len(workouts)} treningów z cache (plan bez zmian)")
+            return workouts, payloads
+
+        workouts = self.parse_training_plan(plan_file)
+        payloads = [self.generate_garmin_workout_json(workout, plan_id(plan_file)) for workout in workouts]
+        plan_cache.save_cached_plan(plan_file, GENERATOR_VERSION, workouts, payloads)
+        return workouts, payloads
+
+    def plan_changes(self, workouts, manifest, start_date=None, payloads=None):
+        """
+        Porównuje plan z manifestem i wyznacza zmiany (bez wywołań API)
+
+        Trening bez wpisu w manifeście -> create, ze zmienionym hashem ->
+        update, z tym samym hashem -> unchanged. Wpisy manifestu, których nie
+        ma już w planie -> delete.
+
+        Returns:
+            Lista zadań: name, action, workout_id, json, hash, date, entry
+        """
+        tasks = []
+        planned = set()
+
+        for index, workout in enumerate(workouts):
+            workout_json = payloads[index] if payloads else self.generate_garmin_workout_json(workout)
+            name = workout_json['workoutName']
+            planned.add(name)
+
+            entry = manifest.get(name)
+            digest = content_hash(workout_json)
+            if entry is None:
+                action = 'create'
+            elif entry.get('hash') == digest:
+                action = 'unchanged'
+            else:
+                action = 'update'
+
+            tasks.append({
+                'name': name,
+                'action': action,
+                'workout_id': entry['workout_id'] if entry else None,
+                'json': workout_json,
+                'hash': digest,
+                'week': workout['week'],
+                'day': workout['day'],
+                'date': workout_date(workout, start_date).strftime('%Y-%m-%d') if start_date else None,
+                'entry': entry or {},
+            })
+
+        for name, entry in manifest.items():
+            if name not in planned:
+                tasks.append({'name': name, 'action': 'delete', 'workout_id': entry['workout_id'],
+                              'entry': entry})
+
+        return tasks
+
+    def _adopt_untracked(self, tasks):
+        """
+        Przypisuje treningi bez wpisu w manifeście do workoutów o tej samej
+        nazwie, które już są w Garmin (upload sprzed manifestu) - zamiast
+        duplikatu będą nadpisane. Lista workoutów jest pobierana tylko wtedy,
+        gdy są takie treningi.
+
+        Nazwy "Tydzień N: DZIEŃ" są wspólne dla wszystkich planów, więc
+        workouty z manifestu dowolnego planu nigdy nie są przejmowane, a
+        workout z innym opisem niż trening z planu też nie.
+        """
+        to_create = [t for t in tasks if t['action'] == 'create']
+        if not to_create:
+            return
+
+        tracked = tracked_workout_ids()
+        existing = {}
+        for remote in iter_workouts(self.client):
+            if remote['workoutId'] not in tracked:
+                existing.setdefault(remote.get('workoutName'), remote)
+
+        for task in to_create:
+            remote = existing.get(task['name'])
+            if remote is None:
+                continue
+            if remote.get('description') is not None and remote['description'] != task['json'].get('description'):
+                continue
+            task['action'] = 'update'
+            task['workout_id'] = remote['workoutId']
+
+    def _apply_change(self, task):
+        """Wykonuje jedno zadanie z plan_changes (+ schedule gdy zmieniła się data)"""
+        result = {'name': task['name'], 'action': task['action'], 'workout_id': task['workout_id'],
+                  'scheduled': False, 'error': None, 'entry': None}
+        entry = task['entry']
+
+        if task['action'] == 'delete':
+            if entry.get('schedule_id') not in (None, True):
+                self.unschedule_workout(entry['schedule_id'])
+            if not self.delete_workout(task['workout_id'], task['name']):
+                result['error'] = 'delete'
+                result['entry'] = entry
+            return result
+
+        schedule_id = entry.get('schedule_id')
+        scheduled_date = entry.get('scheduled_date')
+
+        if task['action'] == 'update':
+            updated = self.update_workout(task['workout_id'], task['json'])
+            if updated is None:
+                # Usunięty w Garmin razem z wpisem w kalendarzu
+                task['action'] = result['action'] = 'create'
+                schedule_id = scheduled_date = None
+            elif not updated:
+                result['error'] = 'update'
+                result['entry'] = entry or None
+                return result
+
+        if task['action'] == 'create':
+            workout_id = self.upload_workout(task['json'])
+            if not workout_id:
+                result['error'] = 'upload'
+                return result
+            result['workout_id'] = workout_id
+            schedule_id = scheduled_date = None
+
+        if task['date'] and task['date'] != scheduled_date:
+            if schedule_id not in (None, True):
+                self.unschedule_workout(schedule_id)
+            new_schedule = self.schedule_workout(result['workout_id'], datetime.strptime(task['date'], '%Y-%m-%d'))
+            if new_schedule:
+                schedule_id, scheduled_date = new_schedule, task['date']
+                result['scheduled'] = True
+            else:
+                schedule_id = scheduled_date = None
+                result['error'] = 'schedule'
+
+        result['entry'] = {
+            'workout_id': result['workout_id'],
+            'hash': task['hash'],
+            'week': task['week'],
+            'day': task['day'],
+            'scheduled_date': scheduled_date,
+            'schedule_id': schedule_id,
+        }
+        return result
+
+    def sync_plan(self, workouts, plan_file, start_date=None, concurrency=None, payloads=None):
+        """
+        Idempotentny upload planu: tylko treningi, które się zmieniły
+
+        Stan poprzedniego uploadu (ID w Garmin, hash treści, data w
+        kalendarzu) jest w manifeście plan/manifests/<plan>.json. Zmiana
+        jednego dnia w planie to jedno wywołanie API (PUT); treningi usunięte
+        z planu są usuwane z Garmin.
+
+        Args:
+            workouts: Lista treningów z parse_training_plan
+            plan_file: Ścieżka do planu (wyznacza manifest)
+            start_date: Data startu planu (None = bez zmian w kalendarzu)
+            concurrency: Liczba wątków (domyślnie config.UPLOAD_CONCURRENCY)
+            payloads: Gotowy JSON treningów (z load_plan); domyślnie generowany
+
+        Returns:
+            Lista wyników (name, action, workout_id, scheduled, error)
+        """
+        path = manifest_path(plan_file)
+        manifest = load_manifest(path)
+
+        tasks = self.plan_changes(workouts, manifest, start_date, payloads)
+        self._adopt_untracked(tasks)
+
+        pending, results = [], []
+        for task in tasks:
+            if task['action'] != 'unchanged' or (task['date'] and task['date'] != task['entry'].get('scheduled_date')):
+                pending.append(task)
+            else:
+                results.append({'name': task['name'], 'action': 'unchanged', 'workout_id': task['workout_id'],
+                                'scheduled': False, 'error': None})
+
+        if pending:
+            concurrency = max(1, concurrency or config.UPLOAD_CONCURRENCY)
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='garmin-upload') as executor:
+                results.extend(executor.map(self._apply_change, pending))
+
+        # Manifest zapisywany także po częściowym błędzie - udane zmiany nie są powtarzane
+        entries = {name: entry for name, entry in manifest.items()}
+        for result in results:
+            if result['action'] == 'delete' and not result['error']:
+                entries.pop(result['name'], None)
+            elif result.get('entry'):
+                entries[result['name']] = result['entry']
+        save_manifest(path, plan_file, entries)
+
+        for result in results:
+            result.pop('entry', None)
+        return results
+
+
+def workout_filename(workout):
+    """Nazwa pliku JSON treningu, np. week03_WT.json"""
+    return f"week{workout['week']:02d}_{workout['day']}.json"
+
+
+def open_plan(plan_file):
+    """Otwiera plik planu; '-' oznacza standardowe wejście (nie jest zamykane)"""
+    if str(plan_file) == '-':
+        return contextlib.nullcontext(sys.stdin)
+    return open(plan_file, 'r', encoding='utf-8')
+
+
+def workout_date(workout, start_date):
+    """Data treningu: start planu + (tydzień - 1) tygodni + offset dnia"""
+    week_offset = (workout['week'] - 1) * 7
+    day_off = DAY_OFFSET.get(workout['day'], 0)
+    return start_date + timedelta(days=week_offset + day_off)
+
+
+def upload_from_stdin(date_str=None):
+    """
+    Upload planu czytanego ze standardowego wejścia
+
+    Usage:
+        cat plan/*.md | python upload_workouts_to_garmin.py - 2025-01-06
+    """
+    start_date = None
+    if date_str:
+        try:
+            start_date = TIMEZONE.localize(datetime.strptime(date_str, "%Y-%m-%d"))
+        except ValueError:
+            print("[ERROR] Nieprawidłowy format daty (YYYY-MM-DD)")
+            return
+
+    uploader = GarminWorkoutUploader(GARMIN_EMAIL, GARMIN_PASSWORD)
+    if not uploader.connect():
+        return
+
+    print(f"\nUpload planu ze standardowego wejścia ({config.UPLOAD_CONCURRENCY} wątków)...")
+    started = time.perf_counter()
+    results = uploader.upload_stream(sys.stdin, start_date)
+
+    if not results:
+        print("[ERROR] Nie znaleziono treningów do uploadu")
+        return
+    uploader.print_upload_report(results, time.perf_counter() - started, start_date is not None)
+
 
 def main():
     """Main function"""
@@ -573,8 +661,16 @@ def main():
     print("Garmin Workout Uploader - Upload Training Plan")
     print("=" * 60)
 
-    # Path do planu treningowego
-    plan_file = Path(__file__).parent / 'plan' / 'plan_treningowy_10km_38min.md'
+    # Plan ze standardowego wejścia: upload tydzień po tygodniu, bez menu
+    # (stdin zajmuje plan), opcjonalna data startu jako drugi argument
+    if sys.argv[1:2] == ['-']:
+        return upload_from_stdin(sys.argv[2] if len(sys.argv) > 2 else None)
+
+    # Path do planu treningowego (opcjonalnie jako argument, np. plan/anna/maraton.md)
+    if len(sys.argv) > 1:
+        plan_file = Path(sys.argv[1])
+    else:
+        plan_file = Path(__file__).parent / 'plan' / 'plan_treningowy_10km_38min.md'
 
     if not plan_file.exists():
         print(f"[ERROR] Nie znaleziono pliku: {plan_file}")
@@ -589,9 +685,9 @@ def main():
     if not uploader.connect():
         return
 
-    # Parsuj plan treningowy
+    # Parsuj plan treningowy (albo wczytaj z cache, gdy plik się nie zmienił)
     print("\nParsowanie planu treningowego...")
-    workouts = uploader.parse_training_plan(plan_file)
+    workouts, payloads = uploader.load_plan(plan_file)
 
     if not workouts:
         print("[ERROR] Nie znaleziono treningów do uploadu")
@@ -600,11 +696,12 @@ def main():
     # Pytaj użytkownika
     print(f"\nZnaleziono {len(workouts)} treningów biegowych.")
     print("\nOpcje:")
-    print("1. Upload wszystkich treningów (bez schedulowania)")
+    print("1. Upload treningów (bez schedulowania)")
     print("2. Upload + scheduluj od dzisiejszej daty")
     print("3. Upload + scheduluj od konkretnej daty")
     print("4. Tylko generuj JSON (bez uploadu)")
     print("5. Anuluj")
+    print("(1-3 wysyłają tylko treningi zmienione od ostatniego uploadu, patrz plan/manifests/)")
 
     choice = input("\nWybierz opcję (1-5): ").strip()
 
@@ -629,54 +726,35 @@ def main():
             print("[ERROR] Nieprawidłowy format daty")
             return
 
-    # Mapowanie dni na offset
-    day_offset = {
-        'PON': 0, 'WT': 1, 'ŚR': 2, 'CZW': 3, 'PT': 4, 'SOB': 5, 'NIEDZ': 6
-    }
-
     # Proces uploadu
     print("\n" + "=" * 60)
     if choice == '4':
         print("Generowanie JSON...")
         output_dir = Path(__file__).parent / 'plan' / 'workouts_json'
-        output_dir.mkdir(exist_ok=True)
-
-        for workout in workouts:
-            workout_json = uploader.generate_garmin_workout_json(workout)
-            filename = f"week{workout['week']:02d}_{workout['day']}.json"
 
-            with open(output_dir / filename, 'w', encoding='utf-8') as f:
-                json.dump(workout_json, f, indent=2, ensure_ascii=False)
-
-            print(f"[OK] {filename}")
+        # Zapisywane są tylko pliki, których treść się zmieniła
+        files = {
+            workout_filename(workout): workout_json
+            for workout, workout_json in zip(workouts, payloads)
+        }
+        counts = plan_cache.write_workout_files(output_dir, files)
 
-        print(f"\n[OK] Wygenerowano {len(workouts)} plików JSON w: {output_dir}")
+        print(f"\n[OK] {len(files)} plików JSON w: {output_dir}")
+        print(f"     zapisano: {counts['written']}, bez zmian: {counts['unchanged']}, "
+              f"usunięto: {counts['removed']}")
 
     else:
-        print("Uploading workouts...")
-        success_count = 0
+        print(f"Uploading workouts ({config.UPLOAD_CONCURRENCY} wątków)...")
+        scheduling = start_date is not None and choice in ['2', '3']
 
-        for workout in workouts:
-            # Generate JSON
-            workout_json = uploader.generate_garmin_workout_json(workout)
-
-            # Upload
-            workout_id = uploader.upload_workout(workout_json)
-            if workout_id:
-                success_count += 1
-
-                # Schedule if requested
-                if start_date and choice in ['2', '3']:
-                    # Oblicz datę dla tego treningu
-                    week_offset = (workout['week'] - 1) * 7
-                    day_off = day_offset.get(workout['day'], 0)
-                    workout_date = start_date + timedelta(days=week_offset + day_off)
-
-                    uploader.schedule_workout(workout_id, workout_date)
-
-        print("\n" + "=" * 60)
-        print(f"[OK] Zakończono: {success_count}/{len(workouts)} treningów uploaded")
-        print("=" * 60)
+        started = time.perf_counter()
+        try:
+            results = uploader.sync_plan(workouts, plan_file, start_date if scheduling else None,
+                                         payloads=payloads)
+        except Exception as e:
+            print(f"[ERROR] Błąd synchronizacji planu: {e}")
+            return
+        uploader.print_upload_report(results, time.perf_counter() - started, scheduling)
 
 
 if __name__ == '__main__':
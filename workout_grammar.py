@@ -0,0 +1,363 @@
+"""
+Workout Grammar - Single-pass parser for workout descriptions in plan markdown
+
+A description such as
+
+    Interwały 8x400m @ 3:35-3:40/km (400m trucht), 2 km R + 2 km WB = **10 km**
+
+is scanned once with one compiled regex into tokens (repeats, ladders,
+recoveries, warmup/cooldown segments, keywords, ...). The tokens are then
+reduced to a typed AST (WorkoutAst), which produces the same `details`
+dictionary the upload code has always used. Text that looks like workout
+syntax but was not used by the grammar ends up in WorkoutAst.unparsed.
+"""
+
+import re
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, List, Dict, Any
+
+# Pace: 3:35 or a range 3:35-3:40 (the faster, first value is used)
+_PACE = r'[\d:]+(?:-[\d:]+)?'
+
+# Alternatives are tried in order at each position; the first one that
+# matches wins and scanning continues after it. Paces following a repeat are
+# read with a lookahead so the numbers stay available to the next tokens
+# (e.g. "6x600m 400m trucht").
+TOKEN_RE = re.compile(
+    rf'''
+    (?=[=\dPpIiLlDBoTtŚś@])  # cheap first-character check before trying the alternatives
+    (?:
+      (?P<total>=\ \*\*(?P<total_km>\d+(?:\.\d+)?)\s*km\*\*)
+    | (?P<ladder>(?P<l1>\d+)-(?P<l2>\d+)-(?P<l3>\d+)\s*km\s*@\s*(?P<ladder_pace>[\d:]+))
+    | (?P<repeat>(?P<reps>\d+)x(?P<amount>[\d.]+)
+        (?: (?P<seconds>s)
+          | (?P<gap>\s*)(?P<unit>km|min|m)?(?=\s*(?P<at>@)?\s*(?P<pace>{_PACE})?)
+        ))
+    | (?P<segment>(?P<segment_km>\d+)\s*km\s+(?P<segment_kind>R|WB))
+    | (?P<recovery>(?P<recovery_value>\d+)(?P<recovery_unit>s|m|\s*min)?(?P<recovery_gap>\s*)
+        (?P<recovery_word>zej[sśS]cie|trucht|recovery))
+    | (?P<finish>(?P<finish_part>ostatnie|środkowe)\s+(?P<finish_km>\d+)\s+km\s+@\s+(?P<finish_pace>[\d:]+))
+    | (?P<keyword>Podbiegi|podbiegi|Interwały|interwały|Ladder|ladder|Długi\ bieg|BC2|ostatnie
+        |(?i:tempo|progresywny|środkowe))
+    | (?P<stray>@(?=\s*(?P<stray_pace>[\d:]+(?:-[\d:]+)?(?:/km)?)?)|\d+\s*x\s*\d+)
+    )
+    ''',
+    re.VERBOSE
+)
+
+# Plan structure: "### Tydzień N" headings and "- **DAY:** description" lines
+PLAN_LINE_RE = re.compile(
+    r'^(?:### Tydzień (?P<week>\d+)|-?[^\S\n]*\*\*(?P<day>[A-ZŁŚĆĄĘŻŹŃÓ]+):\*\* (?P<description>.+))',
+    re.MULTILINE
+)
+
+DEFAULT_WARMUP_KM = 2
+DEFAULT_COOLDOWN_KM = 2
+DEFAULT_HILL_RECOVERY_S = 90
+DEFAULT_JOG_RECOVERY_M = 400
+DEFAULT_TEMPO_RECOVERY_MIN = 2
+HILL_PACE = '3:35'  # tempo 5K
+
+
+@dataclass(frozen=True, slots=True)
+class Repeat:
+    """N x (work, recovery) block"""
+    repeat: int
+    work_pace: str
+    recovery_type: str
+    work_distance: Optional[int] = None  # meters
+    work_duration: Optional[int] = None  # seconds
+    recovery_distance: Optional[int] = None  # meters
+    recovery_duration: Optional[int] = None  # seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        interval = {'repeat': self.repeat}
+        if self.work_distance is not None:
+            interval['work_distance'] = self.work_distance
+        else:
+            interval['work_duration'] = self.work_duration
+        interval['work_pace'] = self.work_pace
+        interval['recovery_type'] = self.recovery_type
+        if self.recovery_distance is not None:
+            interval['recovery_distance'] = self.recovery_distance
+        else:
+            interval['recovery_duration'] = self.recovery_duration
+        return interval
+
+
+@dataclass(frozen=True, slots=True)
+class LongRun:
+    """Long run variation (easy, progressive, tempo finish, tempo middle)"""
+    variation: str
+    tempo_km: Optional[int] = None
+    tempo_pace: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class WorkoutAst:
+    """Parsed workout description"""
+    type: Optional[str]
+    warmup_km: int = DEFAULT_WARMUP_KM
+    cooldown_km: int = DEFAULT_COOLDOWN_KM
+    total_km: float = 0
+    intervals: Tuple[Repeat, ...] = ()
+    long_run: Optional[LongRun] = None
+    unparsed: Tuple[str, ...] = ()
+
+    def to_details(self) -> Optional[Dict[str, Any]]:
+        """The `details` dictionary used by generate_garmin_workout_json (None if not a workout)"""
+        if not self.type:
+            return None
+
+        details = {
+            'type': self.type,
+            'warmup_km': self.warmup_km,
+            'cooldown_km': self.cooldown_km,
+            'intervals': [interval.to_dict() for interval in self.intervals],
+            'total_km': self.total_km,
+        }
+        if self.long_run is not None:
+            details['variation'] = self.long_run.variation
+            if self.long_run.tempo_km is not None:
+                details['tempo_km'] = self.long_run.tempo_km
+                details['tempo_pace'] = self.long_run.tempo_pace
+        return details
+
+
+@dataclass(slots=True)
+class _Scan:
+    """Tokens of one description: first occurrence per rule plus keyword flags"""
+    total: Optional[re.Match] = None
+    warmup: Optional[re.Match] = None
+    cooldown: Optional[re.Match] = None
+    ladder: Optional[re.Match] = None
+    repeats: List[re.Match] = field(default_factory=list)
+    recoveries: List[re.Match] = field(default_factory=list)
+    finishes: List[re.Match] = field(default_factory=list)
+    keywords: set = field(default_factory=set)
+    strays: List[str] = field(default_factory=list)
+
+
+def _scan(description: str) -> _Scan:
+    scan = _Scan()
+    position = 0
+
+    for match in TOKEN_RE.finditer(description):
+        kind = match.lastgroup  # top-level alternative (outer groups close last)
+
+        if kind == 'stray':
+            # "@ pace" right after a repeat was already read by its lookahead
+            if match.start() >= position:
+                scan.strays.append(' '.join(filter(None, (match.group(0), match.group('stray_pace')))))
+            continue
+
+        if kind == 'repeat' and match.group('pace'):
+            position = match.end('pace')
+
+        if kind == 'total':
+            scan.total = scan.total or match
+        elif kind == 'ladder':
+            scan.ladder = scan.ladder or match
+        elif kind == 'repeat':
+            scan.repeats.append(match)
+        elif kind == 'segment':
+            if match.group('segment_kind') == 'R':
+                scan.warmup = scan.warmup or match
+            else:
+                scan.cooldown = scan.cooldown or match
+        elif kind == 'recovery':
+            scan.recoveries.append(match)
+        elif kind == 'finish':
+            scan.finishes.append(match)
+            scan.keywords.add(match.group('finish_part').lower())
+        else:
+            scan.keywords.add(match.group('keyword').lower())
+
+    return scan
+
+
+def _first(matches, predicate):
+    return next((m for m in matches if predicate(m)), None)
+
+
+def _is_int(text: str) -> bool:
+    return text.isdigit()
+
+
+def _recovery(scan: _Scan, units, words, spaced=False) -> Optional[int]:
+    """
+    Value of the first recovery token with one of the units and words (word
+    prefixes); `spaced` requires whitespace before the word ("90s zejście")
+    """
+    match = _first(scan.recoveries, lambda m: (m.group('recovery_unit') or '').strip() in units
+                   and m.group('recovery_word').startswith(words)
+                   and (m.group('recovery_gap') or not spaced))
+    return int(match.group('recovery_value')) if match else None
+
+
+def _hill_repeats(scan: _Scan, used: list) -> Tuple[Repeat, ...]:
+    match = _first(scan.repeats, lambda m: m.group('seconds') and _is_int(m.group('amount')))
+    if not match:
+        return ()
+
+    used.append(match)
+    recovery = _recovery(scan, {'s'}, ('zej',), spaced=True)
+    return (Repeat(repeat=int(match.group('reps')),
+                   work_duration=int(match.group('amount')),
+                   work_pace=HILL_PACE,
+                   recovery_type='down_jog',
+                   recovery_duration=recovery if recovery is not None else DEFAULT_HILL_RECOVERY_S),)
+
+
+def _long_intervals(scan: _Scan, used: list) -> Tuple[Repeat, ...]:
+    match = _first(scan.repeats, lambda m: m.group('unit') == 'km' and m.group('at') and m.group('pace'))
+    if match:
+        used.append(match)
+        recovery = _recovery(scan, {'', 'm'}, ('trucht', 'recovery'))
+        return (Repeat(repeat=int(match.group('reps')),
+                       work_distance=int(float(match.group('amount')) * 1000),
+                       work_pace=match.group('pace').split('-')[0],
+                       recovery_type='jog',
+                       recovery_distance=recovery if recovery is not None else DEFAULT_JOG_RECOVERY_M),)
+
+    if 'ladder' in scan.keywords and scan.ladder:
+        used.append(scan.ladder)
+        pace = scan.ladder.group('ladder_pace')
+        return tuple(
+            Repeat(repeat=1, work_distance=int(scan.ladder.group(name)) * 1000, work_pace=pace,
+                   recovery_type='jog', recovery_distance=DEFAULT_JOG_RECOVERY_M)
+            for name in ('l1', 'l2', 'l3')
+        )
+    return ()
+
+
+def _intervals(scan: _Scan, used: list) -> Tuple[Repeat, ...]:
+    match = _first(scan.repeats, lambda m: _is_int(m.group('amount')) and m.group('pace')
+                   and (m.group('unit') is None or (m.group('unit') == 'm' and not m.group('gap'))))
+    if not match:
+        return ()
+
+    used.append(match)
+    recovery = _recovery(scan, {'', 'm'}, ('trucht',))
+    return (Repeat(repeat=int(match.group('reps')),
+                   work_distance=int(match.group('amount')),
+                   work_pace=match.group('pace').split('-')[0],
+                   recovery_type='jog',
+                   recovery_distance=recovery if recovery is not None else DEFAULT_JOG_RECOVERY_M),)
+
+
+def _tempo(scan: _Scan, used: list) -> Tuple[Repeat, ...]:
+    match = _first(scan.repeats, lambda m: m.group('unit') == 'min' and _is_int(m.group('amount'))
+                   and m.group('at') and m.group('pace'))
+    if not match:
+        return ()
+
+    used.append(match)
+    recovery = _recovery(scan, {'min'}, ('recovery',), spaced=True)
+    return (Repeat(repeat=int(match.group('reps')),
+                   work_duration=int(match.group('amount')) * 60,
+                   work_pace=match.group('pace').split('-')[0],
+                   recovery_type='jog',
+                   recovery_duration=(recovery if recovery is not None else DEFAULT_TEMPO_RECOVERY_MIN) * 60),)
+
+
+def _long_run(scan: _Scan, description: str, used: list) -> Optional[LongRun]:
+    if 'progresywny' in scan.keywords:
+        return LongRun('progressive')
+
+    if 'ostatnie' in scan.keywords and 'km' in description:
+        match = _first(scan.finishes, lambda m: m.group('finish_part') == 'ostatnie')
+        if not match:
+            return None
+        used.append(match)
+        return LongRun('tempo_finish', int(match.group('finish_km')), match.group('finish_pace'))
+
+    if 'środkowe' in scan.keywords:
+        match = _first(scan.finishes, lambda m: m.group('finish_part') == 'środkowe')
+        if not match:
+            return None
+        used.append(match)
+        return LongRun('tempo_middle', int(match.group('finish_km')), match.group('finish_pace'))
+
+    return LongRun('easy')
+
+
+@lru_cache(maxsize=4096)
+def parse_description(description: str) -> WorkoutAst:
+    """
+    Parse one workout description into a WorkoutAst
+
+    Workout types are recognized in this order: hill repeats (Podbiegi),
+    long intervals (N x D km, incl. ladders), intervals (Interwały), tempo
+    (Tempo Run / tempo) and long runs (Długi bieg / BC2).
+
+    The AST is immutable, so results are cached: plans repeat the same
+    descriptions a lot (every week, every athlete).
+
+    Args:
+        description: Day description from the plan (text after "**DAY:**")
+
+    Returns:
+        WorkoutAst (type None if the description is not a running workout)
+    """
+    scan = _scan(description)
+    keywords = scan.keywords
+    used = []
+    intervals = ()
+    long_run = None
+
+    if 'podbiegi' in keywords:
+        workout_type = 'hill_repeats'
+        intervals = _hill_repeats(scan, used)
+    elif any(m.group('unit') == 'km' for m in scan.repeats):
+        workout_type = 'long_intervals'
+        intervals = _long_intervals(scan, used)
+    elif 'interwały' in keywords:
+        workout_type = 'intervals'
+        intervals = _intervals(scan, used)
+    elif 'tempo' in keywords:
+        workout_type = 'tempo'
+        intervals = _tempo(scan, used)
+    elif 'długi bieg' in keywords or 'bc2' in keywords:
+        workout_type = 'long_run'
+        long_run = _long_run(scan, description, used)
+    else:
+        workout_type = None
+
+    # Workout syntax the grammar did not use: repeats/ladders/finishes outside
+    # the chosen rule and stray "@ pace" / "N x M" text
+    unparsed = [m.group(0).strip() for m in scan.repeats + scan.finishes + [scan.ladder]
+                if m is not None and m not in used]
+    unparsed += scan.strays
+
+    return WorkoutAst(
+        type=workout_type,
+        warmup_km=int(scan.warmup.group('segment_km')) if scan.warmup else DEFAULT_WARMUP_KM,
+        cooldown_km=int(scan.cooldown.group('segment_km')) if scan.cooldown else DEFAULT_COOLDOWN_KM,
+        total_km=float(scan.total.group('total_km')) if scan.total else 0,
+        intervals=intervals,
+        long_run=long_run,
+        unparsed=tuple(unparsed),
+    )
+
+
+def iter_plan_lines(content):
+    """
+    Yield ('week', N) and ('day', DAY, description) items of a plan in one pass
+
+    Args:
+        content: Plan markdown, or any iterable of its lines (open file,
+            sys.stdin) - lines are then matched one at a time, so the plan
+            is never held in memory as a whole
+    """
+    if isinstance(content, str):
+        matches = PLAN_LINE_RE.finditer(content)
+    else:
+        matches = filter(None, map(PLAN_LINE_RE.match, content))
+
+    for match in matches:
+        if match.group('week'):
+            yield 'week', int(match.group('week'))
+        else:
+            yield 'day', match.group('day'), match.group('description')
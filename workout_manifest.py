@@ -0,0 +1,163 @@
+"""
+Workout Manifest - Tracks which plan workouts already exist in Garmin Connect
+
+For every uploaded workout the manifest stores its Garmin ID, a hash of its
+content and where it is scheduled. Re-running the upload compares the
+hashes and only creates, updates or deletes the workouts that changed.
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, Set
+
+# Client IDs (derived from the plan name, not the workout content) and fields
+# filled in by Garmin; they are not part of the workout content
+VOLATILE_FIELDS = {'workoutId', 'stepId', 'ownerId'}
+
+# Root of the plan files (athlete subdirectories, manifests); plan IDs are relative to it
+PLAN_DIR = Path(os.getenv('GARMIN_PLAN_DIR') or Path(__file__).parent / 'plan')
+MANIFEST_DIR = PLAN_DIR / 'manifests'
+
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def content_hash(workout_json: Dict[str, Any]) -> str:
+    """
+    Hash of a workout payload without its client/server-assigned IDs
+
+    Args:
+        workout_json: Workout in Garmin Connect format
+
+    Returns:
+        Hex SHA-256 digest (stable across runs for the same content)
+    """
+    canonical = json.dumps(_strip_volatile(workout_json), sort_keys=True, ensure_ascii=False,
+                           separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def plan_id(plan_file: Path, plan_dir: Path = None) -> str:
+    """
+    File-name-safe identifier of a plan
+
+    Plans directly in plan_dir (default: plan/) use their name; plans in
+    athlete subdirectories include the directory (plan/anna/10km.md ->
+    'anna__10km'), so plans with the same name for different athletes do
+    not share a manifest or cache.
+    """
+    path = Path(plan_file).resolve()
+    try:
+        relative = path.relative_to(Path(plan_dir or PLAN_DIR).resolve())
+    except ValueError:
+        return path.stem
+    return '__'.join(relative.with_suffix('').parts)
+
+
+def manifest_path(plan_file: Path) -> Path:
+    """Manifest location for a plan: plan/manifests/<plan id>.json"""
+    return MANIFEST_DIR / f"{plan_id(plan_file)}.json"
+
+
+def load_manifest(path: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Load manifest entries (workout name -> workout_id, hash, scheduled_date, schedule_id)
+
+    Returns:
+        Entries dictionary, empty when the manifest does not exist yet
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('workouts', {})
+
+
+def save_manifest(path: Path, plan_file: Path, entries: Dict[str, Dict[str, Any]]):
+    """Write the manifest atomically (temp file + rename)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    data = {
+        'plan': Path(plan_file).name,
+        'updated': datetime.now().isoformat(timespec='seconds'),
+        'workouts': dict(sorted(entries.items(), key=lambda item: (item[1].get('week', 0), item[0]))),
+    }
+
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    tmp_path.replace(path)
+
+
+def tracked_workout_ids(manifest_dir: Path = None) -> Set[int]:
+    """Garmin IDs of the workouts tracked in any manifest in manifest_dir"""
+    manifest_dir = Path(manifest_dir or MANIFEST_DIR)
+    if not manifest_dir.exists():
+        return set()
+
+    tracked = set()
+    for path in sorted(manifest_dir.glob('*.json')):
+        tracked.update(entry['workout_id'] for entry in load_manifest(path).values() if entry.get('workout_id'))
+    return tracked
+
+
+def forget_workouts(workout_ids, manifest_dir: Path = None) -> int:
+    """
+    Remove entries of deleted workouts from every manifest in manifest_dir
+
+    Without this the next upload would treat those workouts as unchanged
+    and never create them again.
+
+    Returns:
+        Number of removed entries
+    """
+    manifest_dir = Path(manifest_dir or MANIFEST_DIR)
+    if not workout_ids or not manifest_dir.exists():
+        return 0
+
+    removed = 0
+    for path in sorted(manifest_dir.glob('*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        entries = data.get('workouts', {})
+        kept = {name: entry for name, entry in entries.items() if entry.get('workout_id') not in workout_ids}
+        if len(kept) != len(entries):
+            removed += len(entries) - len(kept)
+            save_manifest(path, data.get('plan', path.stem), kept)
+
+    return removed
+
+
+def iter_workouts(client, page_size: int = 100) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over all workouts in the Garmin Connect account
+
+    get_workouts returns at most `page_size` workouts per call, so the list is
+    read page by page until a short page comes back.
+
+    Args:
+        client: Logged-in garminconnect.Garmin client
+        page_size: Workouts requested per call
+
+    Yields:
+        Workout summaries (workoutId, workoutName, createdDate, ...)
+    """
+    start = 0
+    while True:
+        page = client.get_workouts(start, page_size) or []
+        yield from page
+
+        if len(page) < page_size:
+            return
+        start += page_size
@@ -0,0 +1,252 @@
+"""
+Workout Model - Typed plan workouts and their Garmin Connect JSON
+
+A parsed plan workout (week, day, description, `details`) becomes a Workout
+made of Steps and RepeatGroups. Step, condition and target types are shared
+immutable constants, and to_garmin_json is the only place that knows the
+Garmin Connect workout format, so the parse -> generate path does not need
+a Garmin connection.
+"""
+
+import hashlib
+from itertools import count
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union, Dict, Any
+
+
+@dataclass(frozen=True, slots=True)
+class StepType:
+    id: int
+    key: str
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"stepTypeId": self.id, "stepTypeKey": self.key}
+
+
+@dataclass(frozen=True, slots=True)
+class TargetType:
+    id: int
+    key: str
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"workoutTargetTypeId": self.id, "workoutTargetTypeKey": self.key}
+
+
+@dataclass(frozen=True, slots=True)
+class ConditionType:
+    id: int
+    key: str
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"conditionTypeId": self.id, "conditionTypeKey": self.key}
+
+
+WARMUP = StepType(1, 'warmup')
+COOLDOWN = StepType(2, 'cooldown')
+INTERVAL = StepType(3, 'interval')
+RECOVERY = StepType(4, 'recovery')
+
+NO_TARGET = TargetType(1, 'no.target')
+PACE_ZONE = TargetType(6, 'pace.zone')
+
+TIME = ConditionType(2, 'time')
+DISTANCE = ConditionType(3, 'distance')
+
+RUNNING = {"sportTypeId": 1, "sportTypeKey": "running"}
+
+# Distance conditions are shown in kilometers; time conditions use seconds directly
+KILOMETER_UNIT = {"unitId": 2, "unitKey": "kilometer", "factor": 100000.0}
+
+# Pace target range around the planned pace (about +/- 10 s/km)
+PACE_TOLERANCE_MPS = 0.15
+
+MAX_DESCRIPTION_LENGTH = 250
+
+# Client-side ID ranges (Garmin assigns its own IDs on upload)
+WORKOUT_ID_RANGE = (1000000, 9999999)
+STEP_ID_RANGE = (7000000000, 7999999999)
+
+
+def _stable_int(key: str, low: int, high: int) -> int:
+    """Integer in [low, high] derived from key (same key -> same number on every run)"""
+    digest = hashlib.sha256(key.encode('utf-8')).digest()
+    return low + int.from_bytes(digest[:8], 'big') % (high - low + 1)
+
+
+def pace_to_mps(pace: str) -> float:
+    """Pace min/km ('3:48') -> m/s, the unit Garmin uses for pace targets"""
+    minutes, seconds = pace.split(':')[:2]
+    return round(1000.0 / (int(minutes) * 60 + int(seconds)), 2)
+
+
+@dataclass(frozen=True, slots=True)
+class Step:
+    """Executable step: end condition (meters or seconds) and optional pace target"""
+    step_type: StepType
+    condition: ConditionType
+    value: float
+    pace_mps: Optional[float] = None
+
+    @classmethod
+    def distance(cls, step_type: StepType, meters, pace: Optional[str] = None) -> 'Step':
+        return cls(step_type, DISTANCE, float(meters), pace_to_mps(pace) if pace else None)
+
+    @classmethod
+    def time(cls, step_type: StepType, seconds, pace: Optional[str] = None) -> 'Step':
+        return cls(step_type, TIME, float(seconds), pace_to_mps(pace) if pace else None)
+
+    def condition_json(self) -> Dict[str, Any]:
+        return {
+            "endCondition": self.condition.to_json(),
+            "endConditionValue": self.value,
+            "preferredEndConditionUnit": dict(KILOMETER_UNIT) if self.condition is DISTANCE else None,
+        }
+
+    def target_json(self) -> Dict[str, Any]:
+        if self.pace_mps is None:
+            return {"targetType": NO_TARGET.to_json(), "targetValueOne": None, "targetValueTwo": None}
+        return {
+            "targetType": PACE_ZONE.to_json(),
+            "targetValueOne": self.pace_mps - PACE_TOLERANCE_MPS,
+            "targetValueTwo": self.pace_mps + PACE_TOLERANCE_MPS,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class RepeatGroup:
+    """Steps repeated `iterations` times (work + recovery)"""
+    iterations: int
+    steps: Tuple[Step, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Workout:
+    week: int
+    day: str
+    description: str
+    steps: Tuple[Union[Step, RepeatGroup], ...]
+
+    @property
+    def name(self) -> str:
+        return f"Tydzień {self.week}: {self.day}"
+
+    @classmethod
+    def from_plan(cls, workout: Dict[str, Any]) -> 'Workout':
+        """
+        Build the model from a parsed plan workout
+
+        Args:
+            workout: {'week', 'day', 'description', 'details'} from parse_training_plan
+        """
+        details = workout['details']
+        steps = []
+
+        if details['warmup_km'] > 0:
+            steps.append(Step.distance(WARMUP, details['warmup_km'] * 1000))
+
+        if details['type'] in ('intervals', 'long_intervals', 'hill_repeats', 'tempo'):
+            for interval in details['intervals']:
+                if 'work_distance' in interval:
+                    work = Step.distance(INTERVAL, interval['work_distance'], interval.get('work_pace'))
+                else:
+                    work = Step.time(INTERVAL, interval['work_duration'], interval.get('work_pace'))
+
+                if 'recovery_distance' in interval:
+                    recovery = Step.distance(RECOVERY, interval['recovery_distance'])
+                else:
+                    recovery = Step.time(RECOVERY, interval['recovery_duration'])
+
+                steps.append(RepeatGroup(interval['repeat'], (work, recovery)))
+
+        elif details['type'] == 'long_run':
+            main_distance = details['total_km'] - details['warmup_km'] - details['cooldown_km']
+
+            if details.get('variation') == 'tempo_finish':
+                easy_distance = main_distance - details['tempo_km']
+                steps.append(Step.distance(INTERVAL, int(easy_distance * 1000)))
+                steps.append(Step.distance(INTERVAL, details['tempo_km'] * 1000, details['tempo_pace']))
+            else:
+                steps.append(Step.distance(INTERVAL, int(main_distance * 1000)))
+
+        if details['cooldown_km'] > 0:
+            steps.append(Step.distance(COOLDOWN, details['cooldown_km'] * 1000))
+
+        return cls(workout['week'], workout['day'], workout['description'], tuple(steps))
+
+    def garmin_ids(self, plan: str = '') -> Tuple[int, int]:
+        """
+        Deterministic (workout_id, first_step_id) for this workout
+
+        Derived from the plan, week and day, so the same plan produces the
+        same JSON on every run. Step IDs leave room for the steps that follow.
+
+        Args:
+            plan: Plan identifier (e.g. workout_manifest.plan_id), keeps IDs of
+                  workouts with the same week and day in different plans apart
+        """
+        key = f"{plan}|{self.week}|{self.day}"
+        low, high = STEP_ID_RANGE
+        return (_stable_int(f"workout|{key}", *WORKOUT_ID_RANGE),
+                _stable_int(f"step|{key}", low, high - 1000))
+
+    def to_garmin_json(self, workout_id: Optional[int] = None, first_step_id: Optional[int] = None,
+                       plan: str = '') -> Dict[str, Any]:
+        """
+        Workout in Garmin Connect format
+
+        Args:
+            workout_id: Temporary workout ID (Garmin assigns its own on upload)
+            first_step_id: ID of the first step; the following steps count up from it
+            plan: Plan identifier used for the IDs that are not given (see garmin_ids)
+        """
+        if workout_id is None or first_step_id is None:
+            default_workout_id, default_step_id = self.garmin_ids(plan)
+            workout_id = default_workout_id if workout_id is None else workout_id
+            first_step_id = default_step_id if first_step_id is None else first_step_id
+
+        step_ids = count(first_step_id)
+        steps = []
+
+        for item in self.steps:
+            if isinstance(item, RepeatGroup):
+                # Steps inside a repeat: end condition before target, order within the group
+                children = [
+                    {
+                        "type": "ExecutableStepDTO",
+                        "stepId": next(step_ids),
+                        "stepOrder": order,
+                        "stepType": step.step_type.to_json(),
+                        **step.condition_json(),
+                        **step.target_json(),
+                    }
+                    for order, step in enumerate(item.steps, 1)
+                ]
+                steps.append({
+                    "type": "RepeatGroupDTO",
+                    "stepId": next(step_ids),
+                    "stepOrder": len(steps) + 1,
+                    "numberOfIterations": item.iterations,
+                    "workoutSteps": children,
+                })
+            else:
+                steps.append({
+                    "type": "ExecutableStepDTO",
+                    "stepId": next(step_ids),
+                    "stepOrder": len(steps) + 1,
+                    "stepType": item.step_type.to_json(),
+                    **item.target_json(),
+                    **item.condition_json(),
+                })
+
+        return {
+            "workoutId": workout_id,
+            "ownerId": None,  # filled in by Garmin on upload
+            "workoutName": self.name,
+            "description": self.description[:MAX_DESCRIPTION_LENGTH],
+            "sportType": dict(RUNNING),
+            "workoutSegments": [{
+                "segmentOrder": 1,
+                "sportType": dict(RUNNING),
+                "workoutSteps": steps,
+            }],
+        }